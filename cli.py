@@ -1,36 +1,130 @@
 import sys
 from argparse import ArgumentParser, Namespace
+from pathlib import Path
 
-import render_box.client.submitter as submitter
-import render_box.client.worker as worker
-import render_box.monitor.ui.window as monitor
-import render_box.server.server as server
+# subcommands import their modules when they run, a worker must not pay for
+# the server, the monitor or Qt on startup
+from render_box.shared.log import Level, set_level
 
 
 def parse_args() -> Namespace:
     parser = ArgumentParser()
+    parser.add_argument(
+        "--log-level",
+        choices=[level.name.lower() for level in Level],
+        help="lowest level that is logged, defaults to info",
+    )
     command = parser.add_subparsers(dest="command")
-    command.add_parser("server", help="start server")
+    server_cmd = command.add_parser("server", help="start server")
+    server_cmd.add_argument(
+        "--mode",
+        choices=("thread", "async"),
+        default="thread",
+        help="thread per client or a single asyncio event loop",
+    )
+    server_cmd.add_argument("--host", default="localhost", help="address to bind")
+    server_cmd.add_argument("--port", type=int, default=65432, help="port to bind")
+    server_cmd.add_argument(
+        "--db", type=Path, help="sqlite database, defaults to the packaged one"
+    )
+    server_cmd.add_argument(
+        "--max-workers",
+        type=int,
+        default=16,
+        help="size of the db executor in async mode",
+    )
     submit = command.add_parser("submit", help="start server")
     submit.add_argument("num", type=int, help="number of tasks")
-    command.add_parser("worker", help="start worker")
+    submit.add_argument(
+        "--frames",
+        type=int,
+        default=0,
+        help="submit frame range jobs of this many frames instead of single tasks",
+    )
+    worker_cmd = command.add_parser("worker", help="start worker")
+    worker_cmd.add_argument(
+        "--poll",
+        action="store_true",
+        help="poll for tasks instead of having the server push them",
+    )
+    worker_cmd.add_argument(
+        "--slots", type=int, default=1, help="number of tasks to run concurrently"
+    )
+    worker_cmd.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        help="number of extra tasks to hold while all slots are busy",
+    )
     command.add_parser("monitor", help="start monitor")
+    metrics_cmd = command.add_parser("metrics", help="print server route metrics")
+    metrics_cmd.add_argument(
+        "--prometheus", action="store_true", help="print prometheus text format"
+    )
+    profile_cmd = command.add_parser("profile", help="profile the running server")
+    profile_cmd.add_argument(
+        "--seconds", type=float, default=10.0, help="length of the profiling window"
+    )
+    profile_cmd.add_argument(
+        "--messages", type=int, help="stop after profiling this many messages"
+    )
+    profile_cmd.add_argument(
+        "--route", action="append", help="only profile this route, repeatable"
+    )
+    profile_cmd.add_argument(
+        "--worker", action="append", help="only profile this client, repeatable"
+    )
+    profile_cmd.add_argument(
+        "--sort",
+        default="cumulative",
+        help="pstats sort key, e.g. cumulative, time or calls",
+    )
+    profile_cmd.add_argument("--limit", type=int, default=30, help="functions listed")
 
     return parser.parse_args()
 
 
 def main() -> int:
     args = parse_args()
+    if args.log_level:
+        set_level(args.log_level)
 
     if args.command == "server":
-        server.start_server()
+        if args.mode == "async":
+            import render_box.server.async_server as async_server
+
+            async_server.start_async_server(
+                max_workers=args.max_workers,
+                server_address=(args.host, args.port),
+                db_path=args.db,
+            )
+        else:
+            import render_box.server.server as server
+
+            server.start_server((args.host, args.port), db_path=args.db)
     elif args.command == "submit":
-        submitter.start_submitter(count=args.num)
+        import render_box.client.submitter as submitter
+
+        submitter.start_submitter(count=args.num, frames=args.frames)
     elif args.command == "worker":
-        worker.start_worker()
+        import render_box.client.worker as worker
+
+        worker.start_worker(poll=args.poll, slots=args.slots, prefetch=args.prefetch)
+    elif args.command == "metrics":
+        import render_box.client.metrics as metrics
+
+        metrics.print_metrics(prometheus=args.prometheus)
+    elif args.command == "profile":
+        import render_box.client.profile as profile
+
+        profile.print_profile(
+            args.seconds, args.messages, args.route, args.worker, args.sort, args.limit
+        )
     elif args.command == "monitor":
         from PySide6.QtWidgets import QApplication
 
+        import render_box.monitor.ui.window as monitor
+
         app = QApplication(sys.argv)
         app.setStyle("fusion")
         window = monitor.Window()
@@ -0,0 +1,56 @@
+import time
+from typing import Any
+
+from render_box.shared.codec import BINARY_CODEC, JSON_CODEC, Codec
+from render_box.shared.commands import TestCommand
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task
+from render_box.shared.worker import Worker
+
+
+def payloads() -> dict[str, Message]:
+    job = Job("bench")
+    for i in range(10_000):
+        job.add_task(Task(TestCommand(i % 10)))
+
+    jobs = [Job(f"Job {i}").serialize() for i in range(1000)]
+    workers = [Worker(i, f"render-{i:04}").serialize() for i in range(500)]
+
+    return {
+        "tasks.all (10k)": Message("all_tasks", [t.serialize() for t in job.tasks]),
+        "jobs.all (1k)": Message("all_jobs", jobs),
+        "workers.all (500)": Message("success", workers),
+        "tasks.next": Message("tasks", job.tasks[0].serialize()),
+    }
+
+
+def measure(codec: Codec, message: Message, iterations: int) -> tuple[Any, ...]:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        data = codec.encode(message)
+    encode = (time.perf_counter() - start) / iterations * 1e3
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        codec.decode(data)
+    decode = (time.perf_counter() - start) / iterations * 1e3
+
+    return len(data), encode, decode
+
+
+def run() -> None:
+    print(
+        f"{'payload':<20} {'codec':<7} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}"
+    )
+    for name, message in payloads().items():
+        iterations = 2000 if name == "tasks.next" else 10
+        for codec in (JSON_CODEC, BINARY_CODEC):
+            size, encode, decode = measure(codec, message, iterations)
+            print(
+                f"{name:<20} {codec.name:<7} {size:>10} {encode:>10.3f} {decode:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    run()
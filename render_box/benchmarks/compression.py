@@ -0,0 +1,58 @@
+import time
+import zlib
+
+from render_box.shared.codec import BINARY_CODEC, JSON_CODEC
+from render_box.shared.commands import TestCommand
+from render_box.shared.connection import MAX_FRAME_SIZE, decompress_frame
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task
+
+LEVELS = (1, 6, 9)
+ITERATIONS = 5
+
+
+def payloads() -> dict[str, Message]:
+    job = Job("bench")
+    for i in range(20_000):
+        job.add_task(Task(TestCommand(i % 10)))
+
+    jobs = [Job(f"Job {i}").serialize() for i in range(1000)]
+
+    return {
+        "jobs.create (20k)": Message("jobs.create", job.serialize()),
+        "tasks.all (20k)": Message("all_tasks", [t.serialize() for t in job.tasks]),
+        "jobs.all (1k)": Message("all_jobs", jobs),
+        "tasks.next": Message("tasks", job.tasks[0].serialize()),
+    }
+
+
+def run() -> None:
+    print(
+        f"{'payload':<18} {'codec':<7} {'level':>5} {'bytes':>10} {'ratio':>6}"
+        f" {'compress ms':>12} {'decompress ms':>14}"
+    )
+    for name, message in payloads().items():
+        for codec in (JSON_CODEC, BINARY_CODEC):
+            data = codec.encode(message)
+            print(f"{name:<18} {codec.name:<7} {'-':>5} {len(data):>10}")
+            for level in LEVELS:
+                start = time.perf_counter()
+                for _ in range(ITERATIONS):
+                    compressed = zlib.compress(data, level)
+                compress = (time.perf_counter() - start) / ITERATIONS * 1e3
+
+                start = time.perf_counter()
+                for _ in range(ITERATIONS):
+                    decompress_frame(compressed, MAX_FRAME_SIZE)
+                decompress = (time.perf_counter() - start) / ITERATIONS * 1e3
+
+                ratio = len(data) / len(compressed)
+                print(
+                    f"{name:<18} {codec.name:<7} {level:>5} {len(compressed):>10}"
+                    f" {ratio:>6.1f} {compress:>12.3f} {decompress:>14.3f}"
+                )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,66 @@
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from render_box.server import db
+from render_box.shared.commands import TestCommand
+from render_box.shared.job import Job
+from render_box.shared.task import Task
+
+
+def fresh_connection(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        PRAGMA synchronous = NORMAL;
+        PRAGMA journal_mode = WAL;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA cache_size = 10000;
+    """)
+    return conn
+
+
+def select_job_unpooled(path: Path, task_id: str) -> None:
+    conn = fresh_connection(path)
+    conn.execute(
+        "SELECT * FROM jobs WHERE id = (SELECT job_id FROM tasks WHERE id = ?);",
+        (task_id,),
+    ).fetchone()
+    conn.commit()
+    conn.execute("PRAGMA optimize;")
+    conn.close()
+
+
+def measure(name: str, fn: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - start) / iterations * 1e6
+    print(f"{name:<12} {per_call:10.1f} us/call")
+    return per_call
+
+
+def run(iterations: int = 2000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        db.configure(path)
+        db.init_db()
+
+        job = Job("bench")
+        task = Task(TestCommand(0))
+        job.add_task(task)
+        db.insert_job(job)
+        task_id = str(task.id)
+
+        before = measure(
+            "per-query", lambda: select_job_unpooled(path, task_id), iterations
+        )
+        after = measure("pooled", lambda: db.select_job(task_id), iterations)
+        print(f"speedup      {before / after:10.1f}x")
+
+        db.pool.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,45 @@
+import socket
+import time
+from threading import Thread
+
+from render_box.shared.connection import Connection
+from render_box.shared.message import Message
+
+SIZES = {"1 KB": 1024, "1 MB": 1024 * 1024, "50 MB": 50 * 1024 * 1024}
+TOTAL_BYTES = 200 * 1024 * 1024
+
+
+def payload(size: int) -> bytes:
+    overhead = len(Message("bench", "").as_json())
+    return Message("bench", "x" * (size - overhead)).as_json()
+
+
+def run() -> None:
+    for name, size in SIZES.items():
+        left, right = socket.socketpair()
+        sender, receiver = Connection(left), Connection(right)
+        frame = payload(size)
+        count = max(3, TOTAL_BYTES // size)
+
+        def send() -> None:
+            for _ in range(count):
+                sender.send_frame(frame)
+
+        thread = Thread(target=send)
+        start = time.perf_counter()
+        thread.start()
+        for _ in range(count):
+            receiver.recv()
+        elapsed = time.perf_counter() - start
+        thread.join()
+
+        throughput = count * len(frame) / elapsed / 1024 / 1024
+        per_frame = elapsed / count * 1e6
+        print(f"{name:>6}: {throughput:8.1f} MB/s {per_frame:12.1f} us/frame")
+
+        sender.close()
+        receiver.close()
+
+
+if __name__ == "__main__":
+    run()
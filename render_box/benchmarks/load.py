@@ -0,0 +1,261 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from render_box.shared.commands import TestCommand
+from render_box.shared.connection import Connection, PipelinedConnection
+from render_box.shared.frames import FrameRange
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task
+from render_box.shared.worker import Worker
+
+ROOT = Path(__file__).parents[2]
+# ratios worse than this are flagged when comparing against an older run
+REGRESSION = 0.9
+COMPARED = (
+    ("submit", "tasks_per_s", True),
+    ("dispatch", "tasks_per_s", True),
+    ("dispatch", "next_p50_ms", False),
+    ("dispatch", "next_p99_ms", False),
+    ("db_bytes", None, False),
+)
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def connect(port: int, codec: str) -> Connection:
+    connection = Connection.client_connection()
+    connection.connect(("localhost", port))
+    connection.negotiate(codecs=(codec,))
+    return connection
+
+
+def start_server(args: Namespace, port: int, db_path: Path) -> subprocess.Popen:
+    command = [sys.executable, str(ROOT / "cli.py"), "--log-level", "warning"]
+    command += ["server", "--mode", args.server, "--port", str(port)]
+    command += ["--db", str(db_path)]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=0.1).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def make_job(tasks: int, frames: bool) -> Job:
+    job = Job("bench")
+    if frames:
+        job.frames = FrameRange(TestCommand(0), 1, tasks)
+    else:
+        for _ in range(tasks):
+            job.add_task(Task(TestCommand(0)))
+    return job
+
+
+def submit(port: int, codec: str, jobs: int, tasks: int, frames: bool) -> float:
+    connection = PipelinedConnection(connect(port, codec))
+    messages = [
+        Message("jobs.create", make_job(tasks, frames).serialize()) for _ in range(jobs)
+    ]
+
+    start = time.perf_counter()
+    pending: list[Future[Message]] = [connection.request(m) for m in messages]
+    for future in pending:
+        future.result()
+    seconds = time.perf_counter() - start
+
+    connection.send(Message("connection.close"))
+    connection.close()
+    return seconds
+
+
+def work(port: int, codec: str, batch: int) -> dict[str, Any]:
+    connection = connect(port, codec)
+    worker = Worker(None, f"bench-{os.getpid()}-{time.monotonic_ns()}")
+    connection.send_recv(Message("workers.register", worker.serialize()))
+
+    next_ms: list[float] = []
+    complete_ms: list[float] = []
+    completed = 0
+    request = Message("tasks.next", {"count": batch})
+    while True:
+        start = time.perf_counter()
+        tasks = connection.send_recv(request).data or []
+        next_ms.append((time.perf_counter() - start) * 1e3)
+        if not tasks:
+            break
+
+        for task in tasks:
+            start = time.perf_counter()
+            connection.send_recv(Message("tasks.complete", task["id"]))
+            complete_ms.append((time.perf_counter() - start) * 1e3)
+            completed += 1
+
+    connection.send(Message("connection.close"))
+    connection.close()
+    return {"completed": completed, "next_ms": next_ms, "complete_ms": complete_ms}
+
+
+def run_clients(executor: Executor, count: int, fn: Any, *args: Any) -> list[Any]:
+    futures = [executor.submit(fn, *args) for _ in range(count)]
+    return [future.result() for future in futures]
+
+
+def run(args: Namespace) -> dict[str, Any]:
+    port = free_port()
+    pool = ProcessPoolExecutor if args.clients == "process" else ThreadPoolExecutor
+    clients = max(args.submitters, args.workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        server = start_server(args, port, db_path)
+        try:
+            with pool(max_workers=clients) as executor:
+                start = time.perf_counter()
+                run_clients(
+                    executor,
+                    args.submitters,
+                    submit,
+                    port,
+                    args.codec,
+                    args.jobs,
+                    args.tasks,
+                    args.frames,
+                )
+                submit_seconds = time.perf_counter() - start
+
+                start = time.perf_counter()
+                results = run_clients(
+                    executor, args.workers, work, port, args.codec, args.batch
+                )
+                dispatch_seconds = time.perf_counter() - start
+
+            connection = connect(port, "json")
+            metrics = connection.send_recv(Message("metrics")).data
+            connection.send(Message("connection.close"))
+            connection.close()
+        finally:
+            server.terminate()
+            server.wait(10)
+
+        db_bytes = sum(
+            path.stat().st_size for path in Path(tmp).glob("bench.db*") if path.exists()
+        )
+
+    jobs = args.submitters * args.jobs
+    tasks = jobs * args.tasks
+    completed = sum(result["completed"] for result in results)
+    next_ms = [ms for result in results for ms in result["next_ms"]]
+    complete_ms = [ms for result in results for ms in result["complete_ms"]]
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "config": vars(args) | {"output": None, "compare": None},
+        "submit": {
+            "jobs": jobs,
+            "tasks": tasks,
+            "seconds": submit_seconds,
+            "jobs_per_s": jobs / submit_seconds,
+            "tasks_per_s": tasks / submit_seconds,
+        },
+        "dispatch": {
+            "tasks": completed,
+            "seconds": dispatch_seconds,
+            "tasks_per_s": completed / dispatch_seconds,
+            "next_requests": len(next_ms),
+            "next_p50_ms": percentile(next_ms, 0.5),
+            "next_p99_ms": percentile(next_ms, 0.99),
+            "complete_p50_ms": percentile(complete_ms, 0.5),
+            "complete_p99_ms": percentile(complete_ms, 0.99),
+        },
+        "db_bytes": db_bytes,
+        "server": metrics,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def value(results: dict[str, Any], section: str, key: Optional[str]) -> Any:
+    return results[section] if key is None else results[section][key]
+
+
+def report(results: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    print(f"commit      {results['commit']}")
+    for section, key, higher_is_better in COMPARED:
+        name = section if key is None else f"{section}.{key}"
+        current = value(results, section, key)
+        line = f"{name:<22} {current:>14.3f}"
+        if baseline:
+            before = value(baseline, section, key)
+            if before and current:
+                ratio = current / before if higher_is_better else before / current
+                flag = "  regression" if ratio < REGRESSION else ""
+                line += f"  was {before:>14.3f}  x{ratio:.2f}{flag}"
+        print(line)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="load and dispatch benchmark")
+    parser.add_argument("--server", choices=("thread", "async"), default="thread")
+    parser.add_argument("--clients", choices=("thread", "process"), default="thread")
+    parser.add_argument("--codec", choices=("json", "binary"), default="binary")
+    parser.add_argument("--submitters", type=int, default=4)
+    parser.add_argument("--jobs", type=int, default=25, help="jobs per submitter")
+    parser.add_argument("--tasks", type=int, default=100, help="tasks per job")
+    parser.add_argument(
+        "--frames", action="store_true", help="submit frame ranges instead of tasks"
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=1, help="tasks per tasks.next")
+    parser.add_argument("--output", type=Path, help="write the results as json")
+    parser.add_argument("--compare", type=Path, help="results of an earlier run")
+    args = parser.parse_args()
+
+    results = run(args)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    report(results, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
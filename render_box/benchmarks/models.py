@@ -0,0 +1,80 @@
+import gc
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Any, Callable
+
+from render_box.shared.commands import TestCommand
+from render_box.shared.job import Job
+from render_box.shared.task import Task
+from render_box.shared.worker import Worker
+
+
+def timed(name: str, count: int, fn: Callable[[], Any]) -> Any:
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    print(f"{name:<22} {seconds * 1e3:10.1f} ms {seconds / count * 1e6:8.2f} us/item")
+    return result
+
+
+def allocated(name: str, count: int, fn: Callable[[], Any]) -> Any:
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<22} {size / 2**20:10.1f} MB {size / count:8.0f} B/item")
+    return result
+
+
+def run(count: int) -> None:
+    commands = [TestCommand(i % 10) for i in range(count)]
+
+    def build() -> Job:
+        job = Job("bench")
+        for command in commands:
+            job.add_task(Task(command))
+        return job
+
+    job = allocated("tasks memory", count, build)
+    job = timed("tasks create", count, build)
+    tasks = job.tasks
+
+    ser_tasks = timed("task serialize", count, lambda: [t.serialize() for t in tasks])
+    timed("task deserialize", count, lambda: [Task.deserialize(t) for t in ser_tasks])
+    allocated(
+        "deserialized memory",
+        count,
+        lambda: [Task.deserialize(t) for t in ser_tasks],
+    )
+
+    ser_job = timed("job serialize", count, job.serialize)
+    timed("job deserialize", count, lambda: Job.deserialize(ser_job))
+
+    workers = [Worker(i, f"render-{i:05}") for i in range(count)]
+    ser_workers = timed(
+        "worker serialize", count, lambda: [w.serialize() for w in workers]
+    )
+    timed(
+        "worker deserialize",
+        count,
+        lambda: [Worker.deserialize(w) for w in ser_workers],
+    )
+    allocated(
+        "workers memory",
+        count,
+        lambda: [Worker(i, f"render-{i:05}") for i in range(count)],
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(description="task, job and worker model benchmark")
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    run(args.count)
+
+
+if __name__ == "__main__":
+    main()
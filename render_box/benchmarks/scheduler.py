@@ -0,0 +1,108 @@
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from random import randint, random
+from uuid import uuid4
+
+from render_box.server import db
+from render_box.server.scheduler import Scheduler
+
+
+def waiting_rows(
+    tasks: int, jobs: int
+) -> list[tuple[str, str, int, float, int, float]]:
+    job_ids = [(str(uuid4()), randint(1, 100), random()) for _ in range(jobs)]
+    rows = []
+    for i in range(tasks):
+        job_id, job_prio, job_time = job_ids[i % jobs]
+        rows.append(
+            (str(uuid4()), job_id, randint(1, 100), random(), job_prio, job_time)
+        )
+    return rows
+
+
+def bench_memory(
+    rows: list[tuple[str, str, int, float, int, float]], pops: int
+) -> None:
+    scheduler = Scheduler()
+
+    start = time.perf_counter()
+    scheduler.load(rows)
+    print(f"load        {time.perf_counter() - start:10.3f} s  ({len(rows)} tasks)")
+
+    start = time.perf_counter()
+    for _ in range(pops):
+        scheduler.pop()
+    per_pop = (time.perf_counter() - start) / pops * 1e6
+    print(f"pop         {per_pop:10.2f} us/call")
+
+    start = time.perf_counter()
+    for task_id, job_id, prio, ts, job_prio, job_time in rows[:pops]:
+        scheduler.push(task_id, prio, ts, job_id, job_prio, job_time)
+    per_push = (time.perf_counter() - start) / pops * 1e6
+    print(f"push        {per_push:10.2f} us/call")
+
+
+def bench_sql(rows: list[tuple[str, str, int, float, int, float]], pops: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(Path(tmp) / "bench.db")
+        db.init_db()
+
+        jobs = {row[1]: (row[1], "bench", row[4], "waiting", row[5]) for row in rows}
+        with db.DBConnection() as conn:
+            conn.executemany(
+                "INSERT INTO jobs(id, name, priority, state, timestamp) VALUES (?, ?, ?, ?, ?);",
+                jobs.values(),
+            )
+            conn.executemany(
+                db.INSERT_TASK,
+                (
+                    (
+                        id,
+                        job,
+                        prio,
+                        "waiting",
+                        ts,
+                        '{"name": "TestCommand", "data": {"duration": 0}}',
+                    )
+                    for id, job, prio, ts, _, _ in rows
+                ),
+            )
+            conn.commit()
+
+        # what the server does with sqlite: rebuild the scheduler on startup,
+        # then mark each popped task as started
+        scheduler = Scheduler()
+        start = time.perf_counter()
+        scheduler.load(db.iter_waiting_tasks())
+        print(f"sql load    {time.perf_counter() - start:10.3f} s")
+
+        start = time.perf_counter()
+        for _ in range(pops):
+            entry = scheduler.pop()
+            if entry:
+                db.start_task(entry[0])
+        per_pop = (time.perf_counter() - start) / pops * 1e6
+        print(f"sql pop     {per_pop:10.2f} us/call")
+
+        db.pool.close()
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--pops", type=int, default=100_000)
+    parser.add_argument("--sql", action="store_true", help="compare against sqlite")
+    parser.add_argument("--sql-pops", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = waiting_rows(args.tasks, args.jobs)
+    bench_memory(rows, args.pops)
+    if args.sql:
+        bench_sql(rows, args.sql_pops)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import subprocess
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+ROOT = Path(__file__).parents[2]
+# what each cli subcommand imports before it starts doing work
+COMMANDS = {
+    "cli": (),
+    "worker": ("render_box.client.worker",),
+    "submit": ("render_box.client.submitter",),
+    "metrics": ("render_box.client.metrics",),
+    "profile": ("render_box.client.profile",),
+    "server": ("render_box.server.server",),
+    "server async": ("render_box.server.async_server",),
+    "monitor": ("PySide6.QtWidgets", "render_box.monitor.ui.window"),
+}
+# only the monitor may pull these in
+HEAVY = ("PySide6", "render_box.monitor")
+
+
+def import_times(modules: tuple[str, ...]) -> dict[str, int]:
+    code = "; ".join(["import cli", *(f"import {module}" for module in modules)])
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # "import time: self [us] | cumulative | imported package", nesting is
+    # shown by indenting the package name
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+        else:
+            times.setdefault(name.strip(), 0)
+    return times
+
+
+def measure(modules: tuple[str, ...], runs: int) -> tuple[float, int, list[str]]:
+    best = float("inf")
+    for _ in range(runs):
+        times = import_times(modules)
+        best = min(best, sum(times.values()) / 1e3)
+    heavy = sorted({name for name in times if name.startswith(HEAVY)})
+    return best, len(times), heavy
+
+
+def run(runs: int, budget: float) -> int:
+    failed = 0
+    print(f"{'command':<14} {'import ms':>10} {'modules':>8}")
+    for command, modules in COMMANDS.items():
+        ms, count, heavy = measure(modules, runs)
+        problems = []
+        if command != "monitor":
+            if heavy:
+                problems.append(f"imports {', '.join(heavy[:3])}")
+            if budget and ms > budget:
+                problems.append(f"over the {budget:.0f} ms budget")
+        failed += bool(problems)
+        print(f"{command:<14} {ms:>10.1f} {count:>8}  {'; '.join(problems)}")
+    return failed
+
+
+def main() -> None:
+    parser = ArgumentParser(description="cli startup import time benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="best of this many")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0,
+        help="fail when a non-gui command takes longer to import, in ms",
+    )
+    args = parser.parse_args()
+    sys.exit(1 if run(args.runs, args.budget) else 0)
+
+
+if __name__ == "__main__":
+    main()
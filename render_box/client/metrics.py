@@ -0,0 +1,20 @@
+import json
+
+from ..shared.connection import Connection
+from ..shared.message import Message
+
+
+def print_metrics(prometheus: bool = False) -> None:
+    connection = Connection.client_connection()
+    connection.connect(("localhost", 65432))
+    connection.negotiate(codecs=("json",))
+
+    data = {"format": "prometheus"} if prometheus else None
+    response = connection.send_recv(Message("metrics", data))
+    if prometheus:
+        print(response.data, end="")
+    else:
+        print(json.dumps(response.data, indent=2))
+
+    connection.send(Message("connection.close"))
+    connection.close()
@@ -0,0 +1,52 @@
+import time
+from typing import Any, Optional
+
+from ..shared.connection import Connection
+from ..shared.message import Message
+
+
+def print_profile(
+    seconds: float,
+    messages: Optional[int] = None,
+    routes: Optional[list[str]] = None,
+    workers: Optional[list[str]] = None,
+    sort: str = "cumulative",
+    limit: int = 30,
+) -> None:
+    connection = Connection.client_connection()
+    connection.connect(("localhost", 65432))
+    connection.negotiate(codecs=("json",))
+
+    data: dict[str, Any] = {"seconds": seconds}
+    if messages:
+        data["messages"] = messages
+    if routes:
+        data["routes"] = routes
+    if workers:
+        data["workers"] = workers
+
+    result = connection.send_recv(Message("debug.profile", data)).data or {}
+    if "error" not in result:
+        # the server replies right away and profiles in the background, polls
+        # made while it runs would be profiled as well
+        time.sleep(result["seconds"])
+        query = Message("debug.profile.results", {"sort": sort, "limit": limit})
+        result = connection.send_recv(query).data or {}
+        while result.get("running"):
+            time.sleep(0.5)
+            result = connection.send_recv(query).data or {}
+
+    if "error" in result:
+        print(result["error"])
+    else:
+        print(f"{result['messages']} messages in {result['seconds']:.1f}s")
+        for route, profile in result["routes"].items():
+            print(
+                f"  {route}: {profile['messages']} messages, "
+                f"{profile['seconds'] * 1e3:.1f} ms"
+            )
+        # collected from every thread of the server, not only these routes
+        print(result["stats"].rstrip())
+
+    connection.send(Message("connection.close"))
+    connection.close()
@@ -1,38 +1,54 @@
 import uuid
+from concurrent.futures import Future
 from random import randint
 
+from render_box.shared.frames import FrameRange
 from render_box.shared.job import Job
+from render_box.shared.log import get_logger
 from render_box.shared.task import Task
 
 from ..shared.commands import TestCommand
-from ..shared.connection import Connection
+from ..shared.connection import Connection, PipelinedConnection
 from ..shared.message import Message
 
+log = get_logger("submitter")
 
-def start_submitter(count: int = 1):
-    connection = Connection.client_connection()
+
+def start_submitter(count: int = 1, frames: int = 0):
+    client = Connection.client_connection()
     server_address = ("localhost", 65432)
-    connection.connect(server_address)
+    client.connect(server_address)
+    client.negotiate(codecs=("json",))
+    connection = PipelinedConnection(client)
 
     m = Message("docs")
-    print(connection.send_recv(m.as_json()))
+    log.debug("%s", connection.send_recv(m))
 
+    pending: list[Future[Message]] = []
     for _ in range(count):
-        try:
-            job = Job(f"Job {uuid.uuid4()}")
+        job = Job(f"Job {uuid.uuid4()}")
+        if frames:
+            job.frames = FrameRange(TestCommand(1), 1, frames)
+        else:
             for i in range(randint(1, 10)):
                 task = Task(TestCommand((i // 2) + 1))
                 job.add_task(task)
-            message = Message("jobs.create", job.serialize())
-
-            connection.send_recv(message.as_json())
-            print("submitted Job")
+        message = Message("jobs.create", job.serialize())
+        pending.append(connection.request(message))
 
+    for future in pending:
+        try:
+            reply = future.result()
+            if reply.message == "job_rejected":
+                data = reply.data if isinstance(reply.data, dict) else {}
+                log.error("job rejected: %s", data.get("error", "no reason given"))
+                continue
+            log.info("submitted Job")
         except Exception as e:
-            print(e)
+            log.error("failed to submit job: %s", e)
 
     close_msg = Message("connection.close")
-    connection.send(close_msg.as_json())
+    connection.send(close_msg)
     connection.close()
 
 
@@ -1,56 +1,197 @@
 import json
 import socket
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from threading import Event, Lock, Thread
+from typing import Optional
+
+from render_box.shared.log import get_logger
 
 from ..shared.connection import Connection
 from ..shared.message import Message
 from ..shared.task import Task
 from ..shared.worker import Worker
 
+log = get_logger("worker")
+
+# well below the server lease timeout so a late heartbeat does not lose a task
+HEARTBEAT_INTERVAL = 10.0
+
+
+class Heartbeat:
+    def __init__(
+        self, connection: Connection, interval: float = HEARTBEAT_INTERVAL
+    ) -> None:
+        self.connection = connection
+        self.interval = interval
+        self.task_ids: set[str] = set()
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name="heartbeat", daemon=True)
+        self._thread.start()
+
+    def add(self, task_id: str) -> None:
+        with self._lock:
+            self.task_ids.add(task_id)
+
+    def remove(self, task_id: str) -> None:
+        with self._lock:
+            self.task_ids.discard(task_id)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                task_ids = list(self.task_ids)
+            if not task_ids:
+                continue
+            try:
+                self.connection.send(Message("tasks.heartbeat", task_ids))
+            except OSError:
+                return
+
 
 def register_worker(connection: Connection) -> None:
     worker_name = socket.gethostname()
     metadata = Worker(None, worker_name)
-    msg = Message(message="workers.register", data=metadata.serialize()).as_json()
-    print(connection.send_recv(msg))
+    msg = Message(message="workers.register", data=metadata.serialize())
+    log.info("registered: %s", connection.send_recv(msg))
 
 
-def start_worker():
-    connection = Connection.client_connection()
-    server_address = ("localhost", 65432)
-    connection.connect(server_address)
+def report_task(
+    connection: Connection, task_id: str, error: Optional[BaseException]
+) -> None:
+    if error:
+        log.error("task %s failed: %s", task_id, error)
+        connection.send_recv(Message("tasks.fail", task_id))
+    else:
+        connection.send_recv(Message("tasks.complete", task_id))
 
-    register_worker(connection)
 
-    next_msg = Message("tasks.next").as_json()
+def run_task(connection: Connection, heartbeat: Heartbeat, message: Message) -> None:
+    start_time = time.perf_counter()
+
+    command = Task.deserialize(message.data)
+    if not command:
+        return
+
+    error = None
+    heartbeat.add(str(command.id))
+    try:
+        command.run()
+    except Exception as e:
+        error = e
+    finally:
+        heartbeat.remove(str(command.id))
+    report_task(connection, str(command.id), error)
+
+    end_time = time.perf_counter()
+    log.info("Task finished in %.2fs", end_time - start_time)
+
+
+def poll_tasks(connection: Connection, heartbeat: Heartbeat) -> None:
+    next_msg = Message("tasks.next")
     while True:
-        try:
-            start_time = time.perf_counter()
+        message = connection.send_recv(next_msg)
+        log.debug("%s", message)
 
-            response = connection.send_recv(next_msg)
-            message = Message(**response)
-            print(message)
+        if not message.data:
+            log.debug("no task, waiting...")
+            time.sleep(2)
+            continue
 
-            if message.data:
-                command = Task.deserialize(message.data)
-                if not command:
-                    continue
+        run_task(connection, heartbeat, message)
 
-                command.run()
-                connection.send_recv(Message("tasks.complete").as_json())
 
-            else:
-                print("no task, waiting...")
-                time.sleep(2)
-                continue
+def subscribe_tasks(connection: Connection, heartbeat: Heartbeat) -> None:
+    subscribe_msg = Message("tasks.subscribe")
+    while True:
+        log.debug("waiting for task...")
+        message = connection.send_recv(subscribe_msg)
+        log.debug("%s", message)
+
+        if message.data:
+            run_task(connection, heartbeat, message)
+
+
+def request_tasks(connection: Connection, count: int, block: bool) -> list[Task]:
+    message = "tasks.subscribe" if block else "tasks.next"
+    response = connection.send_recv(Message(message, {"count": count}))
+    data = response.data or []
+
+    return [task for t in data if (task := Task.deserialize(t))]
+
+
+def run_slots(
+    connection: Connection,
+    heartbeat: Heartbeat,
+    slots: int,
+    prefetch: int,
+    poll: bool,
+) -> None:
+    # multiprocessing is only imported by workers that run several slots
+    from concurrent.futures import ProcessPoolExecutor
+
+    running: dict[Future[None], Task] = {}
+    queued: deque[Task] = deque()
+
+    with ProcessPoolExecutor(max_workers=slots) as pool:
+        while True:
+            while queued and len(running) < slots:
+                task = queued.popleft()
+                log.info("starting task %s", task.id)
+                running[pool.submit(task.run)] = task
+
+            wanted = slots + prefetch - len(running) - len(queued)
+            if wanted > 0:
+                idle = not running and not queued
+                tasks = request_tasks(connection, wanted, block=idle and not poll)
+                queued.extend(tasks)
+                # prefetched tasks are leased too, they are kept alive while
+                # they wait for a free slot
+                for task in tasks:
+                    heartbeat.add(str(task.id))
+                if tasks:
+                    continue
+                if idle:
+                    log.debug("no task, waiting...")
+                    time.sleep(2)
+                    continue
 
-            end_time = time.perf_counter()
-            print(f"Task finished in {end_time - start_time:.2f}s\n")
+            free = len(running) < slots
+            done, _ = wait(
+                running, timeout=2 if free else None, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                task = running.pop(future)
+                heartbeat.remove(str(task.id))
+                report_task(connection, str(task.id), future.exception())
+                log.info("task %s finished", task.id)
 
-        except json.JSONDecodeError:
-            print("connection to server lost")
-            break
 
+def start_worker(poll: bool = False, slots: int = 1, prefetch: int = 0):
+    connection = Connection.client_connection()
+    server_address = ("localhost", 65432)
+    connection.connect(server_address)
+    connection.negotiate()
+
+    register_worker(connection)
+    heartbeat = Heartbeat(connection)
+
+    try:
+        if slots > 1 or prefetch:
+            run_slots(connection, heartbeat, slots, prefetch, poll)
+        elif poll:
+            poll_tasks(connection, heartbeat)
+        else:
+            subscribe_tasks(connection, heartbeat)
+    except (json.JSONDecodeError, ConnectionError):
+        log.warning("connection to server lost")
+
+    heartbeat.stop()
     connection.close()
 
 
@@ -1,30 +1,90 @@
-from render_box.shared.connection import Connection
+import queue
+from concurrent.futures import Future
+from typing import Any, Optional, cast
+
+from render_box.shared.connection import Connection, PipelinedConnection
 from render_box.shared.message import Message
-from render_box.shared.serialize import SerializedJob, SerializedTask, SerializedWorker
+from render_box.shared.serialize import (
+    SerializedChanges,
+    SerializedJob,
+    SerializedTask,
+    SerializedWorker,
+)
 
 
 class Controller:
     def __init__(self) -> None:
-        self.connection = Connection.client_connection()
+        connection = Connection.client_connection()
         server_address = ("localhost", 65432)
-        self.connection.connect(server_address)
+        connection.connect(server_address)
+        connection.negotiate(codecs=("json",))
+        self.connection = PipelinedConnection(connection)
+        self._prefetched: dict[tuple[str, Optional[str]], Future[Message]] = {}
+        self._changes: queue.SimpleQueue[SerializedChanges] = queue.SimpleQueue()
+        self.connection.on_message = self._on_message
+
+    def subscribe_changes(self) -> int:
+        response = self.connection.send_recv(Message("changes.subscribe"))
+        data = response.data
+        if not isinstance(data, dict) or "version" not in data:
+            raise ConnectionError(f"unexpected reply: {response.message}")
+        return data["version"]
+
+    def take_changes(self) -> Optional[SerializedChanges]:
+        merged: Optional[SerializedChanges] = None
+        while True:
+            try:
+                changes = self._changes.get_nowait()
+            except queue.Empty:
+                return merged
+
+            if not merged:
+                merged = changes
+                continue
+            merged["version"] = changes["version"]
+            merged["reset"] = merged["reset"] or changes["reset"]
+            merged["jobs"].extend(changes["jobs"])
+            merged["tasks"].extend(changes["tasks"])
+            merged["workers"].extend(changes["workers"])
+
+    def _on_message(self, message: Message) -> None:
+        if message.message == "changes" and isinstance(message.data, dict):
+            self._changes.put(cast(SerializedChanges, message.data))
+
+    def prefetch(
+        self, job_id: Optional[str] = None, jobs: bool = True, workers: bool = True
+    ) -> None:
+        requests: list[tuple[str, Optional[str]]] = []
+        if jobs:
+            requests.append(("jobs.all", None))
+        if workers:
+            requests.append(("workers.all", None))
+        if job_id:
+            requests.append(("tasks.all", job_id))
+
+        for message, data in requests:
+            if (message, data) not in self._prefetched:
+                future = self.connection.request(Message(message, data))
+                self._prefetched[(message, data)] = future
+
+    def _fetch(self, message: str, data: Optional[str] = None) -> Any:
+        future = self._prefetched.pop((message, data), None)
+        if not future:
+            future = self.connection.request(Message(message, data))
+
+        return future.result().data
 
     def get_tasks(self, job_id: str) -> dict[str, SerializedTask]:
-        msg = Message("tasks.all", data=job_id)
-        data: dict[str, list[SerializedTask]] = self.connection.send_recv(msg.as_json())
+        data: list[SerializedTask] = self._fetch("tasks.all", job_id)
 
-        return {str(task["id"]): task for task in data["data"]}
+        return {str(task["id"]): task for task in data}
 
     def get_workers(self) -> dict[str, SerializedWorker]:
-        msg = Message("workers.all")
-        data: dict[str, list[SerializedWorker]] = self.connection.send_recv(
-            msg.as_json()
-        )
+        data: list[SerializedWorker] = self._fetch("workers.all")
 
-        return {w["name"]: w for w in data["data"]}
+        return {w["name"]: w for w in data}
 
     def get_jobs(self) -> dict[str, SerializedJob]:
-        msg = Message("jobs.all")
-        data: dict[str, list[SerializedJob]] = self.connection.send_recv(msg.as_json())
+        data: list[SerializedJob] = self._fetch("jobs.all")
 
-        return {job["name"]: job for job in data["data"]}
+        return {job["name"]: job for job in data}
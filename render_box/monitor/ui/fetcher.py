@@ -0,0 +1,85 @@
+from threading import Lock
+from typing import Optional
+
+from PySide6 import QtCore
+
+from render_box.monitor.controller import Controller
+from render_box.shared.log import get_logger
+
+log = get_logger("monitor")
+
+
+class FetchWorker(QtCore.QObject):
+    jobs_fetched = QtCore.Signal(object)
+    workers_fetched = QtCore.Signal(object)
+    tasks_fetched = QtCore.Signal(str, object)
+    _requested = QtCore.Signal()
+
+    def __init__(self, controller: Controller) -> None:
+        super().__init__()
+        self.controller = controller
+        self._pending: dict[str, Optional[str]] = {}
+        self._scheduled = False
+        self._lock = Lock()
+
+        self._thread = QtCore.QThread()
+        self._thread.setObjectName("monitor-fetch")
+        self.moveToThread(self._thread)
+        self._requested.connect(self._run, QtCore.Qt.ConnectionType.QueuedConnection)
+        self._thread.start()
+
+        app = QtCore.QCoreApplication.instance()
+        if app:
+            app.aboutToQuit.connect(
+                self.stop, QtCore.Qt.ConnectionType.DirectConnection
+            )
+
+    def fetch_jobs(self) -> None:
+        self._request("jobs")
+
+    def fetch_workers(self) -> None:
+        self._request("workers")
+
+    def fetch_tasks(self, job_id: Optional[str]) -> None:
+        if job_id:
+            self._request("tasks", job_id)
+
+    def fetch_all(self, job_id: Optional[str] = None) -> None:
+        self.fetch_jobs()
+        self.fetch_workers()
+        self.fetch_tasks(job_id)
+
+    def stop(self) -> None:
+        self._thread.quit()
+        self._thread.wait(2000)
+
+    def _request(self, kind: str, data: Optional[str] = None) -> None:
+        with self._lock:
+            self._pending[kind] = data
+            # requests made while a fetch is queued or running are merged into
+            # the next run instead of stacking up one fetch per timer tick
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._requested.emit()
+
+    def _run(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+
+        job_id = pending.get("tasks")
+        try:
+            self.controller.prefetch(
+                job_id, jobs="jobs" in pending, workers="workers" in pending
+            )
+            if "jobs" in pending:
+                self.jobs_fetched.emit(list(self.controller.get_jobs().values()))
+            if "workers" in pending:
+                workers = self.controller.get_workers().values()
+                self.workers_fetched.emit(list(workers))
+            if job_id:
+                tasks = self.controller.get_tasks(job_id).values()
+                self.tasks_fetched.emit(job_id, list(tasks))
+        except Exception as e:
+            log.warning("failed to fetch from server: %s", e)
@@ -1,226 +1,289 @@
 from abc import abstractmethod
-from typing import Iterable, Optional, override
+from typing import Any, Iterable, Optional, override
 
 from PySide6 import QtCore, QtGui
 
-from render_box.monitor.controller import Controller
 from render_box.shared.event import EventSystem
-from render_box.shared.serialize import SerializedJob, SerializedTask, SerializedWorker
+from render_box.shared.serialize import (
+    SerializedChanges,
+    SerializedJob,
+    SerializedTask,
+    SerializedWorker,
+)
 from render_box.shared.utils import format_timestamp
 
 STATE_COLORS = {
     "waiting": QtGui.QColor("white"),
     "progress": QtGui.QColor("green"),
     "completed": QtGui.QColor(77, 134, 196),
+    "failed": QtGui.QColor(196, 64, 64),
     "idle": QtGui.QColor("white"),
     "working": QtGui.QColor("green"),
     "offline": QtGui.QColor(120, 120, 120),
 }
 
+type Row = tuple[str, Iterable[str], str]
+type ModelIndex = QtCore.QModelIndex | QtCore.QPersistentModelIndex
 
-class BaseModel(QtGui.QStandardItemModel):
-    column_labels = ("",)
 
-    def __init__(self, controller: Controller, parent: Optional[QtCore.QObject] = None):
+def timestamp_text(timestamp: Optional[float]) -> str:
+    return "" if timestamp is None else format_timestamp(timestamp)
+
+
+def row_ranges(rows: Iterable[int]) -> list[tuple[int, int]]:
+    ranges: list[tuple[int, int]] = []
+    for row in sorted(rows):
+        if ranges and ranges[-1][1] + 1 == row:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+
+    return ranges
+
+
+class BaseModel(QtCore.QAbstractTableModel):
+    column_labels: tuple[str, ...] = ("",)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
         super().__init__(parent=parent)
-        EventSystem.register_event("models.*.refresh")
-        self.controller = controller
-        self._set_column_headers()
-        self.set_column_content()
-
-    def _set_column_headers(self) -> None:
-        self.setColumnCount(len(self.column_labels))
-        for idx, label in enumerate(self.column_labels):
-            self.setHeaderData(idx, QtCore.Qt.Orientation.Horizontal, label)
-
-    def _set_row_color(self, color: QtGui.QColor, row: int) -> None:
-        for col in range(self.columnCount()):
-            item = self.item(row, col)
-            if not item:
-                continue
-            item.setForeground(color)
-
-    def _add_row(self, row_content: Iterable[str], state: str) -> None:
-        row: list[QtGui.QStandardItem] = []
-        for col in row_content:
-            item = QtGui.QStandardItem(col)
-            item.setEditable(False)
-            item.setForeground(STATE_COLORS[state])
-            row.append(item)
-
-        self.appendRow(row)
+        EventSystem.register_event("models.*.changes")
+        # one list per column instead of an item object per cell, rows are
+        # found through the key index
+        self.keys: list[str] = []
+        self.states: list[str] = []
+        self.columns: list[list[str]] = [[] for _ in self.column_labels]
+        self.rows: dict[str, int] = {}
 
-    @abstractmethod
-    def set_column_content(self): ...
+    @override
+    def rowCount(self, parent: ModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.keys)
+
+    @override
+    def columnCount(self, parent: ModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.column_labels)
+
+    @override
+    def data(
+        self, index: ModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.columns[index.column()][index.row()]
+        if role == QtCore.Qt.ItemDataRole.ForegroundRole:
+            return STATE_COLORS.get(self.states[index.row()])
+        return None
+
+    @override
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if (
+            orientation == QtCore.Qt.Orientation.Horizontal
+            and role == QtCore.Qt.ItemDataRole.DisplayRole
+        ):
+            return self.column_labels[section]
+        return None
+
+    @override
+    def sort(
+        self,
+        column: int,
+        order: QtCore.Qt.SortOrder = QtCore.Qt.SortOrder.AscendingOrder,
+    ) -> None:
+        self.layoutAboutToBeChanged.emit()
+        order_rows = sorted(
+            range(len(self.keys)),
+            key=self.columns[column].__getitem__,
+            reverse=order == QtCore.Qt.SortOrder.DescendingOrder,
+        )
+        self.keys = [self.keys[row] for row in order_rows]
+        self.states = [self.states[row] for row in order_rows]
+        self.columns = [[col[row] for row in order_rows] for col in self.columns]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+
+        new_rows = {old: new for new, old in enumerate(order_rows)}
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(
+            persistent,
+            [self.index(new_rows[index.row()], index.column()) for index in persistent],
+        )
+        self.layoutChanged.emit()
+
+    def reset_rows(self, rows: Iterable[Row]) -> None:
+        self.beginResetModel()
+        self.keys, self.states, self.rows = [], [], {}
+        self.columns = [[] for _ in self.column_labels]
+        self._append({key: (key, content, state) for key, content, state in rows})
+        self.endResetModel()
+
+    def upsert_rows(self, rows: Iterable[Row]) -> None:
+        changed: list[int] = []
+        added: dict[str, Row] = {}
+        for key, content, state in rows:
+            row = self.rows.get(key)
+            if row is None:
+                added[key] = (key, content, state)
+            elif self._update(row, content, state):
+                changed.append(row)
+
+        last_column = len(self.column_labels) - 1
+        for first, last in row_ranges(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column))
+
+        if added:
+            first = len(self.keys)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(added) - 1)
+            self._append(added)
+            self.endInsertRows()
+
+    def remove_rows(self, keys: Iterable[str]) -> None:
+        removed = [self.rows.pop(key) for key in set(keys) if key in self.rows]
+        if not removed:
+            return
+
+        # bottom up, so the ranges above stay valid while removing
+        for first, last in reversed(row_ranges(removed)):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self.keys[first : last + 1]
+            del self.states[first : last + 1]
+            for column in self.columns:
+                del column[first : last + 1]
+            self.endRemoveRows()
+
+        for row in range(min(removed), len(self.keys)):
+            self.rows[self.keys[row]] = row
+
+    def sync_rows(self, rows: Iterable[Row]) -> None:
+        rows = list(rows)
+        current = {key for key, _, _ in rows}
+        self.remove_rows([key for key in self.keys if key not in current])
+        self.upsert_rows(rows)
+
+    def _append(self, rows: dict[str, Row]) -> None:
+        keys, states, columns, index = self.keys, self.states, self.columns, self.rows
+        for key, content, state in rows.values():
+            index[key] = len(keys)
+            keys.append(key)
+            states.append(state)
+            for column, text in zip(columns, content):
+                column.append(text)
+
+    def _update(self, row: int, content: Iterable[str], state: str) -> bool:
+        changed = self.states[row] != state
+        self.states[row] = state
+        for column, text in zip(self.columns, content):
+            if column[row] != text:
+                column[row] = text
+                changed = True
+
+        return changed
 
     @abstractmethod
-    def refresh(self) -> None: ...
+    def apply_changes(self, changes: SerializedChanges) -> None: ...
 
 
 class JobModel(BaseModel):
-    column_labels = ("Name", "Priority", "State", "Timestamp", "ID")
+    column_labels = ("Name", "Priority", "State", "Progress", "Timestamp", "ID")
 
-    def __init__(self, controller: Controller, parent: Optional[QtCore.QObject] = None):
-        super().__init__(controller, parent=parent)
-        EventSystem.connect("models.jobs.refresh", self.refresh)
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent=parent)
+        EventSystem.connect("models.jobs.changes", self.apply_changes)
 
     def get_row_content_from_job(self, job: SerializedJob) -> Iterable[str]:
         return (
             job["name"],
             str(job["priority"]),
             job["state"],
-            format_timestamp(job["timestamp"]),
+            self.get_progress(job),
+            timestamp_text(job["timestamp"]),
             job["id"],
         )
 
-    @override
-    def set_column_content(self):
-        jobs = self.controller.get_jobs()
-        for job in jobs.values():
-            self._add_row(self.get_row_content_from_job(job), job["state"])
+    def get_progress(self, job: SerializedJob) -> str:
+        completed = job.get("completed_count", 0)
+        total = completed + job.get("waiting_count", 0) + job.get("progress_count", 0)
+        return f"{completed}/{total}"
+
+    def get_rows(self, jobs: Iterable[SerializedJob]) -> Iterable[Row]:
+        for job in jobs:
+            yield job["id"], self.get_row_content_from_job(job), job["state"]
+
+    def load(self, jobs: Iterable[SerializedJob]) -> None:
+        self.sync_rows(self.get_rows(jobs))
 
     @override
-    def refresh(self) -> None:
-        jobs = self.controller.get_jobs()
-        current_row_count = self.rowCount()
-
-        seen: set[str] = set()
-        for row in range(current_row_count):
-            job_name = self.item(row, 0).text()
-            seen.add(job_name)
-            job = jobs.get(job_name)
-            if not job:
-                self.removeRow(row)
-                continue
-
-            status_item = self.item(row, 2)
-            job_state = job.get("state", "")
-            if status_item.text() != job_state:
-                status_item.setText(job_state)
-                self._set_row_color(STATE_COLORS[job_state], row)
-
-        for id, job in jobs.items():
-            if id in seen:
-                continue
-            self._add_row(self.get_row_content_from_job(job), job["state"])
+    def apply_changes(self, changes: SerializedChanges) -> None:
+        self.upsert_rows(self.get_rows(changes["jobs"]))
 
 
 class TaskModel(BaseModel):
     column_labels = ("Priority", "State", "Timestamp", "Command", "ID")
 
-    def __init__(self, controller: Controller, parent: Optional[QtCore.QObject] = None):
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
         self.job_id: Optional[str] = None
-        super().__init__(controller, parent=parent)
-        EventSystem.connect("models.tasks.refresh", self.refresh)
+        super().__init__(parent=parent)
+        EventSystem.connect("models.tasks.changes", self.apply_changes)
         EventSystem.connect("tables.jobs.selection.changed", self.on_job_change)
 
     def get_row_content_from_task(self, task: SerializedTask) -> Iterable[str]:
         return (
             str(task["priority"]),
             task["state"],
-            format_timestamp(task["timestamp"]),
+            timestamp_text(task["timestamp"]),
             task["command"]["name"],
             task["id"],
         )
 
-    @override
-    def set_column_content(self):
-        if not self.job_id:
+    def get_rows(self, tasks: Iterable[SerializedTask]) -> Iterable[Row]:
+        for task in tasks:
+            if task["job_id"] == self.job_id:
+                yield task["id"], self.get_row_content_from_task(task), task["state"]
+
+    def load(self, job_id: str, tasks: Iterable[SerializedTask]) -> None:
+        # a reply for a job that is no longer selected
+        if job_id != self.job_id:
             return
-        tasks = self.controller.get_tasks(self.job_id)
-        for task in tasks.values():
-            self._add_row(self.get_row_content_from_task(task), task["state"])
+        self.sync_rows(self.get_rows(tasks))
 
     @override
-    def refresh(self) -> None:
+    def apply_changes(self, changes: SerializedChanges) -> None:
         if not self.job_id:
             return
+        self.upsert_rows(self.get_rows(changes["tasks"]))
 
-        tasks = self.controller.get_tasks(self.job_id)
-        current_row_count = self.rowCount()
-
-        seen: set[str] = set()
-        for row in range(current_row_count):
-            task_item = self.item(row, 4)
-            if not task_item:
-                continue
-            task_name = task_item.text()
-            seen.add(task_name)
-            task = tasks.get(task_name)
-            if not task:
-                self.removeRow(row)
-                continue
-
-            state_item = self.item(row, 1)
-            task_state = task.get("state", "")
-            if state_item.text() != task_state:
-                state_item.setText(task_state)
-                self._set_row_color(STATE_COLORS[task_state], row)
-
-        for id, task in tasks.items():
-            if id in seen:
-                continue
-            self._add_row(self.get_row_content_from_task(task), task["state"])
-
-    def on_job_change(self, selected_row: list[QtGui.QStandardItem]) -> None:
-        self.job_id = selected_row[-1].text()
-        self.clear()
-        self._set_column_headers()
-        self.set_column_content()
+    def on_job_change(self, selected_row: list[str]) -> None:
+        self.job_id = selected_row[-1]
+        self.reset_rows(())
 
 
 class WorkerModel(BaseModel):
     column_labels = ("ID", "Name", "State", "Timestamp", "Task")
 
-    def __init__(self, controller: Controller, parent: Optional[QtCore.QObject] = None):
-        super().__init__(controller, parent=parent)
-        EventSystem.connect("models.worker.refresh", self.refresh)
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent=parent)
+        EventSystem.connect("models.worker.changes", self.apply_changes)
 
     def get_row_content_from_worker(self, worker: SerializedWorker) -> Iterable[str]:
         return (
             str(worker["id"]),
             worker["name"],
             worker["state"],
-            format_timestamp(worker["timestamp"]),
+            timestamp_text(worker["timestamp"]),
             worker.get("task_id") or "",
         )
 
-    @override
-    def set_column_content(self):
-        workers = self.controller.get_workers()
-        for worker in workers.values():
-            self._add_row(self.get_row_content_from_worker(worker), worker["state"])
+    def get_rows(self, workers: Iterable[SerializedWorker]) -> Iterable[Row]:
+        for worker in workers:
+            content = self.get_row_content_from_worker(worker)
+            yield worker["name"], content, worker["state"]
+
+    def load(self, workers: Iterable[SerializedWorker]) -> None:
+        self.sync_rows(self.get_rows(workers))
 
     @override
-    def refresh(self) -> None:
-        workers = self.controller.get_workers()
-        current_row_count = self.rowCount()
-
-        seen: set[str] = set()
-        for row in range(current_row_count):
-            worker_item = self.item(row, 0)
-            if not worker_item:
-                continue
-            worker_id = worker_item.text()
-            seen.add(worker_id)
-            worker = workers.get(worker_id)
-            if not worker:
-                self.removeRow(row)
-                continue
-
-            status_item = self.item(row, 2)
-            task_item = self.item(row, 4)
-
-            if (
-                status_item.text() != worker["state"]
-                or task_item.text() != worker["task_id"]
-            ):
-                status_item.setText(worker["state"])
-                task_item.setText(str(worker["task_id"]))
-
-                self._set_row_color(STATE_COLORS[worker["state"]], row)
-
-        for id, worker in workers.items():
-            if id in seen:
-                continue
-            self._add_row(self.get_row_content_from_worker(worker), worker["state"])
+    def apply_changes(self, changes: SerializedChanges) -> None:
+        self.upsert_rows(self.get_rows(changes["workers"]))
@@ -3,8 +3,10 @@ from typing import Optional
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from render_box.monitor.controller import Controller
+from render_box.monitor.ui.fetcher import FetchWorker
 from render_box.monitor.ui.models import BaseModel, JobModel, TaskModel, WorkerModel
 from render_box.shared.event import EventSystem
+from render_box.shared.serialize import SerializedJob
 
 
 class LabeledTable(QtWidgets.QWidget):
@@ -63,10 +65,9 @@ class TableView(QtWidgets.QTableView):
             lambda: self.selection_changed.emit()
         )
 
-    def selected_item(self) -> list[QtGui.QStandardItem]:
+    def selected_item(self) -> list[str]:
         selection = self.selectionModel().selectedIndexes()
-        model = self.model()
-        return [model.itemFromIndex(index) for index in selection]
+        return [index.data() for index in selection]
 
 
 class Window(QtWidgets.QWidget):
@@ -77,26 +78,28 @@ class Window(QtWidgets.QWidget):
         self.resize(QtCore.QSize(1500, 750))
 
         self.controller = Controller()
+        self.controller.subscribe_changes()
+        self.fetcher = FetchWorker(self.controller)
 
         self._register_events()
         self._init_widgets()
         self._init_layouts()
         self._init_signals()
-        self.select_first_row()
+        self.fetcher.fetch_all()
 
     def _register_events(self) -> None:
         EventSystem.register_event("tables.jobs.selection.changed")
 
     def _init_widgets(self) -> None:
-        self.task_model = TaskModel(self.controller)
+        self.task_model = TaskModel()
         self.task_view = TableView(self.task_model)
         self.task_widget = LabeledTable("Tasks", self.task_view)
 
-        self.worker_model = WorkerModel(self.controller)
+        self.worker_model = WorkerModel()
         self.worker_view = TableView(self.worker_model)
         self.worker_widget = LabeledTable("Worker", self.worker_view)
 
-        self.job_model = JobModel(self.controller)
+        self.job_model = JobModel()
         self.job_view = TableView(self.job_model)
         self.job_widget = LabeledTable("Jobs", self.job_view)
 
@@ -118,12 +121,42 @@ class Window(QtWidgets.QWidget):
     def _init_signals(self) -> None:
         self.job_view.selection_changed.connect(self.emit_job_changed)
 
+        queued = QtCore.Qt.ConnectionType.QueuedConnection
+        self.fetcher.jobs_fetched.connect(self.on_jobs_fetched, queued)
+        self.fetcher.workers_fetched.connect(self.worker_model.load, queued)
+        self.fetcher.tasks_fetched.connect(self.task_model.load, queued)
+
         self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(lambda: EventSystem.emit("models.*.refresh"))
-        self.timer.start(2000)
+        self.timer.timeout.connect(self.apply_changes)
+        self.timer.start(500)
+
+    def apply_changes(self) -> None:
+        changes = self.controller.take_changes()
+        if not changes:
+            return
+        if changes["reset"]:
+            self.refresh()
+            return
+        EventSystem.emit("models.*.changes", changes)
+
+    def refresh(self) -> None:
+        self.fetcher.fetch_all(self.task_model.job_id)
+
+    def on_jobs_fetched(self, jobs: list[SerializedJob]) -> None:
+        self.job_model.load(jobs)
+        if not self.job_view.selectionModel().hasSelection():
+            self.select_first_row()
 
     def emit_job_changed(self) -> None:
-        EventSystem.emit("tables.jobs.selection.changed", self.job_view.selected_item())
+        selected = self.job_view.selected_item()
+        if not selected:
+            return
+        EventSystem.emit("tables.jobs.selection.changed", selected)
+        self.fetcher.fetch_tasks(self.task_model.job_id)
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        self.fetcher.stop()
+        super().closeEvent(event)
 
     def select_first_row(self):
         selection_model = self.job_view.selectionModel()
@@ -0,0 +1,97 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from render_box.server import db
+from render_box.server.job_manager import JobManager
+from render_box.server.server import SERVER_ADDRESS, ClientHandler, create_router
+from render_box.shared.log import get_logger
+
+from ..shared.connection import AsyncConnection
+from ..shared.message import MessageRouter
+
+log = get_logger("server")
+
+
+class AsyncClientHandler(ClientHandler):
+    connection: AsyncConnection
+
+    def __init__(
+        self,
+        connection: AsyncConnection,
+        job_manager: JobManager,
+        router: MessageRouter,
+        executor: ThreadPoolExecutor,
+    ) -> None:
+        super().__init__(connection, job_manager, router)
+        self.executor = executor
+
+    async def run_async(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                message = await self.connection.recv()
+                # route handlers are blocking (sqlite), so they run on the
+                # bounded executor while the event loop keeps serving sockets
+                await loop.run_in_executor(self.executor, self.handle_message, message)
+                await self.connection.drain()
+            except Exception as e:
+                log.info("client %s: %s", self.client_ip, e)
+                await loop.run_in_executor(self.executor, self.disconnect)
+                break
+
+        log.info("client %s disconnected", self.worker.name)
+        self.connection.close()
+
+
+async def create_server(
+    server_address: tuple[str, int], max_workers: int, db_path: Optional[Path] = None
+) -> tuple[asyncio.Server, JobManager]:
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    if db_path:
+        db.configure(db_path)
+    db.init_db()
+    db.pool.start_optimizer()
+
+    job_manager = JobManager()
+    job_manager.start_reaper()
+    router = create_router()
+
+    async def on_connect(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = AsyncConnection(reader, writer, loop)
+        client_handler = AsyncClientHandler(connection, job_manager, router, executor)
+        await client_handler.run_async()
+
+    server = await asyncio.start_server(on_connect, *server_address)
+    return server, job_manager
+
+
+async def serve(
+    server_address: tuple[str, int], max_workers: int, db_path: Optional[Path] = None
+) -> None:
+    server, _ = await create_server(server_address, max_workers, db_path)
+    log.info("RenderBox async server listening on %s", server_address)
+
+    async with server:
+        await server.serve_forever()
+
+
+def start_async_server(
+    max_workers: int = 16,
+    server_address: tuple[str, int] = SERVER_ADDRESS,
+    db_path: Optional[Path] = None,
+) -> None:
+    try:
+        asyncio.run(serve(server_address, max_workers, db_path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    start_async_server()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Hashable
+from threading import Lock
+from typing import Any, Optional
+
+from render_box.shared.codec import EncodedData
+
+type CacheKey = tuple[Hashable, ...]
+
+# there are entries per job, old jobs are evicted least recently used first
+MAX_ENTRIES = 256
+
+
+class ReadCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.hits: Counter[Hashable] = Counter()
+        self.misses: Counter[Hashable] = Counter()
+        self._entries: dict[CacheKey, EncodedData] = {}
+        self._loading: Counter[CacheKey] = Counter()
+        self._generations: Counter[CacheKey] = Counter()
+        self._lock = Lock()
+
+    def get(self, key: CacheKey, load: Callable[[], Any]) -> EncodedData:
+        kind = key[0]
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._entries[key] = entry
+                self.hits[kind] += 1
+                return entry
+            self.misses[kind] += 1
+            self._loading[key] += 1
+            generation = self._generations[key]
+
+        loaded: Optional[EncodedData] = None
+        try:
+            loaded = EncodedData(load())
+        finally:
+            with self._lock:
+                # a write that invalidated the key while loading makes this
+                # result stale, it is returned to the caller but not kept
+                if loaded and self._generations[key] == generation:
+                    self._entries[key] = loaded
+                    while len(self._entries) > self.max_entries:
+                        del self._entries[next(iter(self._entries))]
+                self._loading[key] -= 1
+                if self._loading[key] <= 0:
+                    del self._loading[key]
+                    self._generations.pop(key, None)
+
+        return loaded
+
+    def invalidate(self, *keys: CacheKey) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                if key in self._loading:
+                    self._generations[key] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            kinds = set(self.hits) | set(self.misses)
+            return {
+                str(kind): {"hits": self.hits[kind], "misses": self.misses[kind]}
+                for kind in kinds
+            }
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Iterable
+from threading import Event, Lock, Thread
+from typing import Any, Literal, Optional
+
+from render_box.shared.log import get_logger
+from render_box.shared.serialize import SerializedChanges
+
+log = get_logger("changes")
+
+type Kind = Literal["jobs", "tasks", "workers"]
+type ChangeCallback = Callable[[SerializedChanges], None]
+
+LOG_SIZE = 100_000
+FLUSH_INTERVAL = 0.25
+
+
+class ChangeFeed:
+    def __init__(self, size: int = LOG_SIZE, interval: float = FLUSH_INTERVAL) -> None:
+        self.version = 0
+        self.interval = interval
+        self._log: deque[tuple[int, Kind, str, Any]] = deque(maxlen=size)
+        self._subscribers: dict[ChangeCallback, int] = {}
+        # versions before this one are missing rows that were skipped
+        self._skipped = 0
+        self._lock = Lock()
+        self._stop = Event()
+        self._flusher: Optional[Thread] = None
+
+    def publish(self, kind: Kind, rows: Iterable[tuple[str, Any]]) -> None:
+        with self._lock:
+            for key, row in rows:
+                self.version += 1
+                self._log.append((self.version, kind, key, row))
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def skip(self) -> None:
+        # rows nobody listened to were not published, a subscriber resuming
+        # from before them has to fetch everything again
+        with self._lock:
+            self.version += 1
+            self._skipped = self.version
+
+    def subscribe(self, callback: ChangeCallback, since: int) -> None:
+        with self._lock:
+            self._subscribers[callback] = since
+            if not self._flusher:
+                self._flusher = Thread(target=self._run, name="changes", daemon=True)
+                self._flusher.start()
+
+    def unsubscribe(self, callback: ChangeCallback) -> None:
+        with self._lock:
+            self._subscribers.pop(callback, None)
+
+    def changes_since(self, since: int) -> SerializedChanges:
+        with self._lock:
+            return self._changes_since(since)
+
+    def flush(self) -> None:
+        pending: list[tuple[ChangeCallback, SerializedChanges]] = []
+        with self._lock:
+            by_version: dict[int, SerializedChanges] = {}
+            for callback, since in self._subscribers.items():
+                if since == self.version:
+                    continue
+                if since not in by_version:
+                    by_version[since] = self._changes_since(since)
+                pending.append((callback, by_version[since]))
+                self._subscribers[callback] = self.version
+
+        for callback, changes in pending:
+            try:
+                callback(changes)
+            except Exception as e:
+                log.warning("failed to push changes: %s", e)
+                self.unsubscribe(callback)
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def _changes_since(self, since: int) -> SerializedChanges:
+        oldest = self._log[0][0] if self._log else self.version + 1
+        if since + 1 < oldest or since > self.version or since < self._skipped:
+            # the log was truncated past the subscriber's version (or the
+            # server restarted), it has to fetch everything again
+            return SerializedChanges(
+                version=self.version, reset=True, jobs=[], tasks=[], workers=[]
+            )
+
+        rows: dict[Kind, list[Any]] = {"jobs": [], "tasks": [], "workers": []}
+        seen: set[tuple[Kind, str]] = set()
+        for version, kind, key, row in reversed(self._log):
+            if version <= since:
+                break
+            if (kind, key) in seen:
+                continue
+            seen.add((kind, key))
+            rows[kind].append(row)
+
+        return SerializedChanges(
+            version=self.version,
+            reset=False,
+            jobs=rows["jobs"][::-1],
+            tasks=rows["tasks"][::-1],
+            workers=rows["workers"][::-1],
+        )
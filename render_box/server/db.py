@@ -1,33 +1,91 @@
 from __future__ import annotations
 
 import json
+import queue
 import sqlite3
+from collections.abc import Iterable, Iterator
 from pathlib import Path
+from threading import Event, Lock, Thread
+from time import perf_counter
 from typing import Optional
+from uuid import UUID, uuid5
 
 import render_box.shared.commands as commands
 import render_box.shared.job as job
 import render_box.shared.task as task
 import render_box.shared.worker as worker
 from render_box.server.sql import SQLoader
-from render_box.shared.serialize import SerializedJob
+from render_box.shared.frames import frame_command
+from render_box.shared.log import get_logger
+from render_box.shared.metrics import METRICS
+from render_box.shared.serialize import (
+    SerializedFrameRange,
+    SerializedJob,
+    SerializedWorker,
+)
 
-DB_PATH = Path(__file__).parent / "render_box.db"
-
-
-class DBConnection:
-    def __init__(self) -> None:
-        self.connection = self._create_connection()
+log = get_logger("db")
 
-    def __enter__(self) -> sqlite3.Connection:
-        return self.connection
-
-    def __exit__(self, type, value, traceback) -> None:
-        self._close_connection(self.connection)
+DB_PATH = Path(__file__).parent / "render_box.db"
+INSERT_TASK = "INSERT INTO tasks(id,job_id, priority, state, timestamp, data) VALUES (?, ?, ?, ?, ?, ?);"
+INSERT_FRAMES = "INSERT INTO frame_ranges(job_id, priority, data, start_frame, end_frame, step, next_frame, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?);"
+JOB_COUNTERS = ("waiting_count", "progress_count", "completed_count")
+
+
+class ConnectionPool:
+    def __init__(self, path: Path, size: int = 8) -> None:
+        self.path = path
+        self.size = size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = Lock()
+        self._stop_optimizer = Event()
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._connections) < self.size:
+                conn = self._create_connection(self.path)
+                self._connections.append(conn)
+                return conn
+
+        return self._idle.get()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def optimize(self) -> None:
+        conn = self.acquire()
+        try:
+            conn.execute("PRAGMA optimize;")
+        finally:
+            self.release(conn)
+
+    def start_optimizer(self, interval: float = 3600.0) -> None:
+        def run() -> None:
+            while not self._stop_optimizer.wait(interval):
+                self.optimize()
+
+        Thread(target=run, name="db-optimize", daemon=True).start()
+
+    def close(self) -> None:
+        self._stop_optimizer.set()
+        with self._lock:
+            for conn in self._connections:
+                conn.execute("PRAGMA optimize;")
+                conn.close()
+            self._connections.clear()
+            self._idle = queue.LifoQueue()
 
     @staticmethod
-    def _create_connection() -> sqlite3.Connection:
-        conn = sqlite3.connect(DB_PATH)
+    def _create_connection(path: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
 
         conn.executescript("""
             PRAGMA synchronous = NORMAL;
@@ -38,10 +96,39 @@ class DBConnection:
 
         return conn
 
-    @staticmethod
-    def _close_connection(conn: sqlite3.Connection) -> None:
-        conn.execute("PRAGMA optimize;")
-        conn.close()
+
+pool = ConnectionPool(DB_PATH)
+
+
+def configure(path: Path, size: int = 8) -> None:
+    global pool
+    pool.close()
+    pool = ConnectionPool(path, size)
+
+
+class DBConnection:
+    def __init__(self) -> None:
+        self.start = perf_counter()
+        self.pool = pool
+        self.connection = self.pool.acquire()
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.connection
+
+    def __exit__(self, type, value, traceback) -> None:
+        self.pool.release(self.connection)
+        METRICS.add("db", perf_counter() - self.start)
+
+
+def _task_row(task: task.Task) -> tuple[str, str, int, str, float, str]:
+    return (
+        str(task.id),
+        str(task.job_id),
+        task.priority,
+        task.state,
+        task.timestamp,
+        json.dumps(task.command.serialize()),
+    )
 
 
 def insert_job(job: job.Job) -> None:
@@ -56,42 +143,63 @@ def insert_job(job: job.Job) -> None:
                 job.timestamp,
             ),
         )
+        conn.executemany(INSERT_TASK, (_task_row(t) for t in job.tasks))
+        if job.frames:
+            conn.execute(
+                INSERT_FRAMES,
+                (
+                    str(job.id),
+                    job.frames.priority,
+                    json.dumps(job.frames.command.serialize()),
+                    job.frames.start,
+                    job.frames.end,
+                    job.frames.step,
+                    job.frames.next,
+                    job.timestamp,
+                ),
+            )
         conn.commit()
 
 
 def insert_task(task: task.Task) -> None:
     with DBConnection() as conn:
-        conn.execute(
-            "INSERT INTO tasks(id,job_id, priority, state, timestamp, data) VALUES (?, ?, ?, ?, ?, ?);",
-            (
-                str(task.id),
-                str(task.job_id),
-                task.priority,
-                task.state,
-                task.timestamp,
-                json.dumps(task.command.serialize()),
-            ),
-        )
+        conn.execute(INSERT_TASK, _task_row(task))
         conn.commit()
 
 
-def cleanup_completed_jobs(task_id: str) -> None:
-    sql = SQLoader()
-    query = sql.load("get_remaining_tasks_from_job")
+def insert_tasks(tasks: Iterable[task.Task]) -> None:
+    with DBConnection() as conn:
+        conn.executemany(INSERT_TASK, (_task_row(t) for t in tasks))
+        conn.commit()
+
+
+def _job_from_row(row: tuple) -> SerializedJob:
+    id, name, prio, time, state, waiting, progress, completed = row
+    return SerializedJob(
+        id=id,
+        name=name,
+        priority=prio,
+        state=state,
+        timestamp=time,
+        tasks=[],
+        waiting_count=waiting,
+        progress_count=progress,
+        completed_count=completed,
+    )
+
+
+def cleanup_completed_jobs(task_id: str) -> bool:
+    query = SQLoader().load("complete_job")
 
     if not query:
-        return
+        return False
 
+    # the task triggers keep the job counters current, so completing a job
+    # is a single update on its primary key instead of counting its tasks
     with DBConnection() as conn:
         cursor = conn.execute(query, (task_id,))
         conn.commit()
-        (result,) = cursor.fetchone()
-        if result == 0:
-            query = sql.load("complete_job")
-            if not query:
-                return
-            conn.execute(query, (task_id,))
-            conn.commit()
+        return cursor.rowcount > 0
 
 
 def select_job(task_id: str) -> Optional[SerializedJob]:
@@ -111,28 +219,30 @@ def select_job(task_id: str) -> Optional[SerializedJob]:
         if not result:
             return
 
-    id, name, prio, time, state = result
-    return SerializedJob(
-        id=id,
-        name=name,
-        priority=prio,
-        state=state,
-        timestamp=time,
-        tasks=[],
-    )
+    return _job_from_row(result)
 
 
-def select_next_task() -> Optional[task.SerializedTask]:
-    sql = SQLoader()
-    query = sql.load("select_next_task")
+def select_job_by_id(job_id: str) -> Optional[SerializedJob]:
+    query = SQLoader().load("select_job_by_id")
 
     if not query:
         return
 
     with DBConnection() as conn:
-        cursor = conn.execute(query)
-        conn.commit()
+        result = conn.execute(query, (job_id,)).fetchone()
+
+    return _job_from_row(result) if result else None
+
+
+def start_task(task_id: str) -> Optional[task.SerializedTask]:
+    query = SQLoader().load("start_task")
+    if not query:
+        return
+
+    with DBConnection() as conn:
+        cursor = conn.execute(query, (task_id,))
         result = cursor.fetchone()
+        conn.commit()
         if not result:
             return
 
@@ -147,6 +257,162 @@ def select_next_task() -> Optional[task.SerializedTask]:
     )
 
 
+def reset_tasks(task_ids: list[str]) -> list[task.SerializedTask]:
+    query = SQLoader().load("reset_tasks")
+    if not query:
+        return []
+
+    with DBConnection() as conn:
+        rows = conn.execute(query, (json.dumps(task_ids),)).fetchall()
+        conn.commit()
+
+    return [
+        task.SerializedTask(
+            id=id,
+            job_id=job_id,
+            priority=prio,
+            state=state,
+            timestamp=time,
+            command=commands.SerializedCommand(json.loads(data)),
+        )
+        for id, job_id, prio, data, state, time in rows
+    ]
+
+
+def start_frame(job_id: str) -> Optional[tuple[task.SerializedTask, bool]]:
+    query = SQLoader().load("claim_frame")
+    if not query:
+        return
+
+    # the task row of a frame only exists once it is dispatched, its id is
+    # derived from the job and frame so it stays stable across restarts
+    with DBConnection() as conn:
+        result = conn.execute(query, (job_id,)).fetchone()
+        if not result:
+            conn.commit()
+            return
+
+        frame, end, step, prio, data, time = result
+        command = frame_command(json.loads(data), frame)
+        ser_task = task.SerializedTask(
+            id=str(uuid5(UUID(job_id), str(frame))),
+            job_id=job_id,
+            priority=prio,
+            state=task.TaskState.Progress,
+            timestamp=time,
+            command=command,
+        )
+        conn.execute(
+            INSERT_TASK,
+            (
+                ser_task["id"],
+                job_id,
+                prio,
+                ser_task["state"],
+                time,
+                json.dumps(command),
+            ),
+        )
+        conn.commit()
+
+    return ser_task, frame + step <= end
+
+
+def select_frame_range(job_id: str) -> Optional[SerializedFrameRange]:
+    query = SQLoader().load("select_frame_range")
+    if not query:
+        return
+
+    with DBConnection() as conn:
+        result = conn.execute(query, (job_id,)).fetchone()
+        if not result:
+            return
+
+    prio, data, start, end, step, next = result
+    return SerializedFrameRange(
+        command=commands.SerializedCommand(json.loads(data)),
+        priority=prio,
+        start=start,
+        end=end,
+        step=step,
+        next=next,
+    )
+
+
+def iter_waiting_frames() -> Iterator[tuple[str, int, float, int, float]]:
+    query = SQLoader().load("select_waiting_frames")
+    if not query:
+        return
+
+    with DBConnection() as conn:
+        yield from conn.execute(query)
+
+
+def iter_waiting_tasks() -> Iterator[tuple[str, str, int, float, int, float]]:
+    query = SQLoader().load("select_waiting_tasks")
+    if not query:
+        return
+
+    with DBConnection() as conn:
+        yield from conn.execute(query)
+
+
+def iter_tasks_page(
+    job_id: str, after: int, limit: int, state: Optional[str] = None
+) -> Iterator[tuple[int, task.SerializedTask]]:
+    query = SQLoader().load("select_tasks_page")
+    if not query:
+        return
+
+    with DBConnection() as conn:
+        cursor = conn.execute(query, (job_id, after, state, state, limit))
+        for rowid, id, job_id, prio, data, state, time in cursor:
+            yield (
+                rowid,
+                task.SerializedTask(
+                    id=id,
+                    job_id=job_id,
+                    priority=prio,
+                    state=state,
+                    timestamp=time,
+                    command=commands.SerializedCommand(json.loads(data)),
+                ),
+            )
+
+
+def iter_jobs_page(
+    after: int, limit: int, state: Optional[str] = None
+) -> Iterator[tuple[int, SerializedJob]]:
+    query = SQLoader().load("select_jobs_page")
+    if not query:
+        return
+
+    with DBConnection() as conn:
+        cursor = conn.execute(query, (after, state, state, limit))
+        for rowid, *row in cursor:
+            yield rowid, _job_from_row(row)
+
+
+def iter_workers_page(
+    after: int, limit: int, state: Optional[str] = None
+) -> Iterator[tuple[int, SerializedWorker]]:
+    query = SQLoader().load("select_workers_page")
+    if not query:
+        return
+
+    with DBConnection() as conn:
+        cursor = conn.execute(query, (after, state, state, limit))
+        for id, name, time, worker_state, task_id in cursor:
+            w = worker.Worker(
+                id,
+                name=name,
+                state=worker_state,
+                timestamp=time,
+                task_id=task_id,
+            )
+            yield id, w.serialize()
+
+
 def update_task(task: task.Task) -> None:
     sql = SQLoader()
     query = sql.load("update_task")
@@ -219,9 +485,13 @@ def insert_worker(worker: worker.Worker) -> None:
 
 def select_all_tasks(job_id: str) -> list[task.SerializedTask]:
     tasks: list[task.SerializedTask] = []
+    query = SQLoader().load("select_tasks_by_job")
+    if not query:
+        return tasks
+
     with DBConnection() as conn:
-        cursor = conn.execute("SELECT * FROM tasks WHERE job_id = ?", (job_id,))
-        for row in cursor.fetchall():
+        cursor = conn.execute(query, (job_id,))
+        for row in cursor:
             id, job_id, prio, data, state, time = row
             t = task.SerializedTask(
                 id=id,
@@ -239,18 +509,12 @@ def select_all_tasks(job_id: str) -> list[task.SerializedTask]:
 def select_all_jobs() -> list[SerializedJob]:
     jobs: list[SerializedJob] = []
     with DBConnection() as conn:
-        cursor = conn.execute("SELECT * FROM jobs;")
-        for row in cursor.fetchall():
-            id, name, prio, time, state = row
-            t = SerializedJob(
-                id=id,
-                name=name,
-                priority=prio,
-                state=state,
-                timestamp=time,
-                tasks=[],
-            )
-            jobs.append(t)
+        cursor = conn.execute(
+            "SELECT id, name, priority, timestamp, state, waiting_count,"
+            " progress_count, completed_count FROM jobs;"
+        )
+        for row in cursor:
+            jobs.append(_job_from_row(row))
 
     return jobs
 
@@ -259,7 +523,7 @@ def select_all_worker() -> list[worker.Worker]:
     worker_list: list[worker.Worker] = []
     with DBConnection() as conn:
         cursor = conn.execute("SELECT * FROM workers;")
-        for id, name, _, time, state, task_id in cursor.fetchall():
+        for id, name, _, time, state, task_id in cursor:
             w = worker.Worker(
                 id,
                 name=name,
@@ -273,10 +537,10 @@ def select_all_worker() -> list[worker.Worker]:
 
 
 def init_db():
-    path = DB_PATH
-    if path.exists():
-        print("DB already exists.")
-        return
+    path = pool.path
+    exists = path.exists()
+    if exists:
+        log.info("DB already exists.")
 
     path.parent.mkdir(exist_ok=True)
     sql = SQLoader()
@@ -286,7 +550,28 @@ def init_db():
         return
 
     with DBConnection() as conn:
+        _add_job_counters(conn)
         conn.executescript(query)
         conn.commit()
 
-        print(f"Created DB {path.stem}")
+        if not exists:
+            log.info("Created DB %s", path.stem)
+
+
+def _add_job_counters(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs);")}
+    # new databases get the columns from create_tables
+    if not columns or JOB_COUNTERS[0] in columns:
+        return
+
+    query = SQLoader().load("count_job_tasks")
+    if not query:
+        return
+
+    log.info("Adding task counters to jobs.")
+    for column in JOB_COUNTERS:
+        conn.execute(
+            f"ALTER TABLE jobs ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0;"
+        )
+    conn.execute(query)
+    conn.commit()
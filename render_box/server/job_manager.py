@@ -1,23 +1,61 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
+from itertools import chain
+from threading import Event, Lock, Thread
 from typing import Optional
 
 import render_box.shared.job as job
 from render_box.server import db
+from render_box.server.cache import ReadCache
+from render_box.server.changes import ChangeFeed
+from render_box.server.leases import TICK, LeaseWheel
+from render_box.server.paging import PageRequest, SerializedPage, build_page
+from render_box.server.scheduler import LoadEntry, Scheduler
+from render_box.shared.codec import EncodedData
+from render_box.shared.log import get_logger
 from render_box.shared.serialize import (
     SerializedJob,
+    SerializedJobTasks,
     SerializedTask,
     SerializedWorker,
 )
-from render_box.shared.task import Task
+from render_box.shared.task import Task, TaskState
 from render_box.shared.worker import Worker
 
+log = get_logger("jobs")
+
+type TaskCallback = Callable[[Task, job.Job], None]
+type RevokeCallback = Callable[[list[str]], None]
+
+FRAMES_ENTRY = "frames:"
+
+
+def frames_entry(job_id: str) -> str:
+    return f"{FRAMES_ENTRY}{job_id}"
+
 
 class JobManager:
     worker: dict[str, Worker] = {}
 
-    def __init__(self, task: Optional[Task | Iterable[Task]] = None) -> None:
+    def __init__(
+        self,
+        task: Optional[Task | Iterable[Task]] = None,
+        scheduler: Optional[Scheduler] = None,
+    ) -> None:
+        self.scheduler = scheduler or Scheduler()
+        self.changes = ChangeFeed()
+        self.cache = ReadCache()
+        self.leases: LeaseWheel[RevokeCallback] = LeaseWheel()
+        self._stop_reaper = Event()
+        frames: Iterable[LoadEntry] = (
+            (frames_entry(job_id), job_id, prio, time, job_prio, job_time)
+            for job_id, prio, time, job_prio, job_time in db.iter_waiting_frames()
+        )
+        self.scheduler.load(chain(db.iter_waiting_tasks(), frames))
+        self._subscribers: dict[TaskCallback, None] = {}
+        self._subscribers_lock = Lock()
+
         if task:
             self.add_task(task)
 
@@ -25,22 +63,156 @@ class JobManager:
 
     def add_job(self, job: job.Job) -> None:
         db.insert_job(job)
+        self._publish_tasks((t.serialize() for t in job.tasks), {str(job.id)})
 
         for task in job.tasks:
-            db.insert_task(task)
+            self._schedule(task, job.priority, job.timestamp)
+        if job.frames and len(job.frames):
+            self.scheduler.push(
+                frames_entry(str(job.id)),
+                job.frames.priority,
+                job.timestamp,
+                str(job.id),
+                job.priority,
+                job.timestamp,
+            )
+        self.dispatch()
 
     def add_task(self, task: Task | Iterable[Task]) -> None:
-        if isinstance(task, Task):
-            db.insert_task(task)
+        tasks = [task] if isinstance(task, Task) else list(task)
+        db.insert_tasks(tasks)
+        self._publish_tasks(t.serialize() for t in tasks)
+
+        jobs: dict[str, Optional[SerializedJob]] = {}
+        for t in tasks:
+            job_id = str(t.job_id)
+            if job_id not in jobs:
+                jobs[job_id] = db.select_job(str(t.id))
+            if ser_job := jobs[job_id]:
+                self._schedule(t, ser_job["priority"], ser_job["timestamp"] or 0.0)
+        self.dispatch()
+
+    def requeue_tasks(self, task_ids: list[str]) -> None:
+        ser_tasks = db.reset_tasks(task_ids)
+        if not ser_tasks:
             return
+        self._publish_tasks(ser_tasks)
 
-        for t in task:
-            db.insert_task(t)
+        jobs: dict[str, Optional[SerializedJob]] = {}
+        for t in ser_tasks:
+            job_id = t["job_id"]
+            if job_id not in jobs:
+                jobs[job_id] = db.select_job_by_id(job_id)
+            if ser_job := jobs[job_id]:
+                self.scheduler.push(
+                    t["id"],
+                    t["priority"],
+                    t["timestamp"] or 0.0,
+                    job_id,
+                    ser_job["priority"],
+                    ser_job["timestamp"] or 0.0,
+                )
+        self.dispatch()
 
-    def pop_task(self) -> Optional[tuple[Task, job.Job]]:
-        ser_task = db.select_next_task()
-        if not ser_task:
+    def reap_leases(self) -> int:
+        expired = self.leases.expire()
+        if not expired:
+            return 0
+
+        owners: dict[RevokeCallback, list[str]] = {}
+        for task_id, revoke in expired:
+            owners.setdefault(revoke, []).append(task_id)
+        for revoke, task_ids in owners.items():
+            try:
+                revoke(task_ids)
+            except Exception as e:
+                log.error("failed to revoke tasks: %s", e)
+
+        self.requeue_tasks([task_id for task_id, _ in expired])
+        return len(expired)
+
+    def start_reaper(self, interval: float = TICK) -> None:
+        def run() -> None:
+            while not self._stop_reaper.wait(interval):
+                try:
+                    self.reap_leases()
+                except Exception as e:
+                    log.error("failed to reap leases: %s", e)
+
+        Thread(target=run, name="lease-reaper", daemon=True).start()
+
+    def stop_reaper(self) -> None:
+        self._stop_reaper.set()
+
+    def requeue(self, task: Task) -> None:
+        ser_job = db.select_job(str(task.id))
+        if not ser_job:
             return
+        self._schedule(task, ser_job["priority"], ser_job["timestamp"] or 0.0)
+        self.dispatch()
+
+    def subscribe(self, callback: TaskCallback) -> None:
+        with self._subscribers_lock:
+            self._subscribers[callback] = None
+        self.dispatch()
+
+    def unsubscribe(self, callback: TaskCallback) -> None:
+        with self._subscribers_lock:
+            self._subscribers.pop(callback, None)
+
+    def dispatch(self) -> None:
+        while True:
+            with self._subscribers_lock:
+                if not self._subscribers:
+                    return
+
+            # the database work of popping happens outside of the lock, a
+            # subscriber that left meanwhile puts the task back
+            result = self.pop_task()
+            if not result:
+                return
+
+            with self._subscribers_lock:
+                callback = next(iter(self._subscribers), None)
+                if callback:
+                    del self._subscribers[callback]
+
+            if not callback:
+                self._return_task(result[0])
+                return
+            try:
+                callback(*result)
+            except Exception as e:
+                log.warning("failed to push task: %s", e)
+                self._return_task(result[0])
+
+    def _return_task(self, task: Task) -> None:
+        task.state = TaskState.Waiting
+        self.update_task(task)
+
+    def _schedule(self, task: Task, job_priority: int, job_timestamp: float) -> None:
+        self.scheduler.push(
+            str(task.id),
+            task.priority,
+            task.timestamp,
+            str(task.job_id),
+            job_priority,
+            job_timestamp,
+        )
+
+    def pop_task(self) -> Optional[tuple[Task, job.Job]]:
+        ser_task = None
+        while not ser_task:
+            entry = self.scheduler.pop()
+            if not entry:
+                return
+            task_id, job_id = entry
+            if task_id.startswith(FRAMES_ENTRY):
+                ser_task = self._start_frame(job_id)
+            else:
+                ser_task = db.start_task(task_id)
+        self._publish_tasks([ser_task])
+
         ser_job = db.select_job(ser_task["id"])
         if not ser_job:
             return
@@ -51,13 +223,49 @@ class JobManager:
 
         return (task, j)
 
+    def _start_frame(self, job_id: str) -> Optional[SerializedTask]:
+        ser_job = db.select_job_by_id(job_id)
+        result = db.start_frame(job_id) if ser_job else None
+        if not ser_job or not result:
+            return None
+
+        ser_task, remaining = result
+        # a range is a single scheduler entry, it goes back in right away so
+        # the next frame can be handed out while this one is being sent
+        if remaining:
+            self.scheduler.push(
+                frames_entry(job_id),
+                ser_task["priority"],
+                ser_task["timestamp"] or 0.0,
+                job_id,
+                ser_job["priority"],
+                ser_job["timestamp"] or 0.0,
+            )
+        return ser_task
+
+    def pop_tasks(self, count: int) -> list[tuple[Task, job.Job]]:
+        tasks: list[tuple[Task, job.Job]] = []
+        while len(tasks) < count:
+            result = self.pop_task()
+            if not result:
+                break
+            tasks.append(result)
+
+        return tasks
+
     def register_worker(self, worker: Worker) -> None:
         self.worker[worker.name] = worker
         db.insert_worker(worker)
+        self._publish_worker(worker)
 
     def get_all_tasks(self, job_id: str) -> list[SerializedTask]:
         return db.select_all_tasks(job_id)
 
+    def get_job_tasks(self, job_id: str) -> SerializedJobTasks:
+        return SerializedJobTasks(
+            tasks=self.get_all_tasks(job_id), frames=db.select_frame_range(job_id)
+        )
+
     def get_all_jobs(self) -> list[SerializedJob]:
         return db.select_all_jobs()
 
@@ -67,17 +275,86 @@ class JobManager:
     def get_all_worker_dict(self) -> list[SerializedWorker]:
         return [w.serialize() for w in db.select_all_worker()]
 
+    def encoded_tasks(self, job_id: str) -> EncodedData:
+        return self.cache.get(("tasks", job_id), lambda: self.get_all_tasks(job_id))
+
+    def encoded_job_tasks(self, job_id: str) -> EncodedData:
+        return self.cache.get(
+            ("tasks", job_id, "frames"), lambda: self.get_job_tasks(job_id)
+        )
+
+    def encoded_jobs(self) -> EncodedData:
+        return self.cache.get(("jobs",), self.get_all_jobs)
+
+    def encoded_workers(self) -> EncodedData:
+        return self.cache.get(("workers",), self.get_all_worker_dict)
+
+    def get_tasks_page(
+        self, job_id: str, page: PageRequest
+    ) -> SerializedPage[SerializedTask]:
+        rows = db.iter_tasks_page(job_id, page.after, page.limit, page.state)
+        return build_page(rows, page.limit)
+
+    def get_jobs_page(self, page: PageRequest) -> SerializedPage[SerializedJob]:
+        rows = db.iter_jobs_page(page.after, page.limit, page.state)
+        return build_page(rows, page.limit)
+
+    def get_workers_page(self, page: PageRequest) -> SerializedPage[SerializedWorker]:
+        rows = db.iter_workers_page(page.after, page.limit, page.state)
+        return build_page(rows, page.limit)
+
     def update_task(self, task: Task) -> None:
         db.update_task(task)
+        self._publish_tasks([task.serialize()])
+        if task.state == TaskState.Waiting:
+            self.requeue(task)
 
     def update_worker(self, worker: Worker) -> None:
         db.update_worker(worker)
+        self._publish_worker(worker)
 
     def update_job(self, job: job.Job) -> None:
         db.update_job(job)
+        self._publish_jobs([str(job.id)])
+        self.scheduler.update_job(str(job.id), job.priority, job.timestamp)
 
     def cleanup_jobs(self, task: Task) -> None:
-        db.cleanup_completed_jobs(str(task.id))
+        if db.cleanup_completed_jobs(str(task.id)):
+            job_id = str(task.job_id)
+            self._publish_jobs([job_id])
+            # nothing changes a completed job's tasks anymore
+            self.cache.invalidate(("tasks", job_id), ("tasks", job_id, "frames"))
+
+    def _publish_jobs(self, job_ids: Iterable[str]) -> None:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        self.cache.invalidate(("jobs",))
+        # the rows are only read back for subscribers, every task write would
+        # cost a query per job otherwise
+        if not self.changes.has_subscribers:
+            self.changes.skip()
+            return
+        jobs = [j for job_id in job_ids if (j := db.select_job_by_id(job_id))]
+        if jobs:
+            self.changes.publish("jobs", ((j["id"], j) for j in jobs))
+
+    def _publish_tasks(
+        self, tasks: Iterable[SerializedTask], job_ids: Optional[set[str]] = None
+    ) -> None:
+        tasks = list(tasks)
+        job_ids = (job_ids or set()) | {str(t["job_id"]) for t in tasks}
+        self.changes.publish("tasks", ((t["id"], t) for t in tasks))
+        self.cache.invalidate(
+            *(("tasks", job_id) for job_id in job_ids),
+            *(("tasks", job_id, "frames") for job_id in job_ids),
+        )
+        # the task triggers moved the counters of these jobs
+        self._publish_jobs(job_ids)
+
+    def _publish_worker(self, worker: Worker) -> None:
+        self.changes.publish("workers", [(worker.name, dict(worker.serialize()))])
+        self.cache.invalidate(("workers",))
 
     def get_job_by_task(self, task: Task) -> Optional[job.Job]:
         ser_job = db.select_job(str(task.id))
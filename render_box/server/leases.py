@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Callable
+from threading import Lock
+from typing import Optional
+
+LEASE_TIMEOUT = 30.0
+TICK = 1.0
+
+
+class LeaseWheel[T]:
+    def __init__(
+        self,
+        timeout: float = LEASE_TIMEOUT,
+        tick: float = TICK,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.tick = tick
+        self.ticks = math.ceil(timeout / tick)
+        # one revolution has to span the timeout so every deadline falls in
+        # the bucket that is checked on its tick
+        self.size = self.ticks + 1
+        self._clock = clock
+        self._wheel: list[list[str]] = [[] for _ in range(self.size)]
+        self._leases: dict[str, tuple[int, T]] = {}
+        self._cursor = self._now()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._leases)
+
+    def grant(self, key: str, owner: T) -> None:
+        with self._lock:
+            self._schedule(key, owner)
+
+    def renew(self, key: str, owner: T) -> bool:
+        with self._lock:
+            lease = self._leases.get(key)
+            if not lease or lease[1] != owner:
+                return False
+            # the entry in the old bucket is left behind and skipped once its
+            # bucket comes around, renewing stays O(1)
+            self._schedule(key, owner)
+            return True
+
+    def release(self, key: str, owner: Optional[T] = None) -> None:
+        with self._lock:
+            lease = self._leases.get(key)
+            # a task handed to someone else since keeps the new owner's lease
+            if lease and (owner is None or lease[1] == owner):
+                del self._leases[key]
+
+    def expire(self) -> list[tuple[str, T]]:
+        now = self._now()
+        expired: list[tuple[str, T]] = []
+        with self._lock:
+            # a reaper that fell behind by more than a revolution only needs to
+            # look at every bucket once
+            for tick in range(max(self._cursor, now - self.size + 1), now + 1):
+                index = tick % self.size
+                bucket, self._wheel[index] = self._wheel[index], []
+                for key in bucket:
+                    lease = self._leases.get(key)
+                    if not lease:
+                        continue
+                    deadline, owner = lease
+                    if deadline <= now:
+                        del self._leases[key]
+                        expired.append((key, owner))
+                    elif deadline % self.size == index:
+                        self._wheel[index].append(key)
+            self._cursor = now + 1
+
+        return expired
+
+    def _now(self) -> int:
+        return int(self._clock() / self.tick)
+
+    def _schedule(self, key: str, owner: T) -> None:
+        deadline = self._now() + self.ticks
+        self._leases[key] = (deadline, owner)
+        self._wheel[deadline % self.size].append(key)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, Optional, TypedDict
+
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+class SerializedPage[T](TypedDict):
+    rows: list[T]
+    next: Optional[int]
+
+
+@dataclass
+class PageRequest:
+    after: int = 0
+    limit: int = PAGE_SIZE
+    state: Optional[str] = None
+
+    @classmethod
+    def from_data(cls, data: Any) -> PageRequest:
+        if not isinstance(data, dict):
+            return cls()
+
+        limit = int(data.get("limit") or PAGE_SIZE)
+        return cls(
+            after=int(data.get("after") or 0),
+            limit=min(max(1, limit), MAX_PAGE_SIZE),
+            state=data.get("state"),
+        )
+
+
+def build_page[T](rows: Iterable[tuple[int, T]], limit: int) -> SerializedPage[T]:
+    page: list[T] = []
+    cursor: Optional[int] = None
+    for cursor, row in rows:
+        page.append(row)
+
+    # a short page means the cursor reached the end of the table
+    return SerializedPage(rows=page, next=cursor if len(page) == limit else None)
@@ -1,3 +1,4 @@
+from .changes import changes_router
 from .core import core_router
 from .jobs import job_router
 from .tasks import task_router
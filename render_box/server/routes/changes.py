@@ -0,0 +1,26 @@
+from typing import TYPE_CHECKING
+
+from render_box.shared.message import Message, MessageRouter
+
+if TYPE_CHECKING:
+    from render_box.server.server import ClientHandler
+
+changes_router = MessageRouter("changes")
+
+
+@changes_router.register(".subscribe")
+def subscribe_changes(ctx: "ClientHandler", message: Message):
+    since = message.data.get("since") if isinstance(message.data, dict) else None
+    version = ctx.job_manager.changes.version
+    ctx.changes_id = message.id
+    # reply before subscribing so a push can't be taken as the response
+    ctx.send(Message("changes_subscribed", {"version": version}))
+    ctx.job_manager.changes.subscribe(
+        ctx.push_changes, version if since is None else since
+    )
+
+
+@changes_router.register(".unsubscribe")
+def unsubscribe_changes(ctx: "ClientHandler", message: Message):
+    ctx.job_manager.changes.unsubscribe(ctx.push_changes)
+    ctx.send(Message("ok"))
@@ -1,22 +1,104 @@
 from typing import TYPE_CHECKING
 
+from render_box.shared.codec import CODECS, JSON_CODEC
+from render_box.shared.connection import COMPRESS_THRESHOLD, COMPRESSIONS
 from render_box.shared.exceptions import CloseConnectionException
+from render_box.shared.log import get_logger
 from render_box.shared.message import Message, MessageRouter
+from render_box.shared.profiler import (
+    DEFAULT_SECONDS,
+    MAX_MESSAGES,
+    ProfileSession,
+    is_sort_key,
+)
 
 if TYPE_CHECKING:
     from render_box.server.server import ClientHandler
 
+log = get_logger("routes")
 core_router = MessageRouter("")
 
 
 @core_router.register("connection.close")
 def close(ctx: "ClientHandler", message: Message):
-    print(f"close message from {ctx.worker.name}")
+    log.debug("close message from %s", ctx.worker.name)
     raise CloseConnectionException(ctx.worker.name)
 
 
+@core_router.register("connection.hello")
+def hello(ctx: "ClientHandler", message: Message):
+    data = message.data if isinstance(message.data, dict) else {}
+    offered = data.get("codecs", [])
+    codec = next((CODECS[name] for name in offered if name in CODECS), JSON_CODEC)
+    compression = next(
+        (c for c in data.get("compression", []) if c in COMPRESSIONS), None
+    )
+    ctx.send(
+        Message("connection.hello", {"codec": codec.name, "compression": compression})
+    )
+    ctx.connection.codec = codec
+    if compression:
+        ctx.connection.compress_threshold = COMPRESS_THRESHOLD
+
+
+@core_router.register("cache.stats")
+def cache_stats(ctx: "ClientHandler", message: Message):
+    ctx.send(Message("cache_stats", ctx.job_manager.cache.stats()))
+
+
+@core_router.register("metrics")
+def metrics(ctx: "ClientHandler", message: Message):
+    data = message.data if isinstance(message.data, dict) else {}
+    if data.get("format") == "prometheus":
+        ctx.send(Message("metrics", ctx.router.metrics.prometheus()))
+    else:
+        ctx.send(Message("metrics", ctx.router.metrics.serialize()))
+
+
+@core_router.register("debug.profile")
+def profile(ctx: "ClientHandler", message: Message):
+    data = message.data if isinstance(message.data, dict) else {}
+    routes = data.get("routes")
+    workers = data.get("workers")
+    try:
+        session = ProfileSession(
+            float(data.get("seconds", DEFAULT_SECONDS)),
+            int(data.get("messages", MAX_MESSAGES)),
+            set(routes) if routes else None,
+            set(workers) if workers else None,
+        )
+    except (TypeError, ValueError):
+        ctx.send(Message("debug.profile", {"error": "invalid profile request"}))
+        return
+    if not ctx.router.profiler.start(session):
+        error = session.error or "a profile is already running"
+        ctx.send(Message("debug.profile", {"error": error}))
+        return
+
+    log.info("profiling for %.1fs requested by %s", session.seconds, ctx.client_ip)
+    ctx.send(Message("debug.profile", {"seconds": session.seconds}))
+
+
+@core_router.register("debug.profile.results")
+def profile_results(ctx: "ClientHandler", message: Message):
+    data = message.data if isinstance(message.data, dict) else {}
+    sort = data.get("sort", "cumulative")
+    limit = data.get("limit", 30)
+    if not is_sort_key(sort) or not isinstance(limit, int):
+        ctx.send(Message("debug.profile", {"error": "invalid sort key or limit"}))
+        return
+
+    session = ctx.router.profiler.last
+    if not session:
+        ctx.send(Message("debug.profile", {"error": "no profile was started"}))
+    elif not session.done.is_set():
+        ctx.send(Message("debug.profile", {"running": True}))
+    else:
+        ctx.send(Message("debug.profile", session.serialize(sort, limit)))
+
+
 @core_router.register("docs")
 def docs(ctx: "ClientHandler", message: Message):
     data = tuple(ctx.router.routes.keys())
     message = Message("docs", data=data)
-    ctx.send(message.as_json())
+    ctx.send(message)
@@ -1,11 +1,15 @@
 from typing import TYPE_CHECKING
 
+from render_box.server.paging import PageRequest
 from render_box.shared.job import Job
+from render_box.shared.log import get_logger
 from render_box.shared.message import Message, MessageRouter
+from render_box.shared.utils import is_id
 
 if TYPE_CHECKING:
     from render_box.server.server import ClientHandler
 
+log = get_logger("routes")
 job_router = MessageRouter("jobs")
 
 
@@ -13,14 +17,25 @@ job_router = MessageRouter("jobs")
 def create_job(ctx: "ClientHandler", message: Message):
     job = Job.deserialize(message.data)
     if not job:
+        ctx.send(Message("job_rejected", {"error": "invalid job"}))
+        return
+    # frame task ids are derived from the job id, it has to be a uuid
+    if not all(is_id(id) for id in (job.id, *(task.id for task in job.tasks))):
+        ctx.send(Message("job_rejected", {"error": "ids must be uuids"}))
         return
     ctx.job_manager.add_job(job)
-    print("job added")
-    ctx.send(Message("job_created").as_json())
+    log.debug("job %s added", job.id)
+    ctx.send(Message("job_created"))
 
 
 @job_router.register(".all")
 def all_jobs(ctx: "ClientHandler", message: Message):
-    data = ctx.job_manager.get_all_jobs()
+    data = ctx.job_manager.encoded_jobs()
     message = Message("all_jobs", data=data)
-    ctx.send(message.as_json())
+    ctx.send(message)
+
+
+@job_router.register(".page")
+def jobs_page(ctx: "ClientHandler", message: Message):
+    data = ctx.job_manager.get_jobs_page(PageRequest.from_data(message.data))
+    ctx.send(Message("jobs_page", data=data))
@@ -1,13 +1,18 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Optional
 
-from render_box.shared.job import Job, JobState
+from render_box.server.paging import PageRequest, build_page
+from render_box.shared.job import Job
+from render_box.shared.log import get_logger
 from render_box.shared.message import Message, MessageRouter
+from render_box.shared.serialize import SerializedJobTasks
 from render_box.shared.task import Task, TaskState
-from render_box.shared.worker import WorkerState
+from render_box.shared.utils import is_id
 
 if TYPE_CHECKING:
     from render_box.server.server import ClientHandler
 
+log = get_logger("routes")
+MAX_TASKS_PER_REQUEST = 100
 job_router = MessageRouter("jobs")
 
 
@@ -17,15 +22,15 @@ def create_job(ctx: "ClientHandler", message: Message):
     if not job:
         return
     ctx.job_manager.add_job(job)
-    print("job added")
-    ctx.send(Message("job_created").as_json())
+    log.debug("job %s added", job.id)
+    ctx.send(Message("job_created"))
 
 
 @job_router.register(".all")
 def all_jobs(ctx: "ClientHandler", message: Message):
     data = ctx.job_manager.get_all_jobs()
     message = Message("all_jobs", data=data)
-    ctx.send(message.as_json())
+    ctx.send(message)
 
 
 task_router = MessageRouter("tasks")
@@ -34,41 +39,94 @@ task_router = MessageRouter("tasks")
 @task_router.register(".create")
 def create_task(ctx: "ClientHandler", message: Message):
     job = Task.deserialize(message.data)
-    if not job:
+    if not job or not is_id(job.id) or not is_id(job.job_id):
+        ctx.send(Message("task_rejected", {"error": "invalid task"}))
         return
     ctx.job_manager.add_task(job)
-    ctx.send(Message("task_created").as_json())
+    ctx.send(Message("task_created"))
+
+
+def requested_count(ctx: "ClientHandler", message: Message) -> Optional[int]:
+    ctx.batch = isinstance(message.data, dict)
+    if not isinstance(message.data, dict):
+        return 1
+    try:
+        count = int(message.data.get("count", 1))
+    except (TypeError, ValueError):
+        ctx.send(Message("tasks_rejected", {"error": "invalid task count"}))
+        return None
+    return min(max(1, count), MAX_TASKS_PER_REQUEST)
 
 
 @task_router.register(".next")
 def next_task(ctx: "ClientHandler", message: Message):
-    result = ctx.job_manager.pop_task()
+    count = requested_count(ctx, message)
+    if count is None:
+        return
+    result = ctx.job_manager.pop_tasks(count)
     if not result:
-        ctx.send(Message("tasks").as_json())
-        print(f"{ctx.worker.name} asked for task, none exist...")
+        ctx.send(Message("tasks", [] if ctx.batch else None))
+        log.debug("%s asked for task, none exist...", ctx.worker.name)
         return
-    ctx.task, ctx.job = result
+    ctx.assign_tasks(result)
 
-    ctx.update_worker(task_id=str(ctx.task.id), state="working")
-    ctx.update_job(state=JobState.Progress)
-    print(f"sending task to {ctx.worker.name}")
-    ctx.send(Message("tasks", ctx.task.serialize()).as_json())
+
+@task_router.register(".subscribe")
+def subscribe_task(ctx: "ClientHandler", message: Message):
+    count = requested_count(ctx, message)
+    if count is None:
+        return
+    result = ctx.job_manager.pop_tasks(count)
+    if result:
+        ctx.assign_tasks(result)
+        return
+    ctx.subscription_id = message.id
+    ctx.job_manager.subscribe(ctx.push_task)
 
 
 @task_router.register(".complete")
 def complete_task(ctx: "ClientHandler", message: Message):
-    ctx.update_task(state=TaskState.Completed)
-    ctx.update_worker(task_id=None, state=WorkerState.Idle)
-    if ctx.task:
-        ctx.job_manager.cleanup_jobs(ctx.task)
-        ctx.job = ctx.job_manager.get_job_by_task(ctx.task)
-    ctx.send(Message("ok").as_json())
+    ctx.complete_task(message.data)
+    ctx.send(Message("ok"))
+
+
+@task_router.register(".fail")
+def fail_task(ctx: "ClientHandler", message: Message):
+    ctx.complete_task(message.data, TaskState.Failed)
+    ctx.send(Message("ok"))
+
+
+@task_router.register(".heartbeat")
+def heartbeat(ctx: "ClientHandler", message: Message):
+    # sent while tasks run, there is no reply so the worker never has to read
+    # one between its other requests
+    ctx.renew_leases(message.data)
 
 
 @task_router.register(".all")
 def all_tasks(ctx: "ClientHandler", message: Message):
-    if not message.data:
-        return
-    data = ctx.job_manager.get_all_tasks(message.data)
+    # {"job_id": ...} also reports the frames that are not dispatched yet as
+    # one range instead of a row per frame
+    # without a job the reply is empty, the client is still waiting for one
+    data: Any
+    if isinstance(message.data, dict):
+        if job_id := message.data.get("job_id"):
+            data = ctx.job_manager.encoded_job_tasks(job_id)
+        else:
+            data = SerializedJobTasks(tasks=[], frames=None)
+    elif message.data:
+        data = ctx.job_manager.encoded_tasks(message.data)
+    else:
+        data = []
     message = Message("all_tasks", data=data)
-    ctx.send(message.as_json())
+    ctx.send(message)
+
+
+@task_router.register(".page")
+def tasks_page(ctx: "ClientHandler", message: Message):
+    page = PageRequest.from_data(message.data)
+    if not isinstance(message.data, dict) or not message.data.get("job_id"):
+        ctx.send(Message("tasks_page", data=build_page((), page.limit)))
+        return
+    data = ctx.job_manager.get_tasks_page(message.data["job_id"], page)
+    ctx.send(Message("tasks_page", data=data))
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 
+from render_box.server.paging import PageRequest
 from render_box.shared.message import Message, MessageRouter
 from render_box.shared.worker import Worker
 
@@ -23,11 +24,17 @@ def register_worker(ctx: "ClientHandler", message: Message):
         ctx.worker.name = worker.name
         ctx.job_manager.register_worker(ctx.worker)
 
-    ctx.send(Message("success").as_json())
+    ctx.send(Message("success"))
 
 
 @worker_router.register(".all")
 def all_workers(ctx: "ClientHandler", message: Message):
-    data = ctx.job_manager.get_all_worker_dict()
+    data = ctx.job_manager.encoded_workers()
     message = Message("success", data=data)
-    ctx.send(message.as_json())
+    ctx.send(message)
+
+
+@worker_router.register(".page")
+def workers_page(ctx: "ClientHandler", message: Message):
+    data = ctx.job_manager.get_workers_page(PageRequest.from_data(message.data))
+    ctx.send(Message("workers_page", data=data))
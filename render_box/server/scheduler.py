@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import heapq
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Optional
+
+type SortKey = tuple[int, float, str]
+# task id, job id, priority, timestamp, job priority, job timestamp
+type LoadEntry = tuple[str, str, int, float, int, float]
+
+
+@dataclass
+class ScheduledJob:
+    id: str
+    priority: int
+    timestamp: float
+    tasks: list[SortKey] = field(default_factory=list)
+
+    @property
+    def key(self) -> SortKey:
+        return (-self.priority, self.timestamp, self.id)
+
+
+class Scheduler:
+    def __init__(self) -> None:
+        self.jobs: dict[str, ScheduledJob] = {}
+        self._heap: list[SortKey] = []
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(job.tasks) for job in self.jobs.values())
+
+    def load(self, rows: Iterable[LoadEntry]) -> None:
+        with self._lock:
+            self.jobs.clear()
+            for task_id, job_id, prio, time, job_prio, job_time in rows:
+                job = self.jobs.get(job_id)
+                if not job:
+                    job = self.jobs[job_id] = ScheduledJob(job_id, job_prio, job_time)
+                job.tasks.append((-prio, time, task_id))
+
+            for job in self.jobs.values():
+                heapq.heapify(job.tasks)
+            self._heap = [job.key for job in self.jobs.values()]
+            heapq.heapify(self._heap)
+
+    def push(
+        self,
+        task_id: str,
+        priority: int,
+        timestamp: float,
+        job_id: str,
+        job_priority: int,
+        job_timestamp: float,
+    ) -> None:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                job = self.jobs[job_id] = ScheduledJob(
+                    job_id, job_priority, job_timestamp
+                )
+            if not job.tasks:
+                heapq.heappush(self._heap, job.key)
+            heapq.heappush(job.tasks, (-priority, timestamp, task_id))
+
+    def update_job(self, job_id: str, priority: int, timestamp: float) -> None:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job or (job.priority, job.timestamp) == (priority, timestamp):
+                return
+            job.priority, job.timestamp = priority, timestamp
+            if job.tasks:
+                heapq.heappush(self._heap, job.key)
+
+    def pop(self) -> Optional[tuple[str, str]]:
+        with self._lock:
+            while self._heap:
+                key = self._heap[0]
+                job = self.jobs.get(key[2])
+                # entries are invalidated lazily, a job whose priority changed
+                # or that ran out of tasks leaves a stale key behind
+                if not job or not job.tasks or key != job.key:
+                    heapq.heappop(self._heap)
+                    continue
+
+                _, _, task_id = heapq.heappop(job.tasks)
+                if not job.tasks:
+                    heapq.heappop(self._heap)
+                    del self.jobs[job.id]
+
+                return task_id, job.id
+
+        return None
@@ -1,97 +1,270 @@
 import socket
-from threading import Thread
+from pathlib import Path
+from threading import Lock, Thread
+from time import perf_counter
 from typing import Any, Optional
 
 from render_box.server import db
 from render_box.server.job_manager import JobManager
 from render_box.server.state import AppState
 from render_box.shared.job import Job, JobState
+from render_box.shared.log import get_logger
+from render_box.shared.metrics import METRICS
+from render_box.shared.serialize import SerializedChanges, SerializedTask
 from render_box.shared.worker import WorkerState
 
-from ..shared.connection import Connection
+from ..shared.connection import Connection, FrameSender
 from ..shared.message import Message, MessageRouter
 from ..shared.task import Task, TaskState
 from ..shared.worker import Worker
-from .routes import core_router, job_router, task_router, worker_router
+from .routes import (
+    changes_router,
+    core_router,
+    job_router,
+    task_router,
+    worker_router,
+)
+
+log = get_logger("server")
+
+SERVER_ADDRESS = ("localhost", 65432)
 
 
 class ClientHandler:
     def __init__(
-        self, connection: Connection, job_manager: JobManager, router: MessageRouter
+        self,
+        connection: FrameSender,
+        job_manager: JobManager,
+        router: MessageRouter,
     ) -> None:
         self.connection = connection
         self.job_manager = job_manager
         self.router = router
         self.worker = Worker(len(self.job_manager.worker) + 1, "unknown")
-        self.task: Optional[Task] = None
-        self.job: Optional[Job] = None
+        self.tasks: dict[str, Task] = {}
+        self.jobs: dict[str, Job] = {}
+        self.batch = False
+        self.request_id: Optional[int] = None
+        self.subscription_id: Optional[int] = None
+        self.changes_id: Optional[int] = None
+        self._send_lock = Lock()
+        # the lease reaper revokes tasks from its own thread, only the dicts
+        # are guarded so the job manager is never called with it held
+        self._tasks_lock = Lock()
         self.state = AppState()
 
         ip, port = connection.socket.getpeername()
         self.client_ip = f"{ip}:{port}"
 
-        print(f"client: {self.client_ip} connected")
+        log.info("client: %s connected", self.client_ip)
 
     def update_worker(self, **kwargs: Any) -> None:
         for k, v in kwargs.items():
             setattr(self.worker, k, v)
         self.job_manager.update_worker(self.worker)
 
-    def update_task(self, **kwargs: Any) -> None:
-        if not self.task:
-            return
+    def update_task(self, task: Task, **kwargs: Any) -> None:
         for k, v in kwargs.items():
-            setattr(self.task, k, v)
+            setattr(task, k, v)
 
-        self.job_manager.update_task(self.task)
+        self.job_manager.update_task(task)
 
-    def update_job(self, **kwargs: Any) -> None:
-        if not self.job:
-            return
+    def update_job(self, job: Job, **kwargs: Any) -> None:
         for k, v in kwargs.items():
-            setattr(self.job, k, v)
+            setattr(job, k, v)
 
-        self.job_manager.update_job(self.job)
+        self.job_manager.update_job(job)
 
     def handle_message(self, message: Message) -> None:
-        print(f"MSG: {message}")
+        log.debug("MSG: %s", message)
+        self.request_id = message.id
         self.router.serve(self, message)
 
-    def send(self, data: bytes):
-        self.connection.send(data)
+    def send(self, message: Message) -> None:
+        if message.id is None:
+            message = message._replace(id=self.request_id)
+        start = perf_counter()
+        data = self.connection.codec.encode(message)
+        encoded = perf_counter()
+        # pushes are sent from other threads than the one serving this client
+        with self._send_lock:
+            self.connection.send_frame(data)
+        METRICS.add("encode", encoded - start)
+        METRICS.add("send", perf_counter() - encoded)
+
+    def push_task(self, task: Task, job: Job) -> None:
+        self.assign_tasks([(task, job)], self.subscription_id)
+
+    def push_changes(self, changes: SerializedChanges) -> None:
+        self.send(Message("changes", changes, self.changes_id))
+
+    def assign_tasks(
+        self, assigned: list[tuple[Task, Job]], request_id: Optional[int] = None
+    ) -> None:
+        if not assigned:
+            return
+
+        # tasks are recorded before the send so a fast reply finds them, a
+        # failed send takes them back before the job manager requeues them
+        jobs: dict[str, tuple[Job, Optional[Job], JobState]] = {}
+        with self._tasks_lock:
+            for task, job in assigned:
+                self.tasks[str(task.id)] = task
+                if str(job.id) not in jobs:
+                    jobs[str(job.id)] = (job, self.jobs.get(str(job.id)), job.state)
+                self.jobs[str(job.id)] = job
+        for task, _ in assigned:
+            self.job_manager.leases.grant(str(task.id), self.revoke_tasks)
+        for job, _, _ in jobs.values():
+            self.update_job(job, state=JobState.Progress)
+
+        last_task = assigned[-1][0]
+        self.update_worker(task_id=str(last_task.id), state=WorkerState.Working)
+        log.debug("sending %d task(s) to %s", len(assigned), self.worker.name)
+        data: list[SerializedTask] | SerializedTask
+        if self.batch:
+            data = [task.serialize() for task, _ in assigned]
+        else:
+            data = assigned[0][0].serialize()
+        try:
+            self.send(Message("tasks", data, request_id))
+        except Exception:
+            self.unassign_tasks([task for task, _ in assigned], jobs)
+            raise
+
+    def unassign_tasks(
+        self, tasks: list[Task], jobs: dict[str, tuple[Job, Optional[Job], JobState]]
+    ) -> None:
+        with self._tasks_lock:
+            for task in tasks:
+                self.tasks.pop(str(task.id), None)
+            for job_id, (_, held, _) in jobs.items():
+                if held:
+                    self.jobs[job_id] = held
+                else:
+                    self.jobs.pop(job_id, None)
+            remaining = next(iter(self.tasks), None)
+
+        for task in tasks:
+            self.job_manager.leases.release(str(task.id), self.revoke_tasks)
+        for job, _, state in jobs.values():
+            if state != JobState.Progress:
+                self.update_job(job, state=state)
+        if remaining:
+            self.update_worker(task_id=remaining)
+        else:
+            self.update_worker(task_id=None, state=WorkerState.Idle)
+
+    def complete_task(
+        self, task_id: Optional[str], state: TaskState = TaskState.Completed
+    ) -> None:
+        with self._tasks_lock:
+            if not task_id:
+                task_id = next(iter(self.tasks), None)
+            task = self.tasks.pop(task_id, None) if task_id else None
+            remaining = next(iter(self.tasks), None)
+        if not task:
+            return
+
+        self.job_manager.leases.release(str(task.id), self.revoke_tasks)
+        self.update_task(task, state=state)
+        if remaining:
+            self.update_worker(task_id=remaining)
+        else:
+            self.update_worker(task_id=None, state=WorkerState.Idle)
+
+        self.job_manager.cleanup_jobs(task)
+        job_id = str(task.job_id)
+        with self._tasks_lock:
+            running = any(str(t.job_id) == job_id for t in self.tasks.values())
+        job = self.job_manager.get_job_by_task(task) if running else None
+        with self._tasks_lock:
+            if job:
+                self.jobs[job_id] = job
+            else:
+                self.jobs.pop(job_id, None)
+
+    def renew_leases(self, task_ids: Optional[list[str]] = None) -> None:
+        if not task_ids:
+            with self._tasks_lock:
+                task_ids = list(self.tasks)
+        for task_id in task_ids:
+            self.job_manager.leases.renew(task_id, self.revoke_tasks)
+
+    def revoke_tasks(self, task_ids: list[str]) -> None:
+        # called by the lease reaper, the job manager requeues the tasks
+        with self._tasks_lock:
+            revoked = [task_id for task_id in task_ids if self.tasks.pop(task_id, None)]
+            remaining = next(iter(self.tasks), None)
+        if not revoked:
+            return
+        log.warning(
+            "lease expired for %d task(s) on %s", len(revoked), self.worker.name
+        )
+        if remaining is None:
+            self.update_worker(task_id=None, state=WorkerState.Idle)
+        elif self.worker.task_id in revoked:
+            self.update_worker(task_id=remaining)
+
+    def disconnect(self) -> None:
+        self.job_manager.unsubscribe(self.push_task)
+        self.job_manager.changes.unsubscribe(self.push_changes)
+        self.update_worker(state=WorkerState.Offline, task_id=None)
+        with self._tasks_lock:
+            tasks = list(self.tasks.values())
+            jobs = list(self.jobs.values())
+            self.tasks.clear()
+            self.jobs.clear()
+        for task in tasks:
+            self.job_manager.leases.release(str(task.id), self.revoke_tasks)
+            if task.state == TaskState.Progress:
+                self.update_task(task, state=TaskState.Waiting)
+        for job in jobs:
+            if not job.state == JobState.Completed:
+                self.update_job(job, state=JobState.Waiting)
 
     def run(self) -> None:
+        connection = self.connection
+        if not isinstance(connection, Connection):
+            raise TypeError("a blocking connection is needed to run the handler")
         while True:
             try:
-                data = self.connection.recv()
-                message = Message(**data)
+                message = connection.recv()
                 self.handle_message(message)
             except Exception as e:
-                print(e)
-                self.update_worker(state=WorkerState.Offline, task_id=None)
-                if self.task and self.task.state == TaskState.Progress:
-                    self.update_task(state=TaskState.Waiting)
-                if self.job and not self.job.state == JobState.Completed:
-                    self.update_job(state=JobState.Waiting)
+                log.info("client %s: %s", self.client_ip, e)
+                self.disconnect()
                 break
 
-        print(f"client {self.worker.name} disconnected")
-        self.connection.close()
+        log.info("client %s disconnected", self.worker.name)
+        connection.close()
 
 
-def start_server() -> None:
-    server_address = ("localhost", 65432)
-    server_socket = Connection.server_connection(server_address)
-    print("RenderBox server listening on", server_address)
-
-    db.init_db()
-
-    job_manager = JobManager()
+def create_router() -> MessageRouter:
     router = MessageRouter()
     router.include_router(core_router)
     router.include_router(worker_router)
     router.include_router(task_router)
     router.include_router(job_router)
+    router.include_router(changes_router)
+
+    return router
+
+
+def start_server(
+    server_address: tuple[str, int] = SERVER_ADDRESS, db_path: Optional[Path] = None
+) -> None:
+    server_socket = Connection.server_connection(server_address)
+    log.info("RenderBox server listening on %s", server_address)
+
+    if db_path:
+        db.configure(db_path)
+    db.init_db()
+    db.pool.start_optimizer()
+
+    job_manager = JobManager()
+    job_manager.start_reaper()
+    router = create_router()
 
     while True:
         try:
@@ -2,6 +2,10 @@ from functools import cache
 from pathlib import Path
 from typing import Optional, Self
 
+from render_box.shared.log import get_logger
+
+log = get_logger("sql")
+
 
 class SQLoader:
     _instance = None
@@ -34,7 +38,7 @@ class SQLoader:
         file = self.sql_files.get(sql_name)
 
         if not file:
-            print(f"sql file with name {sql_name}.sql does not exist")
+            log.error("sql file with name %s.sql does not exist", sql_name)
             return None
 
         with open(file, "r", encoding="utf-8") as f:
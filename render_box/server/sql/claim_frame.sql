@@ -0,0 +1,5 @@
+UPDATE frame_ranges
+SET next_frame = next_frame + step
+WHERE job_id = ?
+AND next_frame <= end_frame
+RETURNING next_frame - step, end_frame, step, priority, data, timestamp;
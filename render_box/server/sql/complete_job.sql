@@ -1,3 +1,6 @@
 UPDATE jobs
 SET state = 'completed'
-WHERE id = (SELECT job_id FROM tasks WHERE id = ?);
+WHERE id = (SELECT CAST(job_id AS TEXT) FROM tasks WHERE id = ?)
+AND waiting_count = 0
+AND progress_count = 0
+AND state IS NOT 'completed';
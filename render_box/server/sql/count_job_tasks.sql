@@ -0,0 +1,13 @@
+UPDATE jobs
+SET waiting_count = counts.waiting,
+    progress_count = counts.progress,
+    completed_count = counts.completed
+FROM (
+    SELECT CAST(job_id AS TEXT) AS job_id,
+        SUM(state = 'waiting') AS waiting,
+        SUM(state = 'progress') AS progress,
+        SUM(state = 'completed') AS completed
+    FROM tasks
+    GROUP BY job_id
+) AS counts
+WHERE jobs.id = counts.job_id;
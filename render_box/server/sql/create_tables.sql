@@ -23,5 +23,83 @@ CREATE TABLE IF NOT EXISTS jobs(
     name VARCHAR(50) NOT NULL,
     priority INTEGER NOT NULL,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-    state VARCHAR(10)
+    state VARCHAR(10),
+    waiting_count INTEGER NOT NULL DEFAULT 0,
+    progress_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0
     );
+
+CREATE INDEX IF NOT EXISTS idx_tasks_state
+ON tasks(state, priority DESC, timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_job_state
+ON tasks(job_id, state, priority DESC, timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_state
+ON jobs(state, priority DESC, timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_job
+ON tasks(job_id);
+
+CREATE TABLE IF NOT EXISTS frame_ranges(
+    job_id VARCHAR(50) PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    start_frame INTEGER NOT NULL,
+    end_frame INTEGER NOT NULL,
+    step INTEGER NOT NULL CHECK (step > 0),
+    next_frame INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    FOREIGN KEY(job_id) REFERENCES jobs(id)
+    );
+
+CREATE TRIGGER IF NOT EXISTS tasks_count_insert
+AFTER INSERT ON tasks
+BEGIN
+    UPDATE jobs
+    SET waiting_count = waiting_count + (NEW.state = 'waiting'),
+        progress_count = progress_count + (NEW.state = 'progress'),
+        completed_count = completed_count + (NEW.state = 'completed')
+    WHERE id = CAST(NEW.job_id AS TEXT);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_count_update
+AFTER UPDATE OF state ON tasks
+WHEN OLD.state IS NOT NEW.state
+BEGIN
+    UPDATE jobs
+    SET waiting_count = waiting_count
+            + (NEW.state = 'waiting') - (OLD.state = 'waiting'),
+        progress_count = progress_count
+            + (NEW.state = 'progress') - (OLD.state = 'progress'),
+        completed_count = completed_count
+            + (NEW.state = 'completed') - (OLD.state = 'completed')
+    WHERE id = CAST(NEW.job_id AS TEXT);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_count_delete
+AFTER DELETE ON tasks
+BEGIN
+    UPDATE jobs
+    SET waiting_count = waiting_count - (OLD.state = 'waiting'),
+        progress_count = progress_count - (OLD.state = 'progress'),
+        completed_count = completed_count - (OLD.state = 'completed')
+    WHERE id = CAST(OLD.job_id AS TEXT);
+END;
+
+CREATE TRIGGER IF NOT EXISTS frames_count_insert
+AFTER INSERT ON frame_ranges
+WHEN NEW.next_frame <= NEW.end_frame
+BEGIN
+    UPDATE jobs
+    SET waiting_count = waiting_count + (NEW.end_frame - NEW.next_frame) / NEW.step + 1
+    WHERE id = NEW.job_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS frames_count_update
+AFTER UPDATE OF next_frame ON frame_ranges
+BEGIN
+    UPDATE jobs
+    SET waiting_count = waiting_count - (NEW.next_frame - OLD.next_frame) / NEW.step
+    WHERE id = NEW.job_id;
+END;
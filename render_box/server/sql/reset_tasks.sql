@@ -0,0 +1,8 @@
+-- driven by the given ids, the unary plus keeps the planner from searching
+-- every task in progress through idx_tasks_state instead
+UPDATE tasks
+SET state = 'waiting'
+FROM json_each(?) AS reset
+WHERE tasks.id = reset.value
+AND +tasks.state = 'progress'
+RETURNING id, job_id, priority, data, state, timestamp;
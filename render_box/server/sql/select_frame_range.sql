@@ -0,0 +1,4 @@
+SELECT priority, data, start_frame, end_frame, step, next_frame
+FROM frame_ranges
+WHERE job_id = ?
+AND next_frame <= end_frame;
@@ -1,3 +1,3 @@
-SELECT * 
-FROM jobs 
-WHERE id = (SELECT job_id FROM tasks WHERE id = ?);
+SELECT id, name, priority, timestamp, state, waiting_count, progress_count, completed_count
+FROM jobs
+WHERE id = (SELECT CAST(job_id AS TEXT) FROM tasks WHERE id = ?);
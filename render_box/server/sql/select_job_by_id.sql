@@ -0,0 +1,3 @@
+SELECT id, name, priority, timestamp, state, waiting_count, progress_count, completed_count
+FROM jobs
+WHERE id = ?;
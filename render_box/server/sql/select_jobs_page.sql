@@ -0,0 +1,6 @@
+SELECT rowid, id, name, priority, timestamp, state, waiting_count, progress_count, completed_count
+FROM jobs
+WHERE rowid > ?
+AND (? IS NULL OR state = ?)
+ORDER BY rowid
+LIMIT ?;
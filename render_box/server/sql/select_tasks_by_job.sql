@@ -0,0 +1,3 @@
+SELECT *
+FROM tasks
+WHERE job_id = ?;
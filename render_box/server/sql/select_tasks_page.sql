@@ -0,0 +1,7 @@
+SELECT rowid, id, job_id, priority, data, state, timestamp
+FROM tasks
+WHERE job_id = ?
+AND rowid > ?
+AND (? IS NULL OR state = ?)
+ORDER BY rowid
+LIMIT ?;
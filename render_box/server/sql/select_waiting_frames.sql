@@ -0,0 +1,5 @@
+SELECT frame_ranges.job_id, frame_ranges.priority, frame_ranges.timestamp, jobs.priority, jobs.timestamp
+FROM frame_ranges
+JOIN jobs ON jobs.id = frame_ranges.job_id
+WHERE frame_ranges.next_frame <= frame_ranges.end_frame
+AND jobs.state IN ('progress', 'waiting');
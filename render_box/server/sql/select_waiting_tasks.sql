@@ -0,0 +1,5 @@
+SELECT tasks.id, tasks.job_id, tasks.priority, tasks.timestamp, jobs.priority, jobs.timestamp
+FROM tasks
+JOIN jobs ON jobs.id = tasks.job_id
+WHERE tasks.state = 'waiting'
+AND jobs.state IN ('progress', 'waiting');
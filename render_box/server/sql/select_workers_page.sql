@@ -0,0 +1,6 @@
+SELECT id, name, timestamp, state, task_id
+FROM workers
+WHERE id > ?
+AND (? IS NULL OR state = ?)
+ORDER BY id
+LIMIT ?;
@@ -0,0 +1,5 @@
+UPDATE tasks
+SET state = 'progress'
+WHERE id = ?
+AND state = 'waiting'
+RETURNING id, job_id, priority, data, state, timestamp;
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Callable, Optional, Protocol
+
+from render_box.shared.message import Message
+
+
+class Codec(Protocol):
+    name: str
+
+    def encode(self, message: Message) -> bytes: ...
+
+    def encode_data(self, data: Any) -> bytes: ...
+
+    def decode(self, data: bytes | memoryview) -> Message: ...
+
+
+class EncodedData:
+    # message data encoded once per codec and spliced into every message that
+    # sends it, the request id still differs per message
+    def __init__(self, data: Any) -> None:
+        self.data = data
+        self._encoded: dict[str, bytes] = {}
+
+    def encoded(self, codec: Codec) -> bytes:
+        encoded = self._encoded.get(codec.name)
+        if encoded is None:
+            encoded = self._encoded[codec.name] = codec.encode_data(self.data)
+        return encoded
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, message: Message) -> bytes:
+        if not isinstance(message.data, EncodedData):
+            return message.as_json()
+
+        # same layout as json.dumps(message._asdict())
+        return b"".join(
+            (
+                b'{"message": ',
+                json.dumps(message.message).encode("utf-8"),
+                b', "data": ',
+                message.data.encoded(self),
+                b', "id": ',
+                json.dumps(message.id).encode("utf-8"),
+                b"}",
+            )
+        )
+
+    def encode_data(self, data: Any) -> bytes:
+        return json.dumps(data).encode("utf-8")
+
+    def decode(self, data: bytes | memoryview) -> Message:
+        return Message(**json.loads(str(data, "utf-8")))
+
+
+NONE, TRUE, FALSE, INT, FLOAT, STR, UUID_, LIST, DICT, RECORD, BIGINT = range(11)
+
+HEADER = struct.Struct("!BBIH")
+TAG = struct.Struct("!B")
+TAG_INT = struct.Struct("!Bq")
+TAG_FLOAT = struct.Struct("!Bd")
+TAG_SIZE = struct.Struct("!BI")
+TAG_RECORD = struct.Struct("!BB")
+INT_ = struct.Struct("!q")
+FLOAT_ = struct.Struct("!d")
+SIZE = struct.Struct("!I")
+
+UUID_TAG = TAG.pack(UUID_)
+VERSION = 2
+HAS_ID = 0x01
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+# field layouts of SerializedCommand, SerializedTask, SerializedJob and
+# SerializedWorker, sent positionally instead of repeating the keys per row
+RECORDS: tuple[tuple[str, ...], ...] = (
+    ("name", "data"),
+    ("id", "priority", "command", "job_id", "state", "timestamp"),
+    (
+        "id",
+        "name",
+        "priority",
+        "timestamp",
+        "state",
+        "tasks",
+        "waiting_count",
+        "progress_count",
+        "completed_count",
+    ),
+    ("id", "name", "state", "timestamp", "task_id"),
+)
+RECORD_IDS = {frozenset(fields): idx for idx, fields in enumerate(RECORDS)}
+
+
+def uuid_bytes(value: str) -> Optional[bytes]:
+    if len(value) != 36 or value[8] != "-" or value[13] != "-" or value[23] != "-":
+        return None
+    digits = value.replace("-", "")
+    if len(digits) != 32 or not digits.islower() and not digits.isdigit():
+        return None
+    try:
+        data = bytes.fromhex(digits)
+    except ValueError:
+        return None
+    return data if len(data) == 16 else None
+
+
+def dict_key(key: Any) -> str:
+    # the keys json.dumps accepts, converted the same way
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps(key)
+    raise TypeError(
+        f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+    )
+
+
+def uuid_str(value: bytes) -> str:
+    h = value.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+class BinaryCodec:
+    name = "binary"
+
+    def __init__(self) -> None:
+        self._encoders: dict[type, Callable[[Any, list[bytes]], None]] = {
+            type(None): self._encode_none,
+            bool: self._encode_bool,
+            int: self._encode_int,
+            float: self._encode_float,
+            str: self._encode_str,
+            list: self._encode_list,
+            tuple: self._encode_list,
+            dict: self._encode_dict,
+        }
+
+    def encode(self, message: Message) -> bytes:
+        name = message.message.encode("utf-8")
+        flags, id = (0, 0) if message.id is None else (HAS_ID, message.id)
+        out = [HEADER.pack(VERSION, flags, id, len(name)), name]
+        if isinstance(message.data, EncodedData):
+            out.append(message.data.encoded(self))
+        else:
+            self._encode(message.data, out)
+        return b"".join(out)
+
+    def encode_data(self, data: Any) -> bytes:
+        out: list[bytes] = []
+        self._encode(data, out)
+        return b"".join(out)
+
+    def decode(self, data: bytes | memoryview) -> Message:
+        frame = bytes(data)
+        version, flags, id, size = HEADER.unpack_from(frame)
+        if version != VERSION:
+            raise ValueError(f"unsupported binary codec version {version}")
+        offset = HEADER.size + size
+        name = frame[HEADER.size : offset].decode("utf-8")
+        value, _ = self._decode(frame, offset)
+        return Message(name, value, id if flags & HAS_ID else None)
+
+    def _encode(self, value: Any, out: list[bytes]) -> None:
+        encoder = self._encoders.get(type(value))
+        if not encoder:
+            encoder = self._encoder_for_subclass(value)
+        encoder(value, out)
+
+    def _encoder_for_subclass(self, value: Any) -> Callable[[Any, list[bytes]], None]:
+        # StrEnum states and other subclasses of the builtin types
+        for base, encoder in list(self._encoders.items()):
+            if base is not type(None) and isinstance(value, base):
+                self._encoders[type(value)] = encoder
+                return encoder
+        raise TypeError(f"cannot encode {type(value).__name__}")
+
+    def _encode_none(self, value: None, out: list[bytes]) -> None:
+        out.append(TAG.pack(NONE))
+
+    def _encode_bool(self, value: bool, out: list[bytes]) -> None:
+        out.append(TAG.pack(TRUE if value else FALSE))
+
+    def _encode_int(self, value: int, out: list[bytes]) -> None:
+        if INT64_MIN <= value <= INT64_MAX:
+            out.append(TAG_INT.pack(INT, value))
+            return
+        digits = str(value).encode("ascii")
+        out.append(TAG_SIZE.pack(BIGINT, len(digits)))
+        out.append(digits)
+
+    def _encode_float(self, value: float, out: list[bytes]) -> None:
+        out.append(TAG_FLOAT.pack(FLOAT, value))
+
+    def _encode_str(self, value: str, out: list[bytes]) -> None:
+        uuid = uuid_bytes(value)
+        if uuid:
+            out.append(UUID_TAG)
+            out.append(uuid)
+            return
+        data = value.encode("utf-8")
+        out.append(TAG_SIZE.pack(STR, len(data)))
+        out.append(data)
+
+    def _encode_list(self, value: list[Any], out: list[bytes]) -> None:
+        out.append(TAG_SIZE.pack(LIST, len(value)))
+        for item in value:
+            self._encode(item, out)
+
+    def _encode_dict(self, value: dict[str, Any], out: list[bytes]) -> None:
+        record = RECORD_IDS.get(frozenset(value))
+        if record is not None:
+            out.append(TAG_RECORD.pack(RECORD, record))
+            for field in RECORDS[record]:
+                self._encode(value[field], out)
+            return
+
+        out.append(TAG_SIZE.pack(DICT, len(value)))
+        for k, v in value.items():
+            self._encode_str(k if isinstance(k, str) else dict_key(k), out)
+            self._encode(v, out)
+
+    def _decode(self, frame: bytes, offset: int) -> tuple[Any, int]:
+        tag = frame[offset]
+        offset += 1
+
+        if tag == STR:
+            (size,) = SIZE.unpack_from(frame, offset)
+            offset += SIZE.size
+            return frame[offset : offset + size].decode("utf-8"), offset + size
+        if tag == UUID_:
+            return uuid_str(frame[offset : offset + 16]), offset + 16
+        if tag == INT:
+            return INT_.unpack_from(frame, offset)[0], offset + INT_.size
+        if tag == FLOAT:
+            return FLOAT_.unpack_from(frame, offset)[0], offset + FLOAT_.size
+        if tag == NONE:
+            return None, offset
+        if tag == TRUE:
+            return True, offset
+        if tag == FALSE:
+            return False, offset
+        if tag == RECORD:
+            fields = RECORDS[frame[offset]]
+            offset += 1
+            record: dict[str, Any] = {}
+            for field in fields:
+                record[field], offset = self._decode(frame, offset)
+            return record, offset
+        if tag == LIST:
+            (size,) = SIZE.unpack_from(frame, offset)
+            offset += SIZE.size
+            items = []
+            for _ in range(size):
+                item, offset = self._decode(frame, offset)
+                items.append(item)
+            return items, offset
+        if tag == DICT:
+            (size,) = SIZE.unpack_from(frame, offset)
+            offset += SIZE.size
+            mapping = {}
+            for _ in range(size):
+                key, offset = self._decode(frame, offset)
+                mapping[key], offset = self._decode(frame, offset)
+            return mapping, offset
+        if tag == BIGINT:
+            (size,) = SIZE.unpack_from(frame, offset)
+            offset += SIZE.size
+            return int(frame[offset : offset + size]), offset + size
+
+        raise ValueError(f"invalid tag {tag} at offset {offset - 1}")
+
+
+JSON_CODEC = JsonCodec()
+BINARY_CODEC = BinaryCodec()
+CODECS: dict[str, Codec] = {codec.name: codec for codec in (BINARY_CODEC, JSON_CODEC)}
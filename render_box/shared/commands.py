@@ -2,52 +2,87 @@ from __future__ import annotations
 
 import json
 import time
-from typing import Optional, Type
+from typing import TYPE_CHECKING, Optional, Type
 
+from render_box.shared.log import get_logger
 from render_box.shared.serialize import Command, SerializedCommand
-from render_box.shared.utils import class_name_from_repr
+
+if TYPE_CHECKING:
+    from importlib.metadata import EntryPoint
+
+log = get_logger("commands")
+
+PLUGIN_GROUP = "render_box.commands"
 
 
 class CommandManager:
     commands: dict[str, Type[Command]] = {}
+    # entry points of installed command plugins by command name, listed on the
+    # first unknown command and imported only once that command is used
+    plugins: Optional[dict[str, EntryPoint]] = None
 
     @classmethod
     def get_command(cls, name: str) -> Optional[Type[Command]]:
-        cmd_type = cls.commands.get(name)
+        cmd_type = cls.commands.get(name) or cls.load_plugin(name)
         if not cmd_type:
-            print(f'invalid command type: "{name}" not found')
+            log.warning('invalid command type: "%s" not found', name)
         return cmd_type
 
+    @classmethod
+    def load_plugin(cls, name: str) -> Optional[Type[Command]]:
+        if cls.plugins is None:
+            from importlib.metadata import entry_points
+
+            cls.plugins = {ep.name: ep for ep in entry_points(group=PLUGIN_GROUP)}
+
+        entry_point = cls.plugins.pop(name, None)
+        if not entry_point:
+            return None
+        try:
+            command = entry_point.load()
+        except Exception as e:
+            log.error("command plugin %s failed to load: %s", entry_point.value, e)
+            return None
+
+        cls.commands[name] = register_command(command)
+        return command
+
+    @classmethod
+    def deserialize(cls, data: SerializedCommand) -> Optional[Command]:
+        cmd_type = cls.get_command(data["name"])
+        return cmd_type.deserialize(data) if cmd_type else None
+
 
 def register_command(command: Type[Command]) -> Type[Command]:
     cmd_name = command.__name__
     if cmd_name not in CommandManager.commands:
         CommandManager.commands[cmd_name] = command
-        print(f"Registered Command {cmd_name}")
+        log.debug("Registered Command %s", cmd_name)
 
     return command
 
 
 @register_command
 class TestCommand(Command):
-    def __init__(self, duration: int) -> None:
+    def __init__(self, duration: int, frame: Optional[int] = None) -> None:
         super().__init__()
         self.duration = duration
+        self.frame = frame
 
     def run(self) -> None:
-        print(f"starting command {self}")
+        log.info("starting command %s", self)
         time.sleep(self.duration)
-        print(f"finished command {self}")
+        log.info("finished command %s", self)
 
     def serialize(self) -> SerializedCommand:
-        return {"name": class_name_from_repr(self.__repr__()), "data": self.__dict__}
+        return {"name": type(self).__name__, "data": self.__dict__}
 
     @classmethod
     def deserialize(cls, data: SerializedCommand) -> Optional[TestCommand]:
         try:
             command = TestCommand(**data["data"])
         except Exception:
-            print("error deserializing SerializedCommand")
+            log.warning("error deserializing SerializedCommand")
             command = None
 
         return command
@@ -60,7 +95,7 @@ class TestCommand(Command):
         try:
             command = json.loads(data.decode("utf-8"))
         except Exception:
-            print("error converting json data to Command")
+            log.warning("error converting json data to Command")
             command = None
 
         if not command:
@@ -1,29 +1,160 @@
 from __future__ import annotations
 
-import json
 import socket
-from typing import Any
+import zlib
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from itertools import count
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Any, Optional, Protocol
+
+from render_box.shared.codec import CODECS, JSON_CODEC, Codec
+from render_box.shared.exceptions import (
+    ConnectionClosedException,
+    FrameTooLargeException,
+)
+from render_box.shared.log import get_logger
+from render_box.shared.message import Message
+
+if TYPE_CHECKING:
+    # only the async server needs asyncio, clients do not pay for importing it
+    import asyncio
+
+log = get_logger("connection")
+
+HEADER_SIZE = 4
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+KEEP_BUFFER_SIZE = 1024 * 1024
+SPLIT_SEND_SIZE = 64 * 1024
+# the top bit of the length header marks a zlib compressed body
+COMPRESSED = 0x8000_0000
+FRAME_SIZE_MASK = 0x7FFF_FFFF
+COMPRESS_THRESHOLD = 16 * 1024
+COMPRESS_LEVEL = 1
+COMPRESSIONS = ("zlib",)
+# a peer that reads nothing for this long is disconnected
+SEND_TIMEOUT = 10.0
+
+
+def check_frame_size(size: int, max_frame_size: int) -> None:
+    if size > max_frame_size:
+        raise FrameTooLargeException(
+            f"frame of {size} bytes exceeds the limit of {max_frame_size} bytes"
+        )
+
+
+def pack_frame(data: bytes, compress_threshold: Optional[int]) -> tuple[bytes, bytes]:
+    if compress_threshold is not None and len(data) >= compress_threshold:
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        if len(compressed) < len(data):
+            header = (len(compressed) | COMPRESSED).to_bytes(HEADER_SIZE, "big")
+            return header, compressed
+
+    return len(data).to_bytes(HEADER_SIZE, "big"), data
+
+
+def unpack_header(header: bytes | bytearray) -> tuple[int, bool]:
+    value = int.from_bytes(header, "big")
+    return value & FRAME_SIZE_MASK, bool(value & COMPRESSED)
+
+
+def decompress_frame(data: bytes | memoryview, max_frame_size: int) -> bytes:
+    decompressor = zlib.decompressobj()
+    body = decompressor.decompress(data, max_frame_size)
+    if decompressor.unconsumed_tail:
+        raise FrameTooLargeException(
+            f"compressed frame exceeds the limit of {max_frame_size} bytes"
+        )
+
+    return body
+
+
+class FrameSender(Protocol):
+    # what the server handlers need from both connection types
+    socket: Any
+    codec: Codec
+    compress_threshold: Optional[int]
+
+    def send_frame(self, data: bytes) -> None: ...
 
 
 class Connection:
-    def __init__(self, socket: socket.socket) -> None:
+    def __init__(
+        self, socket: socket.socket, max_frame_size: int = MAX_FRAME_SIZE
+    ) -> None:
         self.socket = socket
+        self.max_frame_size = max_frame_size
+        self.codec: Codec = JSON_CODEC
+        self.compress_threshold: Optional[int] = None
+        self._header = bytearray(HEADER_SIZE)
+        self._buffer = bytearray(4096)
+        self._send_lock = Lock()
 
-    def send(self, data: bytes):
-        header = len(data).to_bytes(4, "big")
-        self.socket.sendall(header + data)
+    def send(self, message: Message) -> None:
+        self.send_frame(self.codec.encode(message))
 
-    def send_recv(self, data: bytes) -> dict[Any, Any]:
-        self.send(data)
+    def send_recv(self, message: Message) -> Message:
+        self.send(message)
         response = self.recv()
 
         return response
 
-    def recv(self) -> dict[Any, Any]:
-        header = self.socket.recv(4)
-        body_size = int.from_bytes(header, "big")
-        response = self.socket.recv(body_size).decode("utf-8")
-        return json.loads(response)
+    def recv(self) -> Message:
+        return self.codec.decode(self.recv_frame())
+
+    def negotiate(
+        self,
+        codecs: Iterable[str] = tuple(CODECS),
+        compress_threshold: Optional[int] = COMPRESS_THRESHOLD,
+    ) -> Codec:
+        hello_data: dict[str, list[str]] = {"codecs": list(codecs)}
+        if compress_threshold is not None:
+            hello_data["compression"] = list(COMPRESSIONS)
+
+        response = self.send_recv(Message("connection.hello", hello_data))
+        if response.message == "connection.hello" and response.data:
+            self.codec = CODECS.get(response.data["codec"], JSON_CODEC)
+            if response.data.get("compression") in COMPRESSIONS:
+                self.compress_threshold = compress_threshold
+
+        return self.codec
+
+    def send_frame(self, data: bytes) -> None:
+        check_frame_size(len(data), self.max_frame_size)
+        header, data = pack_frame(data, self.compress_threshold)
+        # heartbeats are sent from another thread, frames must not interleave
+        with self._send_lock:
+            if len(data) < SPLIT_SEND_SIZE:
+                self.socket.sendall(header + data)
+            else:
+                self.socket.sendall(header)
+                self.socket.sendall(data)
+
+    def recv_frame(self) -> memoryview:
+        self._recv_into(memoryview(self._header))
+        body_size, compressed = unpack_header(self._header)
+        check_frame_size(body_size, self.max_frame_size)
+
+        if body_size <= len(self._buffer):
+            buffer = self._buffer
+        elif body_size <= KEEP_BUFFER_SIZE:
+            buffer = self._buffer = bytearray(body_size)
+        else:
+            buffer = bytearray(body_size)
+
+        body = memoryview(buffer)[:body_size]
+        self._recv_into(body)
+        if compressed:
+            return memoryview(decompress_frame(body, self.max_frame_size))
+        return body
+
+    def _recv_into(self, view: memoryview) -> None:
+        received = 0
+        while received < len(view):
+            size = self.socket.recv_into(view[received:])
+            if not size:
+                raise ConnectionClosedException("connection closed by peer")
+            received += size
 
     def close(self) -> None:
         self.socket.close()
@@ -39,8 +170,10 @@ class Connection:
     @classmethod
     def server_connection(cls, adress: tuple[str, int]) -> Connection:
         server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # restarts must not wait for connections of the last run in TIME_WAIT
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         server_socket.bind(adress)
-        server_socket.listen(1)
+        server_socket.listen(socket.SOMAXCONN)
         server_socket.settimeout(1.0)
 
         return Connection(server_socket)
@@ -49,3 +182,142 @@ class Connection:
         socket, _ = self.socket.accept()
 
         return socket
+
+
+class PipelinedConnection:
+    def __init__(self, connection: Connection) -> None:
+        self.connection = connection
+        self.on_message: Optional[Callable[[Message], None]] = None
+        self._ids = count(1)
+        self._pending: dict[int, Future[Message]] = {}
+        self._error: Optional[Exception] = None
+        self._lock = Lock()
+        self._reader = Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def request(self, message: Message) -> Future[Message]:
+        future: Future[Message] = Future()
+        with self._lock:
+            if self._error:
+                future.set_exception(self._error)
+                return future
+            id = next(self._ids)
+            self._pending[id] = future
+            self.connection.send(message._replace(id=id))
+
+        return future
+
+    def send_recv(self, message: Message, timeout: Optional[float] = None) -> Message:
+        return self.request(message).result(timeout)
+
+    def send(self, message: Message) -> None:
+        with self._lock:
+            self.connection.send(message)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _read_loop(self) -> None:
+        # whatever ends the reader, nobody is left to answer the pending requests
+        error: Exception = ConnectionClosedException("reader stopped")
+        try:
+            while True:
+                message = self.connection.recv()
+                with self._lock:
+                    future = self._pending.pop(message.id, None) if message.id else None
+                if future:
+                    if not future.cancelled():
+                        future.set_result(message)
+                elif self.on_message:
+                    try:
+                        self.on_message(message)
+                    except Exception as e:
+                        log.error("failed to handle %s: %s", message.message, e)
+        except Exception as e:
+            error = e
+        finally:
+            self._fail_pending(error)
+
+    def _fail_pending(self, error: Exception) -> None:
+        with self._lock:
+            self._error = ConnectionClosedException(str(error))
+            self._error.__cause__ = error
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.cancelled():
+                future.set_exception(self._error)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    import asyncio
+
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class AsyncConnection:
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        loop: asyncio.AbstractEventLoop,
+        max_frame_size: int = MAX_FRAME_SIZE,
+    ) -> None:
+        self.max_frame_size = max_frame_size
+        self.reader = reader
+        self.writer = writer
+        self.loop = loop
+        self.socket = writer.get_extra_info("socket")
+        self.codec: Codec = JSON_CODEC
+        self.compress_threshold: Optional[int] = None
+        self.send_timeout = SEND_TIMEOUT
+
+    def send(self, message: Message) -> None:
+        self.send_frame(self.codec.encode(message))
+
+    def send_frame(self, data: bytes) -> None:
+        import asyncio
+
+        check_frame_size(len(data), self.max_frame_size)
+        header, data = pack_frame(data, self.compress_threshold)
+        if self.writer.is_closing():
+            raise ConnectionClosedException("connection closed")
+        if _running_loop() is self.loop:
+            self.writer.write(header + data)
+            return
+
+        # sent from the handler and push threads, waiting for the drain gives
+        # them backpressure and the errors of the write
+        future = asyncio.run_coroutine_threadsafe(self._write(header + data), self.loop)
+        try:
+            future.result(self.send_timeout)
+        except TimeoutError:
+            future.cancel()
+            # close() would wait for the buffered data to be read first
+            self.loop.call_soon_threadsafe(self.writer.transport.abort)
+            raise ConnectionClosedException(
+                f"peer did not read for {self.send_timeout}s"
+            ) from None
+
+    async def _write(self, data: bytes) -> None:
+        if self.writer.is_closing():
+            raise ConnectionClosedException("connection closed")
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def recv(self) -> Message:
+        header = await self.reader.readexactly(HEADER_SIZE)
+        body_size, compressed = unpack_header(header)
+        check_frame_size(body_size, self.max_frame_size)
+        response = await self.reader.readexactly(body_size)
+        if compressed:
+            return self.codec.decode(decompress_frame(response, self.max_frame_size))
+        return self.codec.decode(response)
+
+    async def drain(self) -> None:
+        await self.writer.drain()
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.writer.close)
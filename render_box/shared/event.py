@@ -1,6 +1,10 @@
 from fnmatch import fnmatch
 from typing import Any, Callable
 
+from render_box.shared.log import get_logger
+
+log = get_logger("events")
+
 Callback = Callable[..., Any]
 
 
@@ -10,7 +14,7 @@ class EventSystem:
     @classmethod
     def register_event(cls, event: str) -> None:
         if event in cls._events:
-            print(f"event {event} already registered")
+            log.debug("event %s already registered", event)
             return
         cls._events[event] = []
 
@@ -19,23 +23,23 @@ class EventSystem:
         events = (e for e in cls._events if fnmatch(event, e) or fnmatch(e, event))
 
         if not events:
-            print(f"no matching event found for '{event}'")
+            log.warning("no matching event found for '%s'", event)
             return
 
         for e in events:
             if callable in cls._events[e]:
-                print(f"callable already registered for event '{e}'")
+                log.debug("callable already registered for event '%s'", e)
                 return
 
             cls._events[e].append(callable)
-            print(f"callable connected to event '{e}'")
+            log.debug("callable connected to event '%s'", e)
 
     @classmethod
     def emit(cls, event: str, *args: Any, **kwargs: Any) -> None:
         matched_events = (e for e in cls._events if fnmatch(e, event))
 
         if not matched_events:
-            print(f"no matching events found for {event}")
+            log.warning("no matching events found for %s", event)
             return
 
         for matched_event in matched_events:
@@ -1 +1,7 @@
 class CloseConnectionException(Exception): ...
+
+
+class ConnectionClosedException(ConnectionError): ...
+
+
+class FrameTooLargeException(Exception): ...
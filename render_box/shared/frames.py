@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from typing import Optional
+
+from render_box.shared.commands import CommandManager
+
+from .serialize import (
+    Command,
+    Serializable,
+    SerializedCommand,
+    SerializedFrameRange,
+)
+
+
+class FrameRange(Serializable["FrameRange", SerializedFrameRange]):
+    def __init__(
+        self,
+        command: Command,
+        start: int,
+        end: int,
+        step: int = 1,
+        priority: Optional[int] = None,
+        next: Optional[int] = None,
+    ) -> None:
+        if step < 1:
+            raise ValueError(f"frame step must be positive, got {step}")
+        self.command = command
+        self.start = start
+        self.end = end
+        self.step = step
+        self.priority = priority or 50
+        self.next = start if next is None else next
+
+    def __len__(self) -> int:
+        return len(range(self.next, self.end + 1, self.step))
+
+    def serialize(self) -> SerializedFrameRange:
+        return SerializedFrameRange(
+            command=self.command.serialize(),
+            priority=self.priority,
+            start=self.start,
+            end=self.end,
+            step=self.step,
+            next=self.next,
+        )
+
+    @classmethod
+    def deserialize(cls, data: Optional[SerializedFrameRange]) -> Optional[FrameRange]:
+        if not data:
+            return
+
+        command = CommandManager.deserialize(data["command"])
+        if not command:
+            return
+
+        return FrameRange(
+            command,
+            start=data["start"],
+            end=data["end"],
+            step=data["step"],
+            priority=data["priority"],
+            next=data.get("next"),
+        )
+
+    @classmethod
+    def from_json(cls, data: bytes) -> Optional[FrameRange]:
+        return cls.deserialize(json.loads(data.decode("utf-8")))
+
+    def as_json(self) -> bytes:
+        return json.dumps(self.serialize()).encode("utf-8")
+
+
+def frame_command(template: SerializedCommand, frame: int) -> SerializedCommand:
+    return SerializedCommand(
+        name=template["name"], data={**template["data"], "frame": frame}
+    )
@@ -4,13 +4,20 @@ import json
 import time
 from enum import StrEnum
 from typing import Optional
-from uuid import UUID, uuid4
+from uuid import UUID
 
+from render_box.shared.frames import FrameRange
 from render_box.shared.task import Task
+from render_box.shared.utils import new_id
 
 from .serialize import (
+    Dumper,
+    Field,
+    Loader,
     Serializable,
     SerializedJob,
+    SerializedTask,
+    make_serializers,
 )
 
 
@@ -20,47 +27,64 @@ class JobState(StrEnum):
     Completed = "completed"
 
 
+def load_tasks(data: list[SerializedTask]) -> list[Task]:
+    return [t for d in data if (t := Task.deserialize(d))]
+
+
+FIELDS = (
+    Field("id"),
+    Field("priority"),
+    Field("name"),
+    Field("state", load=JobState),
+    Field("timestamp"),
+    Field("tasks", lambda tasks: [t.serialize() for t in tasks], load_tasks),
+    Field("waiting_count", default=0),
+    Field("progress_count", default=0),
+    Field("completed_count", default=0),
+    Field(
+        "frames",
+        lambda frames: frames.serialize(),
+        FrameRange.deserialize,
+        optional=True,
+    ),
+)
+serialize_job: Dumper[Job, SerializedJob]
+deserialize_job: Loader[Job, SerializedJob]
+serialize_job, deserialize_job = make_serializers("Job", FIELDS)
+
+
 class Job(Serializable["Job", SerializedJob]):
+    __slots__ = tuple(field.name for field in FIELDS)
+
     def __init__(
         self,
         name: str,
-        id: Optional[UUID] = None,
+        id: Optional[UUID | str] = None,
         priority: int = 50,
         state: JobState = JobState.Waiting,
         timestamp: Optional[float] = None,
         tasks: Optional[list[Task]] = None,
+        waiting_count: int = 0,
+        progress_count: int = 0,
+        completed_count: int = 0,
+        frames: Optional[FrameRange] = None,
     ) -> None:
-        self.id = id or uuid4()
+        self.id = str(id) if id else new_id()
         self.priority = priority
         self.name = name
         self.state = state
         self.timestamp = timestamp or time.time()
         self.tasks = tasks or []
+        self.waiting_count = waiting_count
+        self.progress_count = progress_count
+        self.completed_count = completed_count
+        self.frames = frames
 
-    def serialize(self) -> SerializedJob:
-        task: SerializedJob = {}
-        for k, v in self.__dict__.items():
-            if k == "tasks":
-                v = [t.serialize() for t in v]
-            elif isinstance(v, UUID):
-                v = str(v)
-            task[k] = v
-
-        return task
+    serialize = serialize_job
 
     @classmethod
     def deserialize(cls, data: Optional[SerializedJob]) -> Optional[Job]:
-        if not data:
-            return
-
-        return Job(
-            id=UUID(data["id"]),
-            name=data["name"],
-            priority=data["priority"],
-            state=JobState(data["state"]),
-            timestamp=data["timestamp"],
-            tasks=[task for t in data["tasks"] if (task := Task.deserialize(t))],
-        )
+        return deserialize_job(cls, data)
 
     @classmethod
     def from_json(cls, data: bytes) -> Optional[Job]:
@@ -77,4 +101,4 @@ class Job(Serializable["Job", SerializedJob]):
         return f"Job {self.id}"
 
     def __repr__(self) -> str:
-        return str(self.__dict__)
+        return str({name: getattr(self, name) for name in self.__slots__})
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import atexit
+import os
+import sys
+import time
+from collections import deque
+from enum import IntEnum
+from itertools import count
+from threading import Event, Lock, Thread
+from typing import Any, Optional, TextIO
+
+BUFFER_SIZE = 65_536
+FLUSH_INTERVAL = 0.1
+
+type Record = tuple[int, float, Level, str, str, tuple[Any, ...]]
+
+
+class Level(IntEnum):
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+
+class LogBuffer:
+    def __init__(
+        self,
+        size: int = BUFFER_SIZE,
+        interval: float = FLUSH_INTERVAL,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        self.level: int = Level.INFO
+        self.interval = interval
+        self.stream = stream
+        # deque appends and pops are atomic, writers never take a lock and a
+        # full buffer drops its oldest records instead of blocking
+        self._records: deque[Record] = deque(maxlen=size)
+        self._sequence = count()
+        self._flushed = 0
+        self._flush_lock = Lock()
+        self._stop = Event()
+        self._flusher: Optional[Thread] = None
+
+    def emit(
+        self, level: Level, name: str, message: str, args: tuple[Any, ...]
+    ) -> None:
+        self._records.append(
+            (next(self._sequence), time.time(), level, name, message, args)
+        )
+        if not self._flusher:
+            self._start()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            lines: list[str] = []
+            # gaps in the sequence are only overflow once the buffer was full,
+            # otherwise they come from threads appending out of order
+            full = len(self._records) == self._records.maxlen
+            while self._records:
+                try:
+                    sequence, timestamp, level, name, message, args = (
+                        self._records.popleft()
+                    )
+                except IndexError:
+                    break
+                if full and sequence > self._flushed:
+                    lines.append(f"{sequence - self._flushed} log records dropped")
+                self._flushed = max(self._flushed, sequence + 1)
+                lines.append(self._format(timestamp, level, name, message, args))
+
+            if lines:
+                stream = self.stream or sys.stdout
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+
+    def _format(
+        self,
+        timestamp: float,
+        level: Level,
+        name: str,
+        message: str,
+        args: tuple[Any, ...],
+    ) -> str:
+        # formatting happens here on the flusher, not on the logging thread
+        try:
+            text = message % args if args else message
+        except (TypeError, ValueError):
+            text = f"{message} {args}"
+        clock = time.strftime("%H:%M:%S", time.localtime(timestamp))
+        return f"{clock}.{int(timestamp % 1 * 1000):03d} {level.name:<7} {name}: {text}"
+
+    def _start(self) -> None:
+        with self._flush_lock:
+            if self._flusher:
+                return
+            self._flusher = Thread(target=self._run, name="log", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+class Logger:
+    def __init__(self, name: str, buffer: LogBuffer) -> None:
+        self.name = name
+        self.buffer = buffer
+
+    def enabled(self, level: Level) -> bool:
+        return level >= self.buffer.level
+
+    def debug(self, message: str, *args: Any) -> None:
+        if self.buffer.level <= Level.DEBUG:
+            self.buffer.emit(Level.DEBUG, self.name, message, args)
+
+    def info(self, message: str, *args: Any) -> None:
+        if self.buffer.level <= Level.INFO:
+            self.buffer.emit(Level.INFO, self.name, message, args)
+
+    def warning(self, message: str, *args: Any) -> None:
+        if self.buffer.level <= Level.WARNING:
+            self.buffer.emit(Level.WARNING, self.name, message, args)
+
+    def error(self, message: str, *args: Any) -> None:
+        if self.buffer.level <= Level.ERROR:
+            self.buffer.emit(Level.ERROR, self.name, message, args)
+
+
+BUFFER = LogBuffer()
+
+
+def get_logger(name: str) -> Logger:
+    return Logger(name, BUFFER)
+
+
+def set_level(level: Level | str) -> None:
+    BUFFER.level = level if isinstance(level, Level) else Level[level.upper()]
+
+
+if level := os.environ.get("RENDER_BOX_LOG_LEVEL"):
+    set_level(level)
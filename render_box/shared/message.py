@@ -7,6 +7,8 @@ from typing import TYPE_CHECKING, Any, Callable, DefaultDict, NamedTuple, Option
 
 import render_box.shared.task as task
 from render_box.shared.job import Job
+from render_box.shared.metrics import METRICS, UNREGISTERED, Metrics
+from render_box.shared.profiler import PROFILER, Profiler
 
 if TYPE_CHECKING:
     from render_box.server.server import ClientHandler
@@ -19,6 +21,7 @@ class MessageType(StrEnum):
 class Message(NamedTuple):
     message: str
     data: Optional[Any] = None
+    id: Optional[int] = None
 
     def as_json(self, encoding: str = "utf-8") -> bytes:
         message = self._asdict()
@@ -37,16 +40,47 @@ type MsgHandlerFunc = Callable[[ClientHandler, Message], None]
 
 
 class MessageRouter:
-    def __init__(self, prefix: str = ""):
+    def __init__(
+        self,
+        prefix: str = "",
+        metrics: Metrics = METRICS,
+        profiler: Profiler = PROFILER,
+    ):
         self.prefix = prefix
+        self.metrics = metrics
+        self.profiler = profiler
         self.routes: dict[str, list[MsgHandlerFunc]] = DefaultDict(list)
 
     def serve(self, ctx: ClientHandler, message: Message):
         routes = self.routes.get(message.message)
-        if not routes:
-            ctx.connection.send(Message("unregistered message").as_json())
-            return
-
+        # unknown names share one entry so clients can't grow the metrics
+        span = self.metrics.begin(message.message if routes else UNREGISTERED)
+        error = False
+        try:
+            if not routes:
+                ctx.send(Message("unregistered message"))
+                return
+
+            if self.profiler.session:
+                self.profiler.call(
+                    message.message,
+                    ctx.worker.name,
+                    self.dispatch,
+                    routes,
+                    ctx,
+                    message,
+                )
+            else:
+                self.dispatch(routes, ctx, message)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.metrics.end(span, error)
+
+    def dispatch(
+        self, routes: list[MsgHandlerFunc], ctx: ClientHandler, message: Message
+    ) -> None:
         for handler in routes:
             handler(ctx, message)
 
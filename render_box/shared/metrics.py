@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from threading import Lock, local
+from time import perf_counter
+from typing import Any, Optional, TypedDict
+
+# upper bounds in seconds, the last bucket catches everything slower
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+PHASES = ("db", "encode", "send")
+UNREGISTERED = "unregistered"
+
+
+class SerializedRouteMetrics(TypedDict):
+    requests: int
+    errors: int
+    in_flight: int
+    seconds: float
+    p50: Optional[float]
+    p99: Optional[float]
+    buckets: list[int]
+    phases: dict[str, float]
+
+
+class SerializedMetrics(TypedDict):
+    buckets: list[float]
+    routes: dict[str, SerializedRouteMetrics]
+
+
+class RouteMetrics:
+    __slots__ = ("requests", "errors", "in_flight", "seconds", "buckets", "phases")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.phases = [0.0] * len(PHASES)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.requests:
+            return None
+        rank = q * self.requests
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        # in the overflow bucket, reported as its lower bound like prometheus'
+        # histogram_quantile does, inf would not survive json
+        return BUCKETS[-1]
+
+    def serialize(self) -> SerializedRouteMetrics:
+        return SerializedRouteMetrics(
+            requests=self.requests,
+            errors=self.errors,
+            in_flight=self.in_flight,
+            seconds=self.seconds,
+            p50=self.quantile(0.5),
+            p99=self.quantile(0.99),
+            buckets=list(self.buckets),
+            phases=dict(zip(PHASES, self.phases)),
+        )
+
+
+class Span:
+    __slots__ = ("route", "start", "phases", "parent")
+
+    def __init__(self, route: str, parent: Optional[Span]) -> None:
+        self.route = route
+        self.start = perf_counter()
+        self.phases = [0.0] * len(PHASES)
+        self.parent = parent
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.routes: dict[str, RouteMetrics] = {}
+        self._lock = Lock()
+        self._local = local()
+
+    def begin(self, route: str) -> Span:
+        span = Span(route, getattr(self._local, "span", None))
+        self._local.span = span
+        with self._lock:
+            metrics = self.routes.get(route)
+            if not metrics:
+                metrics = self.routes[route] = RouteMetrics()
+            metrics.in_flight += 1
+
+        return span
+
+    def end(self, span: Span, error: bool = False) -> None:
+        seconds = perf_counter() - span.start
+        self._local.span = span.parent
+        with self._lock:
+            metrics = self.routes[span.route]
+            metrics.in_flight -= 1
+            metrics.requests += 1
+            metrics.errors += error
+            metrics.seconds += seconds
+            metrics.buckets[bisect_left(BUCKETS, seconds)] += 1
+            for index, phase in enumerate(span.phases):
+                metrics.phases[index] += phase
+
+    def add(self, phase: str, seconds: float) -> None:
+        # time spent outside of a served message (pushes from background
+        # threads) has no route to be charged to
+        span: Optional[Span] = getattr(self._local, "span", None)
+        if span:
+            span.phases[PHASES.index(phase)] += seconds
+
+    def serialize(self) -> SerializedMetrics:
+        with self._lock:
+            routes = {route: m.serialize() for route, m in self.routes.items()}
+
+        return SerializedMetrics(buckets=list(BUCKETS), routes=routes)
+
+    def prometheus(self, prefix: str = "render_box") -> str:
+        data = self.serialize()
+        lines: list[str] = []
+
+        def metric(name: str, kind: str, help: str) -> str:
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            return f"{prefix}_{name}"
+
+        def label(**labels: Any) -> str:
+            return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+        routes = sorted(data["routes"].items())
+        name = metric("requests_total", "counter", "Messages served per route.")
+        for route, m in routes:
+            lines.append(f"{name}{{{label(route=route)}}} {m['requests']}")
+        name = metric("errors_total", "counter", "Messages whose handler raised.")
+        for route, m in routes:
+            lines.append(f"{name}{{{label(route=route)}}} {m['errors']}")
+        name = metric("in_flight", "gauge", "Messages currently being served.")
+        for route, m in routes:
+            lines.append(f"{name}{{{label(route=route)}}} {m['in_flight']}")
+
+        name = metric("request_seconds", "histogram", "Time spent serving a message.")
+        for route, m in routes:
+            cumulative = 0
+            for bound, count in zip([*BUCKETS, "+Inf"], m["buckets"]):
+                cumulative += count
+                labels = label(route=route, le=bound)
+                lines.append(f"{name}_bucket{{{labels}}} {cumulative}")
+            lines.append(f"{name}_sum{{{label(route=route)}}} {m['seconds']}")
+            lines.append(f"{name}_count{{{label(route=route)}}} {m['requests']}")
+
+        name = metric(
+            "phase_seconds_total", "counter", "Time spent in db, encode and send."
+        )
+        for route, m in routes:
+            for phase, seconds in m["phases"].items():
+                lines.append(f"{name}{{{label(route=route, phase=phase)}}} {seconds}")
+
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
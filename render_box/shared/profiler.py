@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import io
+import time
+from threading import Event, Lock, Timer
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypedDict
+
+if TYPE_CHECKING:
+    # every router imports this module, the profilers are loaded on first use
+    import cProfile
+    import pstats
+
+DEFAULT_SECONDS = 10.0
+MAX_SECONDS = 300.0
+MAX_MESSAGES = 100_000
+
+
+def is_sort_key(sort: Any) -> bool:
+    import pstats
+
+    return any(sort == key.value for key in pstats.SortKey)
+
+
+class SerializedRouteProfile(TypedDict):
+    messages: int
+    seconds: float
+
+
+class SerializedProfile(TypedDict):
+    seconds: float
+    messages: int
+    routes: dict[str, SerializedRouteProfile]
+    stats: str
+
+
+class ProfileSession:
+    def __init__(
+        self,
+        seconds: float,
+        messages: int,
+        routes: Optional[set[str]] = None,
+        workers: Optional[set[str]] = None,
+    ) -> None:
+        self.seconds = min(seconds, MAX_SECONDS)
+        self.max_messages = min(messages, MAX_MESSAGES)
+        self.routes = routes
+        self.workers = workers
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.messages = 0
+        self.counts: dict[str, int] = {}
+        self.elapsed: dict[str, float] = {}
+        self.profile: Optional[cProfile.Profile] = None
+        self.stats: Optional[pstats.Stats] = None
+        self.error: Optional[str] = None
+        self.done = Event()
+        self._lock = Lock()
+
+    def begin(self) -> bool:
+        import cProfile
+
+        # cProfile records every thread while it is enabled, the stats cover
+        # the whole server and not just the selected routes, those only get
+        # their message counts and wall time
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler, e.g. the server started under cProfile
+            self.error = "another profiler is already running"
+            self.finish()
+            return False
+        self.profile = profile
+        return True
+
+    def wants(self, route: str, worker: str) -> bool:
+        if self.done.is_set():
+            return False
+        if self.routes is not None and route not in self.routes:
+            return False
+        return self.workers is None or worker in self.workers
+
+    def add(self, route: str, seconds: float) -> None:
+        with self._lock:
+            if self.done.is_set():
+                return
+            self.counts[route] = self.counts.get(route, 0) + 1
+            self.elapsed[route] = self.elapsed.get(route, 0.0) + seconds
+            self.messages += 1
+            if self.messages >= self.max_messages:
+                self._finish()
+
+    def finish(self) -> None:
+        with self._lock:
+            self._finish()
+
+    def _finish(self) -> None:
+        if self.done.is_set():
+            return
+        self.end = time.perf_counter()
+        if self.profile:
+            import pstats
+
+            self.profile.disable()
+            self.stats = pstats.Stats(self.profile)
+            self.profile = None
+        self.done.set()
+
+    def wait(self) -> None:
+        self.done.wait(self.seconds)
+        self.finish()
+
+    def serialize(self, sort: str = "cumulative", limit: int = 30) -> SerializedProfile:
+        import pstats
+
+        with self._lock:
+            stream = io.StringIO()
+            if self.stats:
+                pstats.Stats(stream=stream).add(self.stats).sort_stats(
+                    sort
+                ).print_stats(limit)
+            routes = {
+                route: SerializedRouteProfile(
+                    messages=self.counts[route], seconds=self.elapsed[route]
+                )
+                for route in sorted(self.counts)
+            }
+
+            return SerializedProfile(
+                seconds=(self.end or time.perf_counter()) - self.start,
+                messages=self.messages,
+                routes=routes,
+                stats=stream.getvalue(),
+            )
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.session: Optional[ProfileSession] = None
+        # kept after it ends until the next one starts, for its results
+        self.last: Optional[ProfileSession] = None
+        self._timer: Optional[Timer] = None
+        self._lock = Lock()
+
+    def start(self, session: ProfileSession) -> bool:
+        with self._lock:
+            if self.session and not self.session.done.is_set():
+                return False
+            if self._timer:
+                self._timer.cancel()
+            self.session = session
+        if not session.begin():
+            self.stop(session)
+            return False
+
+        timer = Timer(session.seconds, self.stop, (session,))
+        timer.daemon = True
+        with self._lock:
+            self.last = session
+            self._timer = timer
+        timer.start()
+        return True
+
+    def stop(self, session: ProfileSession) -> None:
+        session.finish()
+        with self._lock:
+            if self.session is session:
+                self.session = None
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+
+    def call(self, route: str, worker: str, fn: Callable[..., Any], *args: Any) -> Any:
+        session = self.session
+        if not session or not session.wants(route, worker):
+            return fn(*args)
+
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            session.add(route, time.perf_counter() - start)
+
+
+PROFILER = Profiler()
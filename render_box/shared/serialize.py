@@ -1,6 +1,15 @@
 from __future__ import annotations
 
-from typing import Any, Optional, Protocol, TypedDict
+from typing import (
+    Any,
+    Callable,
+    NamedTuple,
+    NotRequired,
+    Optional,
+    Protocol,
+    TypedDict,
+    cast,
+)
 
 
 class SerializedCommand(TypedDict):
@@ -17,6 +26,20 @@ class SerializedTask(TypedDict):
     timestamp: Optional[float]
 
 
+class SerializedFrameRange(TypedDict):
+    command: SerializedCommand
+    priority: int
+    start: int
+    end: int
+    step: int
+    next: int
+
+
+class SerializedJobTasks(TypedDict):
+    tasks: list[SerializedTask]
+    frames: Optional[SerializedFrameRange]
+
+
 class SerializedJob(TypedDict):
     id: str
     name: str
@@ -24,6 +47,10 @@ class SerializedJob(TypedDict):
     timestamp: Optional[float]
     state: str
     tasks: list[SerializedTask]
+    waiting_count: int
+    progress_count: int
+    completed_count: int
+    frames: NotRequired[SerializedFrameRange]
 
 
 class SerializedWorker(TypedDict):
@@ -34,7 +61,17 @@ class SerializedWorker(TypedDict):
     task_id: Optional[str]
 
 
+class SerializedChanges(TypedDict):
+    version: int
+    reset: bool
+    jobs: list[SerializedJob]
+    tasks: list[SerializedTask]
+    workers: list[SerializedWorker]
+
+
 class Serializable[T, S](Protocol):
+    __slots__ = ()
+
     def serialize(self) -> S: ...
     @classmethod
     def deserialize(cls, data: S) -> Optional[T]: ...
@@ -44,4 +81,75 @@ class Serializable[T, S](Protocol):
 
 
 class Command(Serializable["Command", SerializedCommand]):
+    __slots__ = ()
+
     def run(self) -> None: ...
+
+
+class Field(NamedTuple):
+    name: str
+    dump: Optional[Callable[[Any], Any]] = None
+    load: Optional[Callable[[Any], Any]] = None
+    # None is left out of the serialized form and a missing key loads as None
+    optional: bool = False
+    # loaded with data.get() so records from older peers without it still load
+    default: Any = None
+    # a load returning None rejects the whole record
+    required: bool = False
+
+
+type Dumper[T, S] = Callable[[T], S]
+type Loader[T, S] = Callable[[type[T], Optional[S]], Optional[T]]
+
+
+def make_serializers[T, S](
+    name: str, fields: tuple[Field, ...]
+) -> tuple[Dumper[T, S], Loader[T, S]]:
+    names = tuple(field.name for field in fields if not field.optional)
+    dumps: tuple[tuple[str, Callable[[Any], Any]], ...] = tuple(
+        (field.name, field.dump)
+        for field in fields
+        if field.dump is not None and not field.optional
+    )
+    optional: tuple[tuple[str, Optional[Callable[[Any], Any]]], ...] = tuple(
+        (field.name, field.dump) for field in fields if field.optional
+    )
+    loads = tuple(
+        (
+            field.name,
+            field.load,
+            field.optional or field.default is not None,
+            field.default,
+            field.required,
+        )
+        for field in fields
+    )
+
+    def serialize(self: T) -> S:
+        data = {key: getattr(self, key) for key in names}
+        for key, dump in dumps:
+            data[key] = dump(data[key])
+        for key, optional_dump in optional:
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = optional_dump(value) if optional_dump else value
+        return cast(S, data)
+
+    def deserialize(cls: type[T], data: Any) -> Optional[T]:
+        if not data:
+            return None
+        # built through the constructor so loaded records are normalized the
+        # same way as new ones
+        kwargs = {}
+        for key, load, has_default, default, required in loads:
+            value = data.get(key, default) if has_default else data[key]
+            if load:
+                value = load(value)
+            if required and value is None:
+                return None
+            kwargs[key] = value
+        return cls(**kwargs)
+
+    serialize.__qualname__ = f"{name}.serialize"
+    deserialize.__qualname__ = f"{name}.deserialize"
+    return serialize, deserialize
@@ -4,14 +4,19 @@ import json
 import time
 from enum import StrEnum
 from typing import Optional
-from uuid import UUID, uuid4
+from uuid import UUID
 
 from render_box.shared.commands import CommandManager
+from render_box.shared.utils import new_id
 
 from .serialize import (
     Command,
+    Dumper,
+    Field,
+    Loader,
     Serializable,
     SerializedTask,
+    make_serializers,
 )
 
 
@@ -19,61 +24,55 @@ class TaskState(StrEnum):
     Waiting = "waiting"
     Progress = "progress"
     Completed = "completed"
+    Failed = "failed"
+
+
+FIELDS = (
+    Field(
+        "command",
+        lambda command: command.serialize(),
+        CommandManager.deserialize,
+        required=True,
+    ),
+    Field("id"),
+    Field("job_id"),
+    Field("priority"),
+    Field("state", load=TaskState),
+    Field("timestamp"),
+)
+serialize_task: Dumper[Task, SerializedTask]
+deserialize_task: Loader[Task, SerializedTask]
+serialize_task, deserialize_task = make_serializers("Task", FIELDS)
 
 
 class Task(Serializable["Task", SerializedTask]):
+    __slots__ = tuple(field.name for field in FIELDS)
+
     def __init__(
         self,
         command: Command,
-        id: Optional[UUID] = None,
-        job_id: Optional[UUID] = None,
+        id: Optional[UUID | str] = None,
+        job_id: Optional[UUID | str] = None,
         priority: Optional[int] = None,
         state: TaskState = TaskState.Waiting,
         timestamp: Optional[float] = None,
     ) -> None:
         self.command = command
-        self.id = id or uuid4()
-        self.job_id = job_id
-        self.priority = priority or 50
+        # ids are kept in their serialized form, every consumer wants strings
+        self.id = str(id) if id else new_id()
+        self.job_id = str(job_id) if job_id else None
+        self.priority = 50 if priority is None else priority
         self.state = state
         self.timestamp = timestamp or time.time()
 
-    def run(self) -> None:
-        self.command.run()
-
-    def serialize(self) -> SerializedTask:
-        task: SerializedTask = {}
-        for k, v in self.__dict__.items():
-            if isinstance(v, Command):
-                v = v.serialize()
-            elif isinstance(v, UUID):
-                v = str(v)
-            task[k] = v
-
-        return task
+    serialize = serialize_task
 
     @classmethod
     def deserialize(cls, data: Optional[SerializedTask]) -> Optional[Task]:
-        if not data:
-            return
+        return deserialize_task(cls, data)
 
-        command_type = CommandManager.get_command(data["command"]["name"])
-
-        if not command_type:
-            return
-
-        command = command_type.deserialize(data["command"])
-        if not command:
-            return
-
-        return Task(
-            id=UUID(data["id"]),
-            job_id=UUID(data["job_id"]),
-            priority=data["priority"],
-            command=command,
-            state=TaskState(data["state"]),
-            timestamp=data["timestamp"],
-        )
+    def run(self) -> None:
+        self.command.run()
 
     @classmethod
     def from_json(cls, data: bytes) -> Optional[Task]:
@@ -1,9 +1,37 @@
+import math
+import os
+import re
 from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+ID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
 
 
 def format_timestamp(timestamp: float, format: str = r"%d-%m-%Y, %H:%M:%S") -> str:
-    return datetime.fromtimestamp(timestamp).strftime(format)
+    return _format_seconds(math.floor(timestamp), format)
+
+
+@lru_cache(maxsize=4096)
+def _format_seconds(seconds: int, format: str) -> str:
+    # rows created together share the same second, strftime is the slow part
+    return datetime.fromtimestamp(seconds).strftime(format)
 
 
 def class_name_from_repr(name: str):
     return name.split(".")[-1].split(" ")[0]
+
+
+def new_id() -> str:
+    # random (version 4) uuid in its canonical string form, without building
+    # and formatting a UUID object
+    data = bytearray(os.urandom(16))
+    data[6] = data[6] & 0x0F | 0x40
+    data[8] = data[8] & 0x3F | 0x80
+    h = data.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def is_id(value: Any) -> bool:
+    # ids from the wire, the canonical lowercase form new_id() produces
+    return isinstance(value, str) and bool(ID_PATTERN.fullmatch(value))
@@ -5,7 +5,17 @@ from enum import StrEnum
 from time import time
 from typing import Optional
 
-from render_box.shared.serialize import Serializable, SerializedWorker
+from render_box.shared.log import get_logger
+from render_box.shared.serialize import (
+    Dumper,
+    Field,
+    Loader,
+    Serializable,
+    SerializedWorker,
+    make_serializers,
+)
+
+log = get_logger("worker")
 
 
 class WorkerState(StrEnum):
@@ -14,7 +24,21 @@ class WorkerState(StrEnum):
     Offline = "offline"
 
 
+FIELDS = (
+    Field("id"),
+    Field("name"),
+    Field("timestamp"),
+    Field("task_id"),
+    Field("state", load=WorkerState),
+)
+serialize_worker: Dumper[Worker, SerializedWorker]
+deserialize_worker: Loader[Worker, SerializedWorker]
+serialize_worker, deserialize_worker = make_serializers("Worker", FIELDS)
+
+
 class Worker(Serializable["Worker", SerializedWorker]):
+    __slots__ = tuple(field.name for field in FIELDS)
+
     def __init__(
         self,
         id: Optional[int],
@@ -29,20 +53,11 @@ class Worker(Serializable["Worker", SerializedWorker]):
         self.task_id = task_id
         self.state = state
 
-    def serialize(self) -> SerializedWorker:
-        return self.__dict__
+    serialize = serialize_worker
 
     @classmethod
     def deserialize(cls, data: Optional[SerializedWorker]) -> Optional[Worker]:
-        if not data:
-            return
-        return Worker(
-            id=data["id"],
-            name=data["name"],
-            task_id=data["task_id"],
-            state=WorkerState(data["state"]),
-            timestamp=data["timestamp"],
-        )
+        return deserialize_worker(cls, data)
 
     def as_json(self) -> bytes:
         return json.dumps(self.serialize()).encode("utf-8")
@@ -52,6 +67,6 @@ class Worker(Serializable["Worker", SerializedWorker]):
         try:
             worker = json.loads(data.decode("utf-8"))
         except Exception:
-            print("error converting from json to worker")
+            log.warning("error converting from json to worker")
             return
         return cls.deserialize(worker)
@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from render_box.server import db
+from render_box.server.job_manager import JobManager
+from render_box.server.leases import LeaseWheel
+from render_box.server.sql import SQLoader
+from render_box.shared.codec import JSON_CODEC, Codec
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeSocket:
+    def getpeername(self) -> tuple[str, int]:
+        return ("127.0.0.1", 1)
+
+
+class FakeConnection:
+    def __init__(self, broken: bool = False) -> None:
+        self.socket = FakeSocket()
+        self.codec: Codec = JSON_CODEC
+        self.compress_threshold: Optional[int] = None
+        self.broken = broken
+        self.frames: list[bytes] = []
+
+    def send_frame(self, data: bytes) -> None:
+        if self.broken:
+            raise ConnectionResetError("peer gone")
+        self.frames.append(data)
+
+
+def query_plan(name: str) -> list[str]:
+    query = SQLoader().load(name)
+    assert query
+    params = (None,) * query.count("?")
+    with db.DBConnection() as conn:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+
+    return [detail for _, _, _, detail in rows]
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def database(tmp_path: Path):
+    db.configure(tmp_path / "test.db")
+    db.init_db()
+    yield
+    db.pool.close()
+
+
+@pytest.fixture
+def job_manager(database, clock: Clock, request: pytest.FixtureRequest) -> JobManager:
+    # indirect parametrization passes the lease timeout in seconds
+    manager = JobManager()
+    manager.leases = LeaseWheel(timeout=getattr(request, "param", 30), clock=clock)
+    return manager
@@ -0,0 +1,111 @@
+import asyncio
+import socket
+from collections.abc import Iterator
+from threading import Thread
+
+import pytest
+
+from render_box.server.async_server import create_server
+from render_box.shared import commands
+from render_box.shared.codec import BINARY_CODEC
+from render_box.shared.connection import AsyncConnection, Connection
+from render_box.shared.exceptions import ConnectionClosedException
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task
+
+
+@pytest.fixture
+def port(database) -> Iterator[int]:
+    loop = asyncio.new_event_loop()
+    # port 0 binds an ephemeral port, tests never collide with a real server
+    server, job_manager = loop.run_until_complete(create_server(("localhost", 0), 2))
+    thread = Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+
+    async def shutdown() -> None:
+        # waits for the handlers of closed clients to finish as well
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+    job_manager.stop_reaper()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_round_trip(port: int):
+    connection = Connection.client_connection()
+    connection.connect(("localhost", port))
+    assert connection.negotiate() is BINARY_CODEC
+
+    job = Job("async")
+    job.add_task(Task(commands.TestCommand(0)))
+    reply = connection.send_recv(Message("jobs.create", job.serialize()))
+    assert reply.message == "job_created"
+
+    reply = connection.send_recv(Message("tasks.next", {"count": 2}))
+    assert reply.message == "tasks"
+    assert [task["id"] for task in reply.data] == [job.tasks[0].id]
+    assert reply.data[0]["state"] == "progress"
+
+    reply = connection.send_recv(Message("tasks.complete", job.tasks[0].id))
+    assert reply.message == "ok"
+    assert connection.send_recv(Message("tasks.next")).data is None
+
+    connection.send(Message("connection.close"))
+    connection.close()
+
+
+@pytest.fixture
+def loop() -> Iterator[asyncio.AbstractEventLoop]:
+    loop = asyncio.new_event_loop()
+    thread = Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def open_connection(
+    loop: asyncio.AbstractEventLoop, sock: socket.socket
+) -> AsyncConnection:
+    async def open() -> AsyncConnection:
+        reader, writer = await asyncio.open_connection(sock=sock)
+        return AsyncConnection(reader, writer, loop)
+
+    return asyncio.run_coroutine_threadsafe(open(), loop).result(5)
+
+
+def test_pushes_fail_once_the_connection_closes(loop: asyncio.AbstractEventLoop):
+    client, server = socket.socketpair()
+    connection = open_connection(loop, server)
+    peer = Connection(client)
+
+    connection.send(Message("pushed"))
+    assert peer.recv().message == "pushed"
+
+    connection.close()
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(5)
+    with pytest.raises(ConnectionClosedException):
+        connection.send(Message("late"))
+    client.close()
+
+
+def test_pushes_to_a_peer_that_stops_reading_time_out(
+    loop: asyncio.AbstractEventLoop,
+):
+    client, server = socket.socketpair()
+    connection = open_connection(loop, server)
+    connection.send_timeout = 0.2
+
+    # the peer never reads, the kernel and transport buffers fill up
+    with pytest.raises(ConnectionClosedException):
+        for _ in range(64):
+            connection.send_frame(b"x" * 1024 * 1024)
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(5)
+    assert connection.writer.is_closing()
+    client.close()
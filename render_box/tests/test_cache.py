@@ -0,0 +1,84 @@
+import pytest
+
+from render_box.server import db
+from render_box.server.cache import ReadCache
+from render_box.server.job_manager import JobManager
+from render_box.shared import commands
+from render_box.shared.codec import CODECS, EncodedData
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task, TaskState
+
+
+@pytest.mark.parametrize("codec", CODECS.values(), ids=CODECS.keys())
+def test_encoded_data_matches_plain_encoding(codec):
+    data = [{"id": "a", "state": "waiting"}, {"id": "b", "state": None}]
+    plain = codec.encode(Message("all_jobs", data, 7))
+    spliced = codec.encode(Message("all_jobs", EncodedData(data), 7))
+
+    assert spliced == plain
+    assert codec.decode(spliced) == Message("all_jobs", data, 7)
+
+
+def test_reads_hit_until_a_write_invalidates(job_manager: JobManager):
+    job = Job("cached")
+    job.add_task(Task(commands.TestCommand(0)))
+    job_manager.add_job(job)
+    job_id = str(job.id)
+
+    first = job_manager.encoded_tasks(job_id)
+    assert job_manager.encoded_tasks(job_id) is first
+    assert job_manager.encoded_jobs() is job_manager.encoded_jobs()
+
+    task = job.tasks[0]
+    task.state = TaskState.Completed
+    job_manager.update_task(task)
+
+    refreshed = job_manager.encoded_tasks(job_id)
+    assert refreshed is not first
+    assert refreshed.data[0]["state"] == "completed"
+    assert job_manager.cache.stats() == {
+        "tasks": {"hits": 1, "misses": 2},
+        "jobs": {"hits": 1, "misses": 1},
+    }
+
+
+def test_load_racing_an_invalidation_is_not_kept():
+    cache = ReadCache()
+
+    def load():
+        cache.invalidate(("jobs",))
+        return ["stale"]
+
+    assert cache.get(("jobs",), load).data == ["stale"]
+    assert cache.get(("jobs",), lambda: ["fresh"]).data == ["fresh"]
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ReadCache(max_entries=2)
+    a = cache.get(("tasks", "a"), lambda: ["a"])
+    cache.get(("tasks", "b"), lambda: ["b"])
+    assert cache.get(("tasks", "a"), lambda: ["a"]) is a
+
+    cache.get(("tasks", "c"), lambda: ["c"])
+    assert len(cache) == 2
+    assert cache.get(("tasks", "a"), lambda: ["a"]) is a
+    assert cache.stats()["tasks"] == {"hits": 2, "misses": 3}
+    cache.get(("tasks", "b"), lambda: ["b"])
+    assert cache.stats()["tasks"] == {"hits": 2, "misses": 4}
+
+
+def test_completed_job_entries_are_dropped(job_manager: JobManager):
+    job = Job("done")
+    job.add_task(Task(commands.TestCommand(0)))
+    job_manager.add_job(job)
+    job_id = str(job.id)
+    job_manager.encoded_tasks(job_id)
+    job_manager.encoded_job_tasks(job_id)
+
+    task = job.tasks[0]
+    task.state = TaskState.Completed
+    db.update_task(task)
+    job_manager.cleanup_jobs(task)
+
+    assert len(job_manager.cache) == 0
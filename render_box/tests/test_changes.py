@@ -0,0 +1,91 @@
+import pytest
+
+from render_box.server import db
+from render_box.server.changes import ChangeFeed
+from render_box.server.job_manager import JobManager
+from render_box.shared import commands
+from render_box.shared.job import Job
+from render_box.shared.serialize import SerializedChanges
+from render_box.shared.task import Task
+
+
+def test_changes_since_keeps_latest_row_per_key():
+    feed = ChangeFeed()
+    feed.publish("tasks", [("a", {"id": "a", "state": "waiting"})])
+    since = feed.version
+    feed.publish("tasks", [("b", {"id": "b", "state": "waiting"})])
+    feed.publish("tasks", [("a", {"id": "a", "state": "progress"})])
+    feed.publish("workers", [("render-1", {"name": "render-1"})])
+
+    changes = feed.changes_since(since)
+
+    assert changes["version"] == 4
+    assert not changes["reset"]
+    assert changes["tasks"] == [
+        {"id": "b", "state": "waiting"},
+        {"id": "a", "state": "progress"},
+    ]
+    assert changes["workers"] == [{"name": "render-1"}]
+    assert changes["jobs"] == []
+
+
+def test_changes_since_truncated_log_requests_reset():
+    feed = ChangeFeed(size=2)
+    feed.publish("jobs", [(str(i), {"id": str(i)}) for i in range(5)])
+
+    assert feed.changes_since(0)["reset"]
+    assert not feed.changes_since(3)["reset"]
+    assert feed.changes_since(99)["reset"]
+
+
+def test_flush_pushes_each_change_once():
+    feed = ChangeFeed()
+    received: list[SerializedChanges] = []
+    feed.subscribe(received.append, 0)
+    feed.close()
+
+    feed.publish("jobs", [("a", {"id": "a"})])
+    feed.flush()
+    feed.flush()
+
+    assert [c["jobs"] for c in received] == [[{"id": "a"}]]
+
+
+def test_skipped_rows_reset_older_subscribers():
+    feed = ChangeFeed()
+    feed.publish("jobs", [("a", {"id": "a"})])
+    before = feed.version
+    feed.skip()
+
+    assert feed.changes_since(before)["reset"]
+    assert not feed.changes_since(feed.version)["reset"]
+
+
+def test_job_rows_are_read_only_for_subscribers(
+    job_manager: JobManager, monkeypatch: pytest.MonkeyPatch
+):
+    job = Job("quiet")
+    job.add_task(Task(commands.TestCommand(0)))
+    job_manager.add_job(job)
+    jobs = job_manager.encoded_jobs()
+
+    reads: list[str] = []
+    select_job_by_id = db.select_job_by_id
+    monkeypatch.setattr(
+        db, "select_job_by_id", lambda id: reads.append(id) or select_job_by_id(id)
+    )
+    task = job.tasks[0]
+    task.priority = 10
+    job_manager.update_task(task)
+    assert reads == []
+    # the cache does not depend on the rows being read
+    assert job_manager.encoded_jobs() is not jobs
+
+    received: list[SerializedChanges] = []
+    job_manager.changes.subscribe(received.append, job_manager.changes.version)
+    job_manager.changes.close()
+    task.priority = 20
+    job_manager.update_task(task)
+    job_manager.changes.flush()
+    assert reads == [str(job.id)]
+    assert [j["id"] for j in received[0]["jobs"]] == [str(job.id)]
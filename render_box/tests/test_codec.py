@@ -0,0 +1,111 @@
+import json
+import socket
+from threading import Thread
+from typing import Any
+
+import pytest
+
+from render_box.server.job_manager import JobManager
+from render_box.server.server import ClientHandler, create_router
+from render_box.shared import commands
+from render_box.shared.codec import BINARY_CODEC, JSON_CODEC, UUID_TAG
+from render_box.shared.connection import Connection
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task
+from render_box.shared.utils import new_id
+from render_box.shared.worker import Worker
+from render_box.tests.conftest import FakeConnection
+
+
+def round_trip(data: Any) -> Any:
+    message = Message("test", data, 7)
+    decoded = BINARY_CODEC.decode(BINARY_CODEC.encode(message))
+    assert decoded.message == "test" and decoded.id == 7
+    return decoded.data
+
+
+def test_records_round_trip():
+    job = Job("job")
+    job.add_task(Task(commands.TestCommand(1)))
+    data = job.serialize()
+    data.pop("frames", None)
+    records = [
+        data,
+        data["tasks"][0],
+        data["tasks"][0]["command"],
+        dict(Worker(None, "worker").serialize()),
+    ]
+
+    for record in records:
+        assert round_trip(record) == json.loads(json.dumps(record))
+    assert round_trip(records) == json.loads(json.dumps(records))
+
+
+def test_uuid_packing():
+    lower = new_id()
+    upper = lower.upper()
+
+    encoded = BINARY_CODEC.encode_data(lower)
+    assert encoded == UUID_TAG + bytes.fromhex(lower.replace("-", ""))
+    assert round_trip(lower) == lower
+    # only the canonical lowercase form is packed, anything else must come
+    # back exactly as it was sent
+    assert UUID_TAG not in BINARY_CODEC.encode_data(upper)
+    assert round_trip(upper) == upper
+    assert round_trip(lower[:-1] + "g") == lower[:-1] + "g"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        2**63 - 1,
+        -(2**63),
+        2**64,
+        -(10**40),
+        [[1, [2.5, [None, True]]], [], ["a", []]],
+        {"nested": {"list": [[1], [2, {"x": False}]]}},
+    ],
+)
+def test_values_round_trip(data: Any):
+    assert round_trip(data) == data
+
+
+def test_non_string_keys_match_json():
+    data = {1: "one", 2.5: "float", None: "none", False: "false"}
+    assert round_trip(data) == json.loads(json.dumps(data))
+    with pytest.raises(TypeError):
+        BINARY_CODEC.encode_data({(1, 2): "tuple"})
+
+
+def test_hello_falls_back_to_json(job_manager: JobManager):
+    connection = FakeConnection()
+    handler = ClientHandler(connection, job_manager, create_router())
+
+    handler.handle_message(Message("connection.hello", {"codecs": ["msgpack"]}))
+    reply = JSON_CODEC.decode(connection.frames[-1])
+    assert reply.data == {"codec": "json", "compression": None}
+    assert connection.codec is JSON_CODEC
+
+    handler.handle_message(Message("connection.hello", {"codecs": ["json", "binary"]}))
+    assert JSON_CODEC.decode(connection.frames[-1]).data["codec"] == "json"
+    assert connection.codec is JSON_CODEC
+
+
+def test_negotiate_with_peer_without_hello():
+    client, server = socket.socketpair()
+    peer = Connection(server)
+
+    def reply() -> None:
+        # a server that predates codec negotiation
+        peer.recv()
+        peer.send(Message("error", "unknown message"))
+
+    thread = Thread(target=reply)
+    thread.start()
+    connection = Connection(client)
+    assert connection.negotiate() is JSON_CODEC
+    assert connection.compress_threshold is None
+    thread.join()
+    client.close()
+    server.close()
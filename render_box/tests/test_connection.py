@@ -0,0 +1,171 @@
+import socket
+from collections.abc import Callable, Iterator
+from threading import Thread
+
+import pytest
+
+from render_box.shared.codec import JSON_CODEC
+from render_box.shared.connection import (
+    COMPRESS_THRESHOLD,
+    HEADER_SIZE,
+    MAX_FRAME_SIZE,
+    Connection,
+    PipelinedConnection,
+    pack_frame,
+    unpack_header,
+)
+from render_box.shared.exceptions import (
+    ConnectionClosedException,
+    FrameTooLargeException,
+)
+from render_box.shared.message import Message
+
+
+@pytest.fixture
+def pair() -> Iterator[tuple[Connection, socket.socket]]:
+    client, server = socket.socketpair()
+    yield Connection(client, max_frame_size=1024), server
+    client.close()
+    server.close()
+
+
+def frame(message: Message) -> bytes:
+    data = JSON_CODEC.encode(message)
+    return len(data).to_bytes(HEADER_SIZE, "big") + data
+
+
+class TrickleSocket:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    def recv_into(self, view: memoryview) -> int:
+        # one byte per read, the header included
+        if not self.data or not len(view):
+            return 0
+        view[0] = self.data[0]
+        self.data = self.data[1:]
+        return 1
+
+
+def test_frame_split_across_reads():
+    data = frame(Message("split", {"x": "y" * 100}, 3))
+    data += frame(Message("next"))
+    connection = Connection(TrickleSocket(data))  # type: ignore[arg-type]
+
+    assert connection.recv() == Message("split", {"x": "y" * 100}, 3)
+    assert connection.recv().message == "next"
+    with pytest.raises(ConnectionClosedException):
+        connection.recv()
+
+
+def test_peer_closes_mid_frame(pair: tuple[Connection, socket.socket]):
+    connection, peer = pair
+    data = frame(Message("cut", "data"))
+    peer.sendall(data[: len(data) // 2])
+    peer.close()
+
+    with pytest.raises(ConnectionClosedException):
+        connection.recv()
+
+
+def test_peer_closes_mid_header(pair: tuple[Connection, socket.socket]):
+    connection, peer = pair
+    peer.sendall(b"\x00\x00")
+    peer.close()
+
+    with pytest.raises(ConnectionClosedException):
+        connection.recv()
+
+
+def test_oversized_header_is_rejected(pair: tuple[Connection, socket.socket]):
+    connection, peer = pair
+    peer.sendall((1025).to_bytes(HEADER_SIZE, "big"))
+
+    # rejected from the header alone, before any body is buffered
+    with pytest.raises(FrameTooLargeException):
+        connection.recv()
+    with pytest.raises(FrameTooLargeException):
+        connection.send_frame(b"x" * 1025)
+
+
+def serve(
+    peer: Connection, count: int, reorder: Callable[[list[Message]], list[Message]]
+) -> Thread:
+    def run() -> None:
+        requests = [peer.recv() for _ in range(count)]
+        for request in reorder(requests):
+            peer.send(Message("reply", request.data, request.id))
+
+    thread = Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_pipelined_replies_out_of_order():
+    client, server = socket.socketpair()
+    connection = PipelinedConnection(Connection(client))
+    thread = serve(Connection(server), 3, lambda requests: requests[::-1])
+
+    futures = [connection.request(Message("echo", i)) for i in range(3)]
+    assert [future.result(5).data for future in futures] == [0, 1, 2]
+    thread.join()
+    connection.close()
+    server.close()
+
+
+def test_pipelined_reader_dying_fails_pending():
+    client, server = socket.socketpair()
+    connection = PipelinedConnection(Connection(client))
+    peer = Connection(server)
+    received: list[Message] = []
+
+    def on_message(message: Message) -> None:
+        received.append(message)
+        raise RuntimeError("handler bug")
+
+    connection.on_message = on_message
+    # a failing handler must not stop the reader
+    peer.send(Message("pushed"))
+    thread = serve(peer, 1, lambda requests: requests)
+    assert connection.send_recv(Message("echo", 1), 5).data == 1
+    thread.join()
+    assert [message.message for message in received] == ["pushed"]
+
+    pending = connection.request(Message("never answered"))
+    peer.recv()
+    server.close()
+    with pytest.raises(ConnectionClosedException):
+        pending.result(5)
+    with pytest.raises(ConnectionClosedException):
+        connection.request(Message("late")).result(5)
+    connection.close()
+
+
+@pytest.mark.parametrize("size, compressed", [(100, False), (64 * 1024, True)])
+def test_compressed_frames_round_trip(
+    pair: tuple[Connection, socket.socket], size: int, compressed: bool
+):
+    connection, peer = pair
+    connection.max_frame_size = MAX_FRAME_SIZE
+    connection.compress_threshold = COMPRESS_THRESHOLD
+    receiver = Connection(peer)
+
+    message = Message("payload", "x" * size, 9)
+    connection.send(message)
+    header = peer.recv(HEADER_SIZE, socket.MSG_PEEK)
+    assert unpack_header(header)[1] is compressed
+    assert receiver.recv() == message
+
+
+def test_oversized_decompressed_frame_is_rejected(
+    pair: tuple[Connection, socket.socket],
+):
+    connection, peer = pair
+    # a small frame on the wire that inflates past the limit
+    header, body = pack_frame(b"x" * 4096, COMPRESS_THRESHOLD // 16)
+    assert unpack_header(header) == (len(body), True)
+    assert len(body) < connection.max_frame_size
+    peer.sendall(header + body)
+
+    with pytest.raises(FrameTooLargeException):
+        connection.recv()
@@ -0,0 +1,75 @@
+import pytest
+
+from render_box.server import db
+from render_box.shared import commands
+from render_box.shared.job import Job, JobState
+from render_box.shared.task import Task, TaskState
+
+pytestmark = pytest.mark.usefixtures("database")
+
+
+def counters(job: Job) -> tuple[int, int, int]:
+    ser_job = db.select_job_by_id(str(job.id))
+    assert ser_job
+    return (
+        ser_job["waiting_count"],
+        ser_job["progress_count"],
+        ser_job["completed_count"],
+    )
+
+
+def test_job_counters_follow_task_states():
+    job = Job("counted")
+    for i in range(3):
+        job.add_task(Task(commands.TestCommand(i)))
+    db.insert_job(job)
+    assert counters(job) == (3, 0, 0)
+
+    first, second, _ = job.tasks
+    assert db.start_task(str(first.id))
+    assert db.start_task(str(second.id))
+    assert counters(job) == (1, 2, 0)
+
+    first.state = TaskState.Completed
+    db.update_task(first)
+    assert counters(job) == (1, 1, 1)
+    assert not db.cleanup_completed_jobs(str(first.id))
+
+    second.state = TaskState.Waiting
+    db.update_task(second)
+    assert counters(job) == (2, 0, 1)
+
+
+def test_job_completes_once_no_task_is_left():
+    job = Job("completed")
+    job.add_task(Task(commands.TestCommand(0)))
+    db.insert_job(job)
+    (task,) = job.tasks
+
+    assert db.start_task(str(task.id))
+    assert not db.cleanup_completed_jobs(str(task.id))
+    task.state = TaskState.Completed
+    db.update_task(task)
+
+    assert db.cleanup_completed_jobs(str(task.id))
+    assert not db.cleanup_completed_jobs(str(task.id))
+    ser_job = db.select_job_by_id(str(job.id))
+    assert ser_job and ser_job["state"] == JobState.Completed
+
+
+def test_job_counters_are_added_to_existing_databases():
+    job = Job("migrated")
+    for i in range(2):
+        job.add_task(Task(commands.TestCommand(i)))
+    db.insert_job(job)
+    with db.DBConnection() as conn:
+        query = "SELECT name FROM sqlite_master WHERE type = 'trigger';"
+        for (trigger,) in conn.execute(query).fetchall():
+            conn.execute(f"DROP TRIGGER {trigger};")
+        for column in db.JOB_COUNTERS:
+            conn.execute(f"ALTER TABLE jobs DROP COLUMN {column};")
+        conn.commit()
+
+    db.init_db()
+
+    assert counters(job) == (2, 0, 0)
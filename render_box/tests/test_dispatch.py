@@ -0,0 +1,99 @@
+from render_box.client.worker import report_task
+from render_box.server.job_manager import JobManager
+from render_box.server.routes.tasks import MAX_TASKS_PER_REQUEST
+from render_box.server.server import ClientHandler, create_router
+from render_box.shared import commands
+from render_box.shared.codec import JSON_CODEC
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task, TaskState
+from render_box.tests.conftest import FakeConnection
+
+
+def handler(job_manager: JobManager, broken: bool = False) -> ClientHandler:
+    return ClientHandler(FakeConnection(broken), job_manager, create_router())
+
+
+def test_failed_push_leaves_one_owner_and_one_lease(job_manager: JobManager):
+    job = Job("pushed")
+    job.add_task(Task(commands.TestCommand(0)))
+    job_manager.add_job(job)
+    task_id = str(job.tasks[0].id)
+
+    broken = handler(job_manager, broken=True)
+    job_manager.subscribe(broken.push_task)
+    assert broken.tasks == {}
+    assert broken.jobs == {}
+    assert len(job_manager.leases) == 0
+    states = {t["id"]: t["state"] for t in job_manager.get_all_tasks(str(job.id))}
+    assert states[task_id] == TaskState.Waiting
+
+    working = handler(job_manager)
+    job_manager.subscribe(working.push_task)
+    assert list(working.tasks) == [task_id]
+    assert len(job_manager.leases) == 1
+
+    # the broken handler going away must not touch the new owner's lease
+    broken.disconnect()
+    broken.renew_leases([task_id])
+    assert len(job_manager.leases) == 1
+    assert job_manager.reap_leases() == 0
+    working.complete_task(task_id)
+    assert len(job_manager.leases) == 0
+
+
+def test_dispatch_without_subscribers_keeps_tasks(job_manager: JobManager):
+    job = Job("waiting")
+    job.add_task(Task(commands.TestCommand(0)))
+    job_manager.add_job(job)
+
+    job_manager.dispatch()
+
+    states = [t["state"] for t in job_manager.get_all_tasks(str(job.id))]
+    assert states == [TaskState.Waiting]
+
+
+def test_requested_task_count_is_checked(job_manager: JobManager):
+    job = Job("many")
+    for i in range(MAX_TASKS_PER_REQUEST + 5):
+        job.add_task(Task(commands.TestCommand(i)))
+    job_manager.add_job(job)
+    connection = FakeConnection()
+    client = ClientHandler(connection, job_manager, create_router())
+
+    client.handle_message(Message("tasks.next", {"count": "all"}))
+    reply = JSON_CODEC.decode(connection.frames[-1])
+    assert reply == Message("tasks_rejected", {"error": "invalid task count"})
+    assert client.tasks == {}
+
+    client.handle_message(Message("tasks.next", {"count": 10**9}))
+    reply = JSON_CODEC.decode(connection.frames[-1])
+    assert len(reply.data) == MAX_TASKS_PER_REQUEST
+
+
+class WorkerConnection:
+    def __init__(self, handler: ClientHandler) -> None:
+        self.handler = handler
+
+    def send_recv(self, message: Message) -> Message:
+        self.handler.handle_message(message)
+        return Message("ok")
+
+
+def test_failed_task_is_reported_as_failed(job_manager: JobManager):
+    job = Job("failing")
+    job.add_task(Task(commands.TestCommand(0)))
+    job.add_task(Task(commands.TestCommand(0)))
+    job_manager.add_job(job)
+    failed, completed = (str(task.id) for task in job.tasks)
+
+    server = handler(job_manager)
+    server.assign_tasks(job_manager.pop_tasks(2))
+    connection = WorkerConnection(server)
+    report_task(connection, failed, RuntimeError("render crashed"))
+    report_task(connection, completed, None)
+
+    states = {t["id"]: t["state"] for t in job_manager.get_all_tasks(str(job.id))}
+    assert states == {failed: TaskState.Failed, completed: TaskState.Completed}
+    assert server.tasks == {}
+    assert len(job_manager.leases) == 0
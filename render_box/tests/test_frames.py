@@ -0,0 +1,74 @@
+from render_box.server import db
+from render_box.server.job_manager import JobManager
+from render_box.server.server import ClientHandler, create_router
+from render_box.shared import commands
+from render_box.shared.codec import JSON_CODEC
+from render_box.shared.frames import FrameRange
+from render_box.shared.job import Job, JobState
+from render_box.shared.message import Message
+from render_box.shared.task import TaskState
+from render_box.tests.conftest import FakeConnection
+
+
+def frame_job(start: int, end: int, step: int = 1) -> Job:
+    return Job("frames", frames=FrameRange(commands.TestCommand(0), start, end, step))
+
+
+def test_frames_are_materialized_on_dispatch(job_manager: JobManager):
+    job = frame_job(1, 10, 3)
+    job_manager.add_job(job)
+
+    assert job_manager.get_all_tasks(str(job.id)) == []
+    ser_job = db.select_job_by_id(str(job.id))
+    assert ser_job and ser_job["waiting_count"] == 4
+
+    popped = job_manager.pop_tasks(10)
+    frames = [task.command.frame for task, _ in popped]
+    assert frames == [1, 4, 7, 10]
+    assert all(task.state == TaskState.Progress for task, _ in popped)
+
+    job_tasks = job_manager.get_job_tasks(str(job.id))
+    assert len(job_tasks["tasks"]) == 4
+    assert job_tasks["frames"] is None
+
+    for task, _ in popped:
+        task.state = TaskState.Completed
+        job_manager.update_task(task)
+        job_manager.cleanup_jobs(task)
+    ser_job = db.select_job_by_id(str(job.id))
+    assert ser_job and ser_job["state"] == JobState.Completed
+
+
+def test_remaining_frames_are_reported_as_a_range(job_manager: JobManager):
+    job = frame_job(0, 99_999)
+    job_manager.add_job(job)
+    job_manager.pop_tasks(2)
+
+    job_tasks = job_manager.get_job_tasks(str(job.id))
+    assert len(job_tasks["tasks"]) == 2
+    frames = job_tasks["frames"]
+    assert frames and (frames["next"], frames["end"]) == (2, 99_999)
+
+
+def test_frames_survive_a_restart(job_manager: JobManager):
+    job = frame_job(1, 3)
+    job_manager.add_job(job)
+    job_manager.pop_task()
+
+    restarted = JobManager()
+    frames = [task.command.frame for task, _ in restarted.pop_tasks(10)]
+    assert frames == [2, 3]
+
+
+def test_job_with_non_uuid_id_is_rejected(job_manager: JobManager):
+    connection = FakeConnection()
+    handler = ClientHandler(connection, job_manager, create_router())
+    data = frame_job(1, 10).serialize()
+    data["id"] = "not-a-uuid"
+
+    handler.handle_message(Message("jobs.create", data, 1))
+
+    reply = JSON_CODEC.decode(connection.frames[-1])
+    assert reply.message == "job_rejected"
+    assert job_manager.get_all_jobs() == []
+    assert job_manager.pop_tasks(1) == []
@@ -0,0 +1,110 @@
+import pytest
+
+from render_box.server import db
+from render_box.server.job_manager import JobManager
+from render_box.server.leases import LeaseWheel
+from render_box.server.server import ClientHandler, create_router
+from render_box.shared import commands
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task, TaskState
+from render_box.shared.worker import WorkerState
+from render_box.tests.conftest import Clock, FakeConnection, query_plan
+
+
+def test_leases_expire_after_timeout(clock: Clock):
+    leases = LeaseWheel[str](timeout=30, clock=clock)
+    leases.grant("a", "worker")
+    leases.grant("b", "worker")
+
+    clock.now += 29
+    assert leases.expire() == []
+    assert leases.renew("a", "worker")
+    assert not leases.renew("a", "other")
+
+    clock.now += 1
+    assert leases.expire() == [("b", "worker")]
+    clock.now += 100
+    assert leases.expire() == [("a", "worker")]
+    assert len(leases) == 0
+
+
+def test_released_leases_do_not_expire(clock: Clock):
+    leases = LeaseWheel[str](timeout=5, clock=clock)
+    for i in range(1000):
+        leases.grant(str(i), "worker")
+    for i in range(0, 1000, 2):
+        leases.release(str(i))
+
+    clock.now += 5
+    expired = leases.expire()
+
+    assert sorted(int(key) for key, _ in expired) == list(range(1, 1000, 2))
+
+
+def test_expired_tasks_are_requeued(job_manager: JobManager, clock: Clock):
+    job = Job("leased")
+    for i in range(3):
+        job.add_task(Task(commands.TestCommand(i)))
+    job_manager.add_job(job)
+
+    revoked: list[str] = []
+    popped = job_manager.pop_tasks(3)
+    for task, _ in popped:
+        job_manager.leases.grant(str(task.id), revoked.extend)
+    kept = str(popped[0][0].id)
+
+    clock.now += 20
+    job_manager.leases.renew(kept, revoked.extend)
+    clock.now += 10
+    assert job_manager.reap_leases() == 2
+
+    assert sorted(revoked) == sorted(str(task.id) for task, _ in popped[1:])
+    states = {t["id"]: t["state"] for t in job_manager.get_all_tasks(str(job.id))}
+    assert states[kept] == TaskState.Progress
+    assert [states[task_id] for task_id in revoked] == [TaskState.Waiting] * 2
+    assert len(job_manager.pop_tasks(3)) == 2
+
+
+def test_worker_goes_idle_once_every_lease_expired(
+    job_manager: JobManager, clock: Clock
+):
+    job = Job("revoked")
+    for i in range(2):
+        job.add_task(Task(commands.TestCommand(i)))
+    job_manager.add_job(job)
+    handler = ClientHandler(FakeConnection(), job_manager, create_router())
+    handler.handle_message(Message("tasks.next", {"count": 2}))
+    assert handler.worker.state == WorkerState.Working
+
+    clock.now += 15
+    first = str(job.tasks[0].id)
+    handler.renew_leases([first])
+    clock.now += 15
+    assert job_manager.reap_leases() == 1
+    assert handler.worker.state == WorkerState.Working
+    assert handler.worker.task_id == first
+
+    clock.now += 30
+    assert job_manager.reap_leases() == 1
+    assert handler.worker.state == WorkerState.Idle
+    assert handler.worker.task_id is None
+
+
+@pytest.mark.usefixtures("database")
+def test_reset_tasks_is_driven_by_the_given_ids():
+    plan = query_plan("reset_tasks")
+    assert plan[0].startswith("SCAN reset VIRTUAL TABLE"), plan
+    assert "idx_tasks_state" not in " ".join(plan), plan
+    assert any(detail.startswith("SEARCH tasks USING INDEX") for detail in plan)
+
+    job = Job("reset")
+    for i in range(3):
+        job.add_task(Task(commands.TestCommand(i)))
+    db.insert_job(job)
+    running, waiting, _ = job.tasks
+    assert db.start_task(str(running.id))
+
+    reset = db.reset_tasks([str(running.id), str(waiting.id), "missing"])
+    assert [t["id"] for t in reset] == [str(running.id)]
+    assert reset[0]["state"] == TaskState.Waiting
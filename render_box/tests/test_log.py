@@ -0,0 +1,43 @@
+import io
+
+from render_box.shared.log import Level, LogBuffer, Logger
+
+
+class Lazy:
+    def __init__(self) -> None:
+        self.formatted = 0
+
+    def __str__(self) -> str:
+        self.formatted += 1
+        return "lazy"
+
+
+def test_disabled_levels_are_not_buffered():
+    stream = io.StringIO()
+    buffer = LogBuffer(stream=stream)
+    log = Logger("test", buffer)
+    lazy = Lazy()
+
+    log.debug("value %s", lazy)
+    log.info("value %s", lazy)
+    assert lazy.formatted == 0
+
+    buffer.flush()
+    assert lazy.formatted == 1
+    assert stream.getvalue().endswith("INFO    test: value lazy\n")
+    assert "DEBUG" not in stream.getvalue()
+
+
+def test_overflow_drops_oldest_records():
+    stream = io.StringIO()
+    buffer = LogBuffer(size=4, stream=stream)
+    buffer.level = Level.DEBUG
+    log = Logger("test", buffer)
+
+    for i in range(10):
+        log.debug("record %d", i)
+    buffer.flush()
+
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "6 log records dropped"
+    assert [line.rsplit(" ", 1)[-1] for line in lines[1:]] == ["6", "7", "8", "9"]
@@ -0,0 +1,78 @@
+import pytest
+
+from render_box.shared.message import Message, MessageRouter
+from render_box.shared.metrics import BUCKETS, UNREGISTERED, Metrics, RouteMetrics
+
+
+class Context:
+    def __init__(self) -> None:
+        self.sent: list[Message] = []
+
+    def send(self, message: Message) -> None:
+        self.sent.append(message)
+
+
+@pytest.fixture
+def router() -> MessageRouter:
+    router = MessageRouter("tasks", metrics=Metrics())
+
+    @router.register(".next")
+    def next_task(ctx, message: Message):
+        router.metrics.add("db", 0.25)
+        ctx.send(Message("tasks"))
+
+    @router.register(".fail")
+    def fail(ctx, message: Message):
+        raise ValueError("failed")
+
+    return router
+
+
+def test_serve_counts_requests_and_phases(router: MessageRouter):
+    ctx = Context()
+    for _ in range(3):
+        router.serve(ctx, Message("tasks.next"))
+    with pytest.raises(ValueError):
+        router.serve(ctx, Message("tasks.fail"))
+    router.serve(ctx, Message("tasks.unknown"))
+
+    routes = router.metrics.serialize()["routes"]
+    assert routes["tasks.next"]["requests"] == 3
+    assert routes["tasks.next"]["in_flight"] == 0
+    assert routes["tasks.next"]["phases"]["db"] == pytest.approx(0.75)
+    assert sum(routes["tasks.next"]["buckets"]) == 3
+    assert routes["tasks.fail"]["errors"] == 1
+    assert routes[UNREGISTERED]["requests"] == 1
+    assert "tasks.unknown" not in routes
+
+
+def test_phases_outside_of_a_route_are_dropped():
+    metrics = Metrics()
+    metrics.add("send", 1.0)
+    assert metrics.serialize()["routes"] == {}
+
+
+def test_prometheus_histogram_is_cumulative(router: MessageRouter):
+    router.serve(Context(), Message("tasks.next"))
+
+    text = router.metrics.prometheus()
+
+    buckets = [line for line in text.splitlines() if "_bucket{" in line]
+    assert len(buckets) == len(BUCKETS) + 1
+    assert (
+        buckets[-1]
+        == 'render_box_request_seconds_bucket{route="tasks.next",le="+Inf"} 1'
+    )
+    assert "# TYPE render_box_request_seconds histogram" in text
+
+
+def test_quantile_in_the_overflow_bucket():
+    metrics = RouteMetrics()
+    assert metrics.quantile(0.5) is None
+
+    metrics.requests = 100
+    metrics.buckets[0] = 98
+    metrics.buckets[-1] = 2
+    assert metrics.quantile(0.5) == BUCKETS[0]
+    assert metrics.quantile(0.99) == BUCKETS[-1]
+    assert metrics.serialize()["p99"] == BUCKETS[-1]
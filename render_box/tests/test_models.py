@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("PySide6")
+
+from render_box.monitor.ui.models import JobModel, row_ranges  # noqa: E402
+from render_box.shared.serialize import SerializedJob  # noqa: E402
+
+
+def job(id: str, state: str = "waiting") -> SerializedJob:
+    return SerializedJob(
+        id=id,
+        name=f"Job {id}",
+        priority=50,
+        timestamp=0.0,
+        state=state,
+        tasks=[],
+        waiting_count=1,
+        progress_count=0,
+        completed_count=0,
+    )
+
+
+def test_row_ranges_groups_contiguous_rows():
+    assert row_ranges([5, 1, 2, 3, 7, 8]) == [(1, 3), (5, 5), (7, 8)]
+
+
+def test_sync_rows_updates_index_after_removal():
+    model = JobModel()
+    model.load([job(str(i)) for i in range(6)])
+
+    model.load([job("0"), job("3", "progress"), job("5"), job("6")])
+
+    assert model.keys == ["0", "3", "5", "6"]
+    assert all(model.rows[key] == row for row, key in enumerate(model.keys))
+    assert model.index(model.rows["3"], 2).data() == "progress"
+
+
+def test_sort_keeps_index_consistent():
+    model = JobModel()
+    model.load([job(id) for id in ("c", "a", "b")])
+
+    model.sort(JobModel.column_labels.index("ID"))
+
+    assert model.keys == ["a", "b", "c"]
+    assert all(model.rows[key] == row for row, key in enumerate(model.keys))
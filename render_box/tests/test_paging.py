@@ -0,0 +1,75 @@
+from typing import Any
+
+import pytest
+
+from render_box.server import db
+from render_box.server.job_manager import JobManager
+from render_box.server.paging import MAX_PAGE_SIZE, PageRequest
+from render_box.server.server import ClientHandler, create_router
+from render_box.shared import commands
+from render_box.shared.codec import JSON_CODEC
+from render_box.shared.job import Job
+from render_box.shared.message import Message
+from render_box.shared.task import Task, TaskState
+from render_box.tests.conftest import FakeConnection
+
+
+def test_tasks_page_walks_every_task_once(job_manager: JobManager):
+    job = Job("paged")
+    for i in range(25):
+        job.add_task(Task(commands.TestCommand(i)))
+    job_manager.add_job(job)
+
+    seen: list[str] = []
+    page = PageRequest(limit=10)
+    while True:
+        result = job_manager.get_tasks_page(str(job.id), page)
+        seen.extend(task["id"] for task in result["rows"])
+        if result["next"] is None:
+            break
+        page.after = result["next"]
+
+    assert seen == [str(task.id) for task in job.tasks]
+
+
+def test_tasks_page_filters_by_state(job_manager: JobManager):
+    job = Job("filtered")
+    for i in range(4):
+        job.add_task(Task(commands.TestCommand(i)))
+    job_manager.add_job(job)
+    job.tasks[1].state = TaskState.Completed
+    db.update_task(job.tasks[1])
+
+    page = PageRequest(state=TaskState.Completed)
+    result = job_manager.get_tasks_page(str(job.id), page)
+
+    assert [task["id"] for task in result["rows"]] == [str(job.tasks[1].id)]
+    assert result["next"] is None
+
+
+def test_page_request_clamps_limit():
+    assert PageRequest.from_data({"limit": 10**9}).limit == MAX_PAGE_SIZE
+    assert PageRequest.from_data({"limit": -5}).limit == 1
+    assert PageRequest.from_data(None) == PageRequest()
+
+
+@pytest.mark.parametrize(
+    "route, data, expected",
+    [
+        ("tasks.page", None, {"rows": [], "next": None}),
+        ("tasks.page", {"limit": 10}, {"rows": [], "next": None}),
+        ("tasks.all", None, []),
+        ("tasks.all", {"job_id": None}, {"tasks": [], "frames": None}),
+    ],
+)
+def test_task_routes_without_job_reply_empty(
+    job_manager: JobManager, route: str, data: Any, expected: Any
+):
+    connection = FakeConnection()
+    handler = ClientHandler(connection, job_manager, create_router())
+
+    handler.handle_message(Message(route, data, 4))
+
+    reply = JSON_CODEC.decode(connection.frames[-1])
+    assert reply.id == 4
+    assert reply.data == expected
@@ -0,0 +1,118 @@
+from threading import Thread
+from typing import Any
+
+import pytest
+
+from render_box.server.job_manager import JobManager
+from render_box.server.server import ClientHandler, create_router
+from render_box.shared.codec import JSON_CODEC
+from render_box.shared.message import Message, MessageRouter
+from render_box.shared.metrics import Metrics
+from render_box.shared.profiler import Profiler, ProfileSession
+from render_box.shared.worker import Worker
+from render_box.tests.conftest import FakeConnection
+
+
+class Context:
+    def __init__(self, name: str = "worker") -> None:
+        self.worker = Worker(1, name)
+        self.sent: list[Message] = []
+
+    def send(self, message: Message) -> None:
+        self.sent.append(message)
+
+
+def busy() -> int:
+    return sum(range(1000))
+
+
+@pytest.fixture
+def router() -> MessageRouter:
+    router = MessageRouter("tasks", metrics=Metrics(), profiler=Profiler())
+
+    @router.register(".next")
+    def next_task(ctx, message: Message):
+        busy()
+        ctx.send(Message("tasks"))
+
+    @router.register(".complete")
+    def complete(ctx, message: Message):
+        ctx.send(Message("ok"))
+
+    return router
+
+
+def test_profile_counts_messages_per_route(router: MessageRouter):
+    session = ProfileSession(10, 100)
+    assert router.profiler.start(session)
+    assert not router.profiler.start(ProfileSession(10, 100))
+
+    ctx = Context()
+    for _ in range(3):
+        router.serve(ctx, Message("tasks.next"))
+    router.serve(ctx, Message("tasks.complete"))
+    router.profiler.stop(session)
+    router.serve(ctx, Message("tasks.next"))
+
+    result = session.serialize(limit=1000)
+    assert result["messages"] == 4
+    assert result["routes"]["tasks.next"]["messages"] == 3
+    assert result["routes"]["tasks.complete"]["messages"] == 1
+    # the stats cover the whole process while the session runs
+    assert "busy" in result["stats"]
+    assert len(ctx.sent) == 5
+
+
+def test_profile_filters_routes_and_workers(router: MessageRouter):
+    session = ProfileSession(10, 100, routes={"tasks.next"}, workers={"farm-01"})
+    router.profiler.start(session)
+
+    router.serve(Context("farm-01"), Message("tasks.next"))
+    router.serve(Context("farm-01"), Message("tasks.complete"))
+    router.serve(Context("farm-02"), Message("tasks.next"))
+    router.profiler.stop(session)
+
+    assert list(session.serialize()["routes"]) == ["tasks.next"]
+    assert session.messages == 1
+
+
+def test_profile_ends_after_message_limit(router: MessageRouter):
+    session = ProfileSession(10, 2)
+    router.profiler.start(session)
+
+    waiter = Thread(target=session.wait)
+    waiter.start()
+    for _ in range(5):
+        router.serve(Context(), Message("tasks.next"))
+    waiter.join(1)
+
+    assert not waiter.is_alive()
+    assert session.messages == 2
+    assert session.profile is None
+
+
+def test_profile_route_replies_before_the_results(job_manager: JobManager):
+    connection = FakeConnection()
+    router = create_router()
+    router.profiler = Profiler()
+    handler = ClientHandler(connection, job_manager, router)
+
+    def request(message: str, data: Any = None) -> Any:
+        handler.handle_message(Message(message, data))
+        return JSON_CODEC.decode(connection.frames[-1]).data
+
+    assert "error" in request("debug.profile.results")
+    assert request("debug.profile", {"seconds": "soon"}) == {
+        "error": "invalid profile request"
+    }
+    assert request("debug.profile", {"seconds": 10, "messages": 1}) == {"seconds": 10.0}
+    # the results request is the one message the session waits for
+    assert request("debug.profile.results") == {"running": True}
+    request("docs")
+
+    assert request("debug.profile.results", {"sort": "bogus"}) == {
+        "error": "invalid sort key or limit"
+    }
+    result = request("debug.profile.results", {"sort": "time", "limit": 5})
+    assert result["messages"] == 1
+    assert list(result["routes"]) == ["debug.profile.results"]
@@ -0,0 +1,59 @@
+import pytest
+
+from render_box.server import db
+from render_box.shared import commands
+from render_box.shared.job import Job, JobState
+from render_box.shared.task import Task
+from render_box.tests.conftest import query_plan
+
+HOT_QUERIES = (
+    "start_task",
+    "select_job",
+    "complete_job",
+    "select_job_by_id",
+    "claim_frame",
+    "select_frame_range",
+    "reset_tasks",
+    "select_tasks_by_job",
+    "select_waiting_tasks",
+    "select_waiting_frames",
+    "update_task",
+    "select_tasks_page",
+    "select_jobs_page",
+    "select_workers_page",
+)
+TABLES = ("tasks", "jobs", "workers", "frame_ranges")
+
+
+pytestmark = pytest.mark.usefixtures("database")
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_no_full_table_scan(name: str):
+    for detail in query_plan(name):
+        assert detail not in {f"SCAN {table}" for table in TABLES}, detail
+
+
+def test_dispatch_queries_use_the_indexes():
+    (start,) = query_plan("start_task")
+    assert start.startswith("SEARCH tasks USING INDEX") and "(id=?)" in start
+    for name in ("select_waiting_tasks", "select_waiting_frames"):
+        plan = query_plan(name)
+        assert plan[0].startswith("SEARCH jobs USING INDEX idx_jobs_state"), plan
+    assert "idx_tasks_job_state" in query_plan("select_waiting_tasks")[1]
+
+
+def test_waiting_tasks_skip_started_tasks_and_finished_jobs():
+    job = Job("loaded", priority=70)
+    for i in range(2):
+        job.add_task(Task(commands.TestCommand(i), priority=20 + i))
+    db.insert_job(job)
+    started, waiting = job.tasks
+    assert db.start_task(str(started.id))
+
+    (row,) = db.iter_waiting_tasks()
+    assert row[:3] == (str(waiting.id), str(job.id), 21)
+    assert row[4] == 70
+
+    db.update_job(Job("loaded", id=job.id, state=JobState.Completed))
+    assert list(db.iter_waiting_tasks()) == []
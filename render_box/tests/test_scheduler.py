@@ -0,0 +1,65 @@
+from render_box.server.scheduler import Scheduler
+
+
+def drain(scheduler: Scheduler) -> list[str]:
+    popped = []
+    while entry := scheduler.pop():
+        popped.append(entry[0])
+    return popped
+
+
+def test_jobs_by_priority_then_timestamp():
+    scheduler = Scheduler()
+    # task id, job id, priority, timestamp, job priority, job timestamp
+    scheduler.load(
+        [
+            ("old-low", "old", 50, 1.0, 50, 1.0),
+            ("old-high", "old", 90, 2.0, 50, 1.0),
+            ("new", "new", 99, 1.0, 50, 2.0),
+        ]
+    )
+    scheduler.push("urgent-b", 50, 2.0, "urgent", 90, 3.0)
+    scheduler.push("urgent-a", 50, 1.0, "urgent", 90, 3.0)
+
+    # a job's priority wins over the priorities of other jobs' tasks, tasks
+    # are ordered within their job
+    assert drain(scheduler) == ["urgent-a", "urgent-b", "old-high", "old-low", "new"]
+    assert len(scheduler) == 0
+    assert scheduler.jobs == {}
+
+
+def test_update_job_rekeys_it():
+    scheduler = Scheduler()
+    scheduler.push("a-1", 50, 1.0, "a", 50, 1.0)
+    scheduler.push("a-2", 50, 2.0, "a", 50, 1.0)
+    scheduler.push("b-1", 50, 1.0, "b", 60, 2.0)
+
+    scheduler.update_job("a", 70, 1.0)
+    assert scheduler.pop() == ("a-1", "a")
+
+    scheduler.update_job("a", 10, 1.0)
+    assert drain(scheduler) == ["b-1", "a-2"]
+
+    # unknown jobs and unchanged keys are ignored
+    scheduler.update_job("missing", 99, 0.0)
+    scheduler.update_job("b", 60, 2.0)
+    assert scheduler.pop() is None
+
+
+def test_stale_entries_are_skipped_lazily():
+    scheduler = Scheduler()
+    scheduler.push("a-1", 50, 1.0, "a", 50, 1.0)
+    scheduler.push("a-2", 50, 2.0, "a", 50, 1.0)
+    for priority in (60, 70, 80):
+        scheduler.update_job("a", priority, 1.0)
+    # every re-key left the old key in the heap
+    assert len(scheduler._heap) == 4
+    assert len(scheduler) == 2
+
+    assert drain(scheduler) == ["a-1", "a-2"]
+    assert scheduler._heap == []
+
+    # a job that ran out of tasks is scheduled again from scratch
+    scheduler.push("a-3", 50, 3.0, "a", 50, 1.0)
+    scheduler.push("b-1", 50, 1.0, "b", 60, 2.0)
+    assert drain(scheduler) == ["b-1", "a-3"]
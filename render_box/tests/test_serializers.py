@@ -0,0 +1,76 @@
+from uuid import UUID
+
+from render_box.shared import commands
+from render_box.shared.frames import FrameRange
+from render_box.shared.job import Job
+from render_box.shared.task import Task, TaskState
+from render_box.shared.worker import Worker, WorkerState
+
+
+def test_job_round_trip():
+    job = Job("job", priority=70, waiting_count=2)
+    job.add_task(Task(commands.TestCommand(1), priority=10))
+    job.add_task(Task(commands.TestCommand(2), state=TaskState.Completed))
+
+    data = job.serialize()
+    assert list(data) == [
+        "id",
+        "priority",
+        "name",
+        "state",
+        "timestamp",
+        "tasks",
+        "waiting_count",
+        "progress_count",
+        "completed_count",
+    ]
+    assert data["tasks"][0]["job_id"] == job.id
+
+    loaded = Job.deserialize(data)
+    assert loaded and loaded.serialize() == data
+    assert loaded.tasks[1].state is TaskState.Completed
+
+
+def test_optional_fields_and_defaults():
+    job = Job("frames", frames=FrameRange(commands.TestCommand(0), 1, 10))
+    data = job.serialize()
+    assert data["frames"]["end"] == 10
+
+    del data["waiting_count"]
+    loaded = Job.deserialize(data)
+    assert loaded and loaded.waiting_count == 0
+    assert loaded.frames and len(loaded.frames) == 10
+
+
+def test_task_with_unknown_command_is_rejected():
+    data = Task(commands.TestCommand(0)).serialize()
+    data["command"] = {"name": "Missing", "data": {}}
+    assert Task.deserialize(data) is None
+
+
+def test_ids_are_canonical_uuids():
+    task = Task(commands.TestCommand(0))
+    assert str(UUID(task.id)) == task.id
+    assert UUID(task.id).version == 4
+    uuid = UUID(int=1)
+    assert Task(commands.TestCommand(0), id=uuid, job_id=uuid).job_id == str(uuid)
+
+
+def test_worker_serialize_is_a_copy():
+    worker = Worker(1, "render-01", WorkerState.Idle, 10.0)
+    data = worker.serialize()
+    data["state"] = WorkerState.Offline
+    assert worker.state is WorkerState.Idle
+    assert Worker.deserialize(worker.serialize()).serialize() == worker.serialize()
+    assert not hasattr(worker, "__dict__")
+
+
+def test_records_load_through_the_constructors():
+    data = Task(commands.TestCommand(0), priority=0).serialize()
+    data["id"] = UUID(int=1)  # type: ignore[typeddict-item]
+    data["timestamp"] = None
+
+    loaded = Task.deserialize(data)
+    assert loaded and loaded.priority == 0
+    assert loaded.id == str(UUID(int=1))
+    assert loaded.timestamp
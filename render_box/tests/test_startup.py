@@ -0,0 +1,40 @@
+import pytest
+
+from render_box.benchmarks.startup import COMMANDS, HEAVY, import_times
+from render_box.shared import commands
+from render_box.shared.commands import CommandManager
+
+
+@pytest.mark.parametrize("command", ["cli", "worker", "submit", "server"])
+def test_commands_do_not_import_the_monitor(command: str):
+    imported = import_times(COMMANDS[command])
+    assert not [name for name in imported if name.startswith(HEAVY)]
+    if command != "server":
+        assert "asyncio" not in imported
+
+
+class FakeEntryPoint:
+    def __init__(self, name: str, loaded: list[str]) -> None:
+        self.name = name
+        self.value = f"plugin:{name}"
+        self.loaded = loaded
+
+    def load(self):
+        self.loaded.append(self.name)
+        return type(self.name, (commands.TestCommand,), {})
+
+
+def test_command_plugins_load_on_first_use(monkeypatch: pytest.MonkeyPatch):
+    loaded: list[str] = []
+    plugins = {name: FakeEntryPoint(name, loaded) for name in ("Blender", "Nuke")}
+    monkeypatch.setattr(CommandManager, "plugins", plugins)
+    monkeypatch.setattr(CommandManager, "commands", dict(CommandManager.commands))
+
+    assert CommandManager.get_command("TestCommand") is commands.TestCommand
+    assert loaded == []
+
+    blender = CommandManager.get_command("Blender")
+    assert blender and blender.__name__ == "Blender"
+    assert CommandManager.get_command("Blender") is blender
+    assert loaded == ["Blender"]
+    assert CommandManager.get_command("Missing") is None